@@ -1,17 +1,25 @@
+import asyncio
 import logging
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError, HTTPException
 from starlette.requests import Request
-from starlette.responses import JSONResponse
 
-from recommendation.api.v1.adapters.models import init_db
+from recommendation.api.v1.adapters.database_asyncpg import AsyncpgRecommendationRepository
+from recommendation.api.v1.adapters.local_cache import LocalCache
+from recommendation.api.v1.adapters.models import POSTGRES_DSN, engine, init_db
+from recommendation.api.v1.adapters.recommendation_snapshot import RecommendationSnapshot
+from recommendation.api.v1.adapters.storage_cache_redis import AsyncRedisStorage
+from recommendation.api.v1.common.responses import ORJSONResponse
 from recommendation.api.v1.endpoints.upload_file import router as file_router
 from recommendation.api.v1.endpoints.video_recommendation import router as recommendation_router
 from recommendation.api.v1.service_layer.events.event_bus import EventBus
 from recommendation.api.v1.service_layer.events.event_handlers import generate_recommendations_handler, save_file_handler
-from recommendation.api.v1.service_layer.similar_videos import get_similar_videos
+from recommendation.api.v1.service_layer.manager_storage import CacheStorageManager
+from recommendation.api.v1.service_layer.similar_videos import watch_cache_generation
+from recommendation.api.v1.utils.similarity_recommendation.similarity_index import SparseSimilarityIndex
+from recommendation.config import settings
 
 logging.basicConfig(level=logging.INFO)
 
@@ -32,7 +40,15 @@ async def lifespan(app: FastAPI):
     Рекомендуемая логика:
         1. Создать шину событий в `app.state`.
         2. Подписать обработчики на соответствующие события.
-        3. После выполнения задач на выходе шина событий и подписчики очищаются.
+        3. Создать общие для всех запросов клиенты Postgres (пул asyncpg для чтения рекомендаций)
+           и Redis.
+        4. Отобразить в память снимок рекомендаций последнего построения, если включена настройка
+           `recommendation_snapshot_enabled`.
+        5. Создать локальный кеш рекомендаций.
+        6. Загрузить индекс сходства, если включена настройка `similarity_index_enabled`.
+        7. Запустить задачу, сбрасывающую локальный кеш и переключающую снимок и индекс сходства
+           при новом построении.
+        8. После выполнения задач на выходе остановить задачу и закрыть пулы соединений Redis и Postgres.
     """
     await init_db()
     # Создание и настройка шины событий
@@ -41,20 +57,69 @@ async def lifespan(app: FastAPI):
     app.state.event_bus.subscribe("generate_recommendations", generate_recommendations_handler)
     app.state.event_bus.subscribe("file_uploaded", save_file_handler)
 
+    # Клиенты создаются один раз и передаются в обработчики через зависимости FastAPI
+    app.state.read_repository = await AsyncpgRecommendationRepository.create(
+        POSTGRES_DSN,
+        min_size=settings.database_read_pool_min_size,
+        max_size=settings.database_read_pool_max_size
+    )
+    app.state.cache_storage = AsyncRedisStorage(
+        host=settings.redis_host,
+        port=settings.redis_port,
+        db=settings.new_db,
+        max_connections=settings.redis_max_connections
+    )
+
+    # Снимок рекомендаций в памяти: страницы файла общие для всех процессов API на машине
+    app.state.recommendation_snapshot = None
+    if settings.recommendation_snapshot_enabled:
+        app.state.recommendation_snapshot = RecommendationSnapshot(settings.path_recommendation_snapshot)
+        try:
+            app.state.recommendation_snapshot.reload()
+        except ValueError as e:
+            logging.warning(f"Снимок рекомендаций не загружен: {e}")
+
+    # Локальный кеш процесса, сбрасываемый при смене поколения построения
+    app.state.local_cache = LocalCache(max_size=settings.local_cache_size, ttl=settings.local_cache_ttl)
+
+    # Индекс сходства для расчёта рекомендаций новых видео по запросу
+    app.state.similarity_index = None
+    if settings.similarity_index_enabled:
+        try:
+            app.state.similarity_index = SparseSimilarityIndex.load(settings.path_tfidf_state)
+        except FileNotFoundError as e:
+            logging.warning(f"Индекс сходства не загружен: {e}")
+
+    # Задача, сверяющая публикации рекомендаций и переключающая снимок и индекс сходства
+    generation_watcher = asyncio.create_task(watch_cache_generation(
+        app.state.local_cache,
+        CacheStorageManager(app.state.cache_storage),
+        settings.cache_generation_poll_interval,
+        app.state.recommendation_snapshot,
+        app.state.similarity_index
+    ))
+
     # Передаем управление приложению
     yield
 
     # Очистка при завершении работы приложения
     print("Shutting down...")
+    generation_watcher.cancel()
+    with suppress(asyncio.CancelledError):
+        await generation_watcher
+    await app.state.cache_storage.close()
+    await app.state.read_repository.close()
+    await engine.dispose()
 
 
-# Инициализация приложения FastAPI с управлением жизненным циклом через контекстный менеджер
-app = FastAPI(lifespan=lifespan)
+# Инициализация приложения FastAPI с управлением жизненным циклом через контекстный менеджер;
+# ответы по умолчанию сериализуются через orjson
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # Глобальный обработчик ошибок валидации
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code = 400,
         content={"message": "Ошибка валидации данных", "errors": exc.errors()}
     )
@@ -62,7 +127,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 # Глобальный обработчик HTTPException
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={"message": exc.detail, "path": request.url.path}
     )
@@ -70,7 +135,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
 # Глобальный обработчик для всех остальных исключений (например, ValueError)
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={"Произошла непредвиденная ошибка": str(exc), "path": request.url.path}
     )
@@ -0,0 +1,85 @@
+from typing import Dict, List
+
+import asyncpg
+
+from recommendation.api.v1.domain.recommendation_read_repository import (
+    RecommendationReadRepository,
+    RecommendationRow,
+)
+
+
+class AsyncpgRecommendationRepository(RecommendationReadRepository):
+    """
+    Лёгкий репозиторий чтения рекомендаций напрямую через пул соединений asyncpg.
+
+    В отличие от `SQLAlchemyRepository.get`, не создаёт ORM-сущность, не заполняет
+    identity map и не читает лишние колонки (created_at, updated_at): выбираются только
+    массивы рекомендаций и сходства. asyncpg подготавливает запрос на соединении при первом
+    выполнении и кеширует подготовленный оператор, поэтому повторные запросы передают
+    только параметры и разбираются сервером без повторного планирования.
+    """
+
+    GET_QUERY = "SELECT recommendation_id, recommendation_score FROM similar_recommendation WHERE id = $1"
+    GET_MANY_QUERY = (
+        "SELECT id, recommendation_id, recommendation_score FROM similar_recommendation WHERE id = ANY($1::int[])"
+    )
+
+    def __init__(self, pool: asyncpg.Pool):
+        """
+        Инициализирует репозиторий.
+
+        Args:
+            pool (asyncpg.Pool): Пул соединений asyncpg.
+        """
+        self.pool = pool
+
+    @classmethod
+    async def create(cls, dsn: str, min_size: int = 1, max_size: int = 10) -> "AsyncpgRecommendationRepository":
+        """
+        Создаёт репозиторий с новым пулом соединений.
+
+        Args:
+            dsn (str): Строка подключения к Postgres (postgresql://...).
+            min_size (int): Минимальное количество соединений в пуле.
+            max_size (int): Максимальное количество соединений в пуле.
+
+        Returns:
+            AsyncpgRecommendationRepository: Репозиторий с открытым пулом.
+        """
+        return cls(await asyncpg.create_pool(dsn, min_size=min_size, max_size=max_size))
+
+    async def get(self, video_id: int) -> RecommendationRow | None:
+        """
+        Получает рекомендации одного видео.
+
+        Args:
+            video_id (int): ID видео.
+
+        Returns:
+            RecommendationRow | None: Рекомендации и сходство или None, если записи нет.
+        """
+        async with self.pool.acquire() as connection:
+            row = await connection.fetchrow(self.GET_QUERY, video_id)
+        return None if row is None else (row[0], row[1])
+
+    async def get_many(self, video_ids: List[int]) -> Dict[int, RecommendationRow]:
+        """
+        Получает рекомендации нескольких видео одним запросом `WHERE id = ANY($1)`.
+
+        Args:
+            video_ids (List[int]): ID видео.
+
+        Returns:
+            Dict[int, RecommendationRow]: Рекомендации найденных видео.
+        """
+        if not video_ids:
+            return {}
+        async with self.pool.acquire() as connection:
+            rows = await connection.fetch(self.GET_MANY_QUERY, video_ids)
+        return {row[0]: (row[1], row[2]) for row in rows}
+
+    async def close(self):
+        """
+        Закрывает пул соединений.
+        """
+        await self.pool.close()
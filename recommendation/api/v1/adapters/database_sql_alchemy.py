@@ -1,10 +1,10 @@
-from typing import Dict, Any, List, Generator
-import pandas
+from typing import Dict, Any, AsyncIterable, Iterable, List
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from recommendation.api.v1.domain.database_repository import DatabaseRepository
+from recommendation.api.v1.utils.similarity_recommendation.recommendation_result import RecommendationResult
 
 
 class SQLAlchemyRepository(DatabaseRepository):
@@ -21,23 +21,63 @@ class SQLAlchemyRepository(DatabaseRepository):
         """
         self.session = session
 
-    async def bulk_update(self, query: str, params: List[Dict[str, Any]]) -> Dict[str, Any] | None:
+    async def bulk_update(self, query: str, params: RecommendationResult) -> Dict[str, Any] | None:
         """
         Выполняет массовое обновление данных.
 
         Args:
             query (str): SQL-запрос.
-            params (List[Dict[str, Any]]): Список данных для массового обновления.
+            params (RecommendationResult): Пакет рекомендаций для массового обновления.
 
         Returns:
             Dict[str, Any] | None: Результат операции или None в случае успеха.
         """
         try:
-            values = [{"id": item["id"], "recommended_ids": item["recommended_ids"]} for item in params]
+            values = [
+                {"id": video_id, "recommended_ids": recommended_ids, "scores": scores}
+                for video_id, recommended_ids, scores in params.records()
+            ]
             await self.session.execute(text(query), values)
         except Exception:
             raise
 
+    async def bulk_delete(self, query: str, ids: List[int]) -> None:
+        """
+        Выполняет массовое удаление данных.
+
+        Args:
+            query (str): SQL-запрос с параметром `:ids`.
+            ids (List[int]): Идентификаторы удаляемых записей.
+        """
+        await self.session.execute(text(query), {"ids": ids})
+
+    async def execute(self, query: str) -> None:
+        """
+        Выполняет один SQL-оператор без параметров в транзакции сессии.
+
+        Args:
+            query (str): SQL-запрос.
+        """
+        await self.session.execute(text(query))
+
+    async def copy_records(
+            self, table: str, columns: List[str], records: Iterable[tuple] | AsyncIterable[tuple]
+    ) -> None:
+        """
+        Загружает строки бинарным `COPY ... FROM STDIN` через соединение asyncpg сессии.
+
+        Строки передаются потоком без построчного планирования запросов и входят
+        в ту же транзакцию, что и остальные операции сессии.
+
+        Args:
+            table (str): Имя таблицы.
+            columns (List[str]): Колонки в порядке значений строки.
+            records (Iterable[tuple] | AsyncIterable[tuple]): Строки для загрузки.
+        """
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(table, records=records, columns=columns)
+
     async def get(self,model: Any, primary_key: int):
         """Находит запись по первичному ключу"""
         return await self.session.get(model, primary_key)
@@ -59,24 +99,3 @@ class SQLAlchemyRepository(DatabaseRepository):
         Закрываем асинхронную сессию
         """
         await self.session.close()
-
-
-    def batch_generator(self,df: pandas.DataFrame, batch_size: int = 1000) -> Generator[List[Dict[str, Any]], None, None]:
-        """
-        Генератор, который возвращает данные из DataFrame пакетами.
-
-        Args:
-            df (pd.DataFrame): Входной DataFrame.
-            batch_size (int): Размер пакета.
-
-        Yields:
-            List[Dict[str, Any]]: Пакет данных.
-        """
-        batch = []
-        for _, row in df.iterrows():
-            batch.append(row.to_dict())
-            if len(batch) >= batch_size:
-                yield batch
-                batch = []
-        if batch:
-            yield batch
@@ -1,9 +1,34 @@
+from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from recommendation.api.v1.adapters.local_cache import LocalCache
 from recommendation.api.v1.adapters.models import engine
+from recommendation.api.v1.adapters.recommendation_snapshot import RecommendationSnapshot
+from recommendation.api.v1.domain.recommendation_read_repository import RecommendationReadRepository
+from recommendation.api.v1.service_layer.manager_storage import CacheStorageManager
 
 
 async def get_db():
-    """Создает и возвращает сессию."""
+    """Создает и возвращает сессию (используется задачей публикации построения вне запросов FastAPI)."""
     session = AsyncSession(engine)
     return session
+
+
+async def get_cache_manager(request: Request) -> CacheStorageManager:
+    """Зависимость FastAPI: менеджер кеша поверх общего клиента Redis приложения."""
+    return CacheStorageManager(request.app.state.cache_storage)
+
+
+async def get_local_cache(request: Request) -> LocalCache:
+    """Зависимость FastAPI: локальный кеш рекомендаций процесса."""
+    return request.app.state.local_cache
+
+
+async def get_read_repository(request: Request) -> RecommendationReadRepository:
+    """Зависимость FastAPI: лёгкий репозиторий чтения рекомендаций поверх общего пула asyncpg."""
+    return request.app.state.read_repository
+
+
+async def get_snapshot(request: Request) -> RecommendationSnapshot | None:
+    """Зависимость FastAPI: снимок рекомендаций последнего построения (None, если отключён)."""
+    return request.app.state.recommendation_snapshot
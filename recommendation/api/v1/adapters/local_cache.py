@@ -0,0 +1,104 @@
+import time
+from collections import OrderedDict
+from typing import Any
+
+
+class LocalCache:
+    """
+    Ограниченный кеш в памяти процесса с вытеснением по размеру (LRU) и времени жизни (TTL).
+
+    Хранит уже десериализованные значения, поэтому попадание не требует ни сетевого
+    запроса к Redis, ни разбора JSON. Кеш привязан к поколению построения рекомендаций:
+    при смене поколения (`set_generation`) все записи сбрасываются, а после частичной
+    публикации удаляются только записи изменённых видео (`discard`).
+
+    Кеш не потокобезопасен и рассчитан на использование из одного цикла событий.
+
+    Attributes:
+        max_size (int): Максимальное количество записей (0 отключает кеш).
+        ttl (float): Время жизни записи в секундах.
+        generation (int | None): Поколение построения, к которому относятся записи.
+        revision (int | None): Номер последней публикации, изменения которой учтены в кеше.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        """
+        Инициализирует LocalCache.
+
+        Args:
+            max_size (int): Максимальное количество записей.
+            ttl (float): Время жизни записи в секундах.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.generation = None
+        self.revision = None
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Any:
+        """
+        Возвращает значение по ключу и отмечает его как недавно использованное.
+
+        Args:
+            key (str): Ключ записи.
+
+        Returns:
+            Any: Значение или None, если записи нет или её время жизни истекло.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Сохраняет значение, вытесняя давно не использованные записи при переполнении.
+
+        Args:
+            key (str): Ключ записи.
+            value (Any): Значение.
+        """
+        if self.max_size <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def discard(self, keys) -> None:
+        """
+        Удаляет записи по ключам, если они есть.
+
+        Args:
+            keys: Ключи удаляемых записей.
+        """
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Удаляет все записи."""
+        self._entries.clear()
+
+    def set_generation(self, generation: int) -> bool:
+        """
+        Привязывает кеш к поколению построения, сбрасывая записи при его смене.
+
+        Args:
+            generation (int): Текущее поколение построения.
+
+        Returns:
+            bool: True, если поколение изменилось и кеш был сброшен.
+        """
+        if generation == self.generation:
+            return False
+        self.clear()
+        self.generation = generation
+        return True
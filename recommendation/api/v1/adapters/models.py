@@ -1,11 +1,13 @@
-from typing import List
+from typing import Dict, List
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, NonNegativeInt
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.orm import declarative_base
-from sqlalchemy import Column, Integer, ARRAY, TIMESTAMP, func
+from sqlalchemy import Column, Integer, ARRAY, REAL, TIMESTAMP, func, text
 import os
 
+from recommendation.config import settings
+
 # Подключение к базе данных через асинхронный драйвер
 POSTGRES_USER = os.getenv("POSTGRES_USER")
 POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD")
@@ -13,10 +15,16 @@ POSTGRES_HOST = os.getenv("POSTGRES_HOST")
 POSTGRES_PORT = os.getenv("POSTGRES_PORT")
 POSTGRES_DB = os.getenv("POSTGRES_DB")
 
-SQLALCHEMY_DATABASE_URL = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+POSTGRES_DSN = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+SQLALCHEMY_DATABASE_URL = POSTGRES_DSN.replace("postgresql://", "postgresql+asyncpg://", 1)
 
-# Создание асинхронного движка
-engine = create_async_engine(SQLALCHEMY_DATABASE_URL, echo=True)
+# Создание асинхронного движка; пул соединений общий для всех запросов процесса
+engine = create_async_engine(
+    SQLALCHEMY_DATABASE_URL,
+    echo=settings.database_echo,
+    pool_size=settings.database_pool_size,
+    max_overflow=settings.database_max_overflow,
+)
 
 Base = declarative_base()
 
@@ -25,6 +33,7 @@ class SimilarContentRecommendation(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     recommendation_id = Column(ARRAY(Integer))
+    recommendation_score = Column(ARRAY(REAL))  # Сходство с рекомендациями, в порядке recommendation_id
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())  # Время создания
     updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now())  # Время обновления
 
@@ -33,7 +42,25 @@ async def init_db():
     async with engine.begin() as conn:
         # Создаем таблицы через асинхронный коннектор
         await conn.run_sync(Base.metadata.create_all)
+        # create_all не добавляет колонки в существующую таблицу
+        await conn.execute(text(
+            "ALTER TABLE similar_recommendation ADD COLUMN IF NOT EXISTS recommendation_score REAL[];"
+        ))
 
 class RecommendationResponse(BaseModel):
     id: int
     recommendation_id: List[int]  # Массив рекомендаций (ID)
+    scores: List[float] | None = None  # Сходство с рекомендациями (если сохранено)
+
+class VideoMetadata(BaseModel):
+    id: int = Field(..., ge=0)
+    title: str = ""
+    description: str = ""
+    categories: str = ""
+    tags: str = ""
+
+class RecommendationBatchRequest(BaseModel):
+    video_ids: List[NonNegativeInt] = Field(..., min_length=1, max_length=settings.recommendation_batch_max_size)
+
+class RecommendationBatchResponse(BaseModel):
+    recommendations: Dict[int, List[int]]  # Рекомендации по ID видео (только найденные)
@@ -0,0 +1,188 @@
+from typing import NamedTuple
+
+import numpy as np
+import orjson
+
+# Префиксы версий бинарного формата; JSON-значения начинаются с "[" и с ними не пересекаются
+FORMAT_INT32_V1 = b"\x01"
+FORMAT_SCORED_V2 = b"\x02"
+
+_INT32 = np.dtype("<i4")
+_INT32_INFO = np.iinfo(_INT32)
+# Пара (идентификатор, сходство): значение — массив записей фиксированного размера,
+# который декодируется одним вызовом np.frombuffer
+_SCORED = np.dtype([("id", "<i4"), ("score", "<f4")])
+
+
+class ScoredRecommendations(NamedTuple):
+    """
+    Рекомендации видео по убыванию сходства.
+
+    Attributes:
+        ids (list[int]): Идентификаторы рекомендованных видео.
+        scores (list[float] | None): Сходство с рекомендованными видео
+            (None для значений, записанных без сходства).
+    """
+    ids: list[int]
+    scores: list[float] | None = None
+
+    def slice(
+            self, limit: int | None = None, offset: int = 0, min_score: float | None = None
+    ) -> "ScoredRecommendations":
+        """
+        Возвращает часть рекомендаций.
+
+        Args:
+            limit (int | None): Максимальное количество рекомендаций (None — все).
+            offset (int): Сколько первых рекомендаций пропустить.
+            min_score (float | None): Минимальное сходство. Не применяется,
+                если сходство не сохранено.
+
+        Returns:
+            ScoredRecommendations: Выбранные рекомендации.
+        """
+        end = None if limit is None else offset + limit
+        ids = self.ids[offset:end]
+        scores = None if self.scores is None else self.scores[offset:end]
+        if min_score is not None and scores is not None:
+            # Сходство отсортировано по убыванию, поэтому отсекается хвост; сравнение в float32,
+            # как хранится сходство, чтобы порог 0.9 не отсекал сохранённое 0.9
+            keep = int(np.searchsorted(-np.asarray(scores, dtype=np.float32), -np.float32(min_score), side="right"))
+            ids, scores = ids[:keep], scores[:keep]
+        return ScoredRecommendations(ids, scores)
+
+
+def encode_recommendations(recommended_ids, scores=None) -> bytes:
+    """
+    Кодирует список рекомендаций в компактный бинарный формат для Redis.
+
+    Без сходства: байт версии `FORMAT_INT32_V1`, затем идентификаторы как little-endian int32
+    (4 байта на идентификатор против 3–8 байт в JSON).
+    Со сходством: байт версии `FORMAT_SCORED_V2`, затем пары (int32 идентификатор, float32 сходство).
+
+    Args:
+        recommended_ids: Идентификаторы рекомендованных видео (список или массив numpy).
+        scores: Сходство с рекомендованными видео той же длины или None.
+
+    Returns:
+        bytes: Закодированное значение.
+
+    Raises:
+        ValueError: Если идентификатор не помещается в int32 или длины не совпадают.
+    """
+    ids = np.asarray(recommended_ids, dtype=np.int64)
+    if ids.size and (ids.min() < _INT32_INFO.min or ids.max() > _INT32_INFO.max):
+        raise ValueError("Идентификаторы рекомендаций должны помещаться в int32")
+    if scores is None:
+        return FORMAT_INT32_V1 + ids.astype(_INT32).tobytes()
+
+    if len(scores) != len(ids):
+        raise ValueError("Количество значений сходства не совпадает с количеством рекомендаций")
+    pairs = np.empty(len(ids), dtype=_SCORED)
+    pairs["id"] = ids
+    pairs["score"] = scores
+    return FORMAT_SCORED_V2 + pairs.tobytes()
+
+
+def encode_recommendations_batch(offsets, recommended_ids, scores=None) -> list[bytes]:
+    """
+    Кодирует рекомендации нескольких видео, заданные плоскими массивами, в формат `encode_recommendations`.
+
+    Проверка диапазона, приведение типов и сериализация выполняются один раз для всего пакета,
+    после чего значение каждого видео — срез общего буфера.
+
+    Args:
+        offsets: Смещения рекомендаций видео в плоских массивах (N + 1,).
+        recommended_ids: Идентификаторы рекомендованных видео подряд для всех видео.
+        scores: Сходство в том же порядке или None.
+
+    Returns:
+        list[bytes]: Закодированные значения в порядке видео.
+
+    Raises:
+        ValueError: Если идентификатор не помещается в int32 или длины не совпадают.
+    """
+    ids = np.asarray(recommended_ids, dtype=np.int64)
+    if ids.size and (ids.min() < _INT32_INFO.min or ids.max() > _INT32_INFO.max):
+        raise ValueError("Идентификаторы рекомендаций должны помещаться в int32")
+    if scores is None:
+        prefix, payload = FORMAT_INT32_V1, ids.astype(_INT32)
+    else:
+        if len(scores) != len(ids):
+            raise ValueError("Количество значений сходства не совпадает с количеством рекомендаций")
+        prefix, payload = FORMAT_SCORED_V2, np.empty(len(ids), dtype=_SCORED)
+        payload["id"] = ids
+        payload["score"] = scores
+
+    buffer = payload.tobytes()
+    bounds = (np.asarray(offsets, dtype=np.int64) * payload.dtype.itemsize).tolist()
+    return [prefix + buffer[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+def encode_recommendation_response(video_id: int, recommended_ids, scores=None) -> bytes:
+    """
+    Сериализует готовое тело ответа `get_recommendation` для выдачи без повторной обработки.
+
+    Тело совпадает с ответом, собранным через `RecommendationResponse`:
+    `{"data_recommendations": {"id": ..., "recommendation_id": [...], "scores": [...] | null}}`.
+    Сходство сериализуется как float32 с кратчайшим представлением.
+
+    Args:
+        video_id (int): ID видео.
+        recommended_ids: Идентификаторы рекомендованных видео.
+        scores: Сходство с рекомендованными видео или None.
+
+    Returns:
+        bytes: Тело ответа в JSON.
+    """
+    return orjson.dumps(
+        {
+            "data_recommendations": {
+                "id": int(video_id),
+                "recommendation_id": np.asarray(recommended_ids, dtype=np.int64),
+                "scores": None if scores is None else np.asarray(scores, dtype=np.float32),
+            }
+        },
+        option=orjson.OPT_SERIALIZE_NUMPY,
+    )
+
+
+def decode_scored_recommendations(value: bytes | str) -> ScoredRecommendations:
+    """
+    Декодирует рекомендации и их сходство из Redis.
+
+    Поддерживает бинарные форматы `FORMAT_SCORED_V2` и `FORMAT_INT32_V1` и JSON-значения,
+    записанные до перехода на бинарный формат (для двух последних сходство равно None).
+
+    Args:
+        value (bytes | str): Значение из Redis.
+
+    Returns:
+        ScoredRecommendations: Рекомендации со сходством.
+
+    Raises:
+        ValueError: Если формат значения неизвестен.
+    """
+    if isinstance(value, str):
+        value = value.encode()
+    if value.startswith(FORMAT_SCORED_V2):
+        pairs = np.frombuffer(value, dtype=_SCORED, offset=len(FORMAT_SCORED_V2))
+        return ScoredRecommendations(pairs["id"].tolist(), pairs["score"].tolist())
+    if value.startswith(FORMAT_INT32_V1):
+        return ScoredRecommendations(np.frombuffer(value, dtype=_INT32, offset=len(FORMAT_INT32_V1)).tolist())
+    if value.startswith(b"["):
+        return ScoredRecommendations(orjson.loads(value))
+    raise ValueError(f"Неизвестный формат значения рекомендаций: {value[:1]!r}")
+
+
+def decode_recommendations(value: bytes | str) -> list[int]:
+    """
+    Декодирует список рекомендаций из Redis без сходства.
+
+    Args:
+        value (bytes | str): Значение из Redis в любом поддерживаемом формате.
+
+    Returns:
+        list[int]: Идентификаторы рекомендованных видео.
+    """
+    return decode_scored_recommendations(value).ids
@@ -0,0 +1,217 @@
+import mmap
+import os
+import struct
+from typing import NamedTuple
+
+import numpy as np
+
+from recommendation.api.v1.utils.similarity_recommendation.recommendation_result import RecommendationResult
+
+# Заголовок: сигнатура, версия формата, зарезервированные флаги и количество видео
+FINGERPRINTS_MAGIC = b"RECFPRT\x00"
+FINGERPRINTS_VERSION = 1
+_HEADER = struct.Struct("<8sIIQ")
+
+_IDS = np.dtype("<i8")
+_FINGERPRINTS = np.dtype("<u8")
+
+# Константы финализатора splitmix64 и «соли», различающие позицию, сходство и длину списка
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+_SCORE_SALT = np.uint64(0xD6E8FEB86659FD93)
+_LENGTH_SALT = np.uint64(0xA0761D6478BD642F)
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    """Перемешивает биты 64-битных значений финализатором splitmix64 (умножения по модулю 2^64)."""
+    values = values ^ (values >> np.uint64(30))
+    values = values * _MIX_1
+    values = values ^ (values >> np.uint64(27))
+    values = values * _MIX_2
+    return values ^ (values >> np.uint64(31))
+
+
+def fingerprint_rows(offsets: np.ndarray, neighbour_ids: np.ndarray, scores: np.ndarray | None = None) -> np.ndarray:
+    """
+    Вычисляет 64-битный отпечаток списка рекомендаций каждого элемента.
+
+    Каждый сосед хешируется вместе со своей позицией в списке (и сходством, если оно передано),
+    после чего хеши элемента объединяются XOR и смешиваются с длиной списка. Вычисление
+    векторное, без Python-циклов по элементам; отпечаток детерминирован между процессами.
+
+    Args:
+        offsets (np.ndarray): Смещения рекомендаций элементов в плоских массивах (N + 1,).
+        neighbour_ids (np.ndarray): Идентификаторы рекомендованных элементов подряд для всех элементов.
+        scores (np.ndarray | None): Сходство в том же порядке или None.
+
+    Returns:
+        np.ndarray: Отпечатки элементов (uint64, N).
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    lengths = np.diff(offsets)
+    total = int(offsets[-1])
+    positions = (np.arange(total, dtype=np.int64) - np.repeat(offsets[:-1], lengths)).astype(np.uint64)
+
+    values = _mix(np.asarray(neighbour_ids, dtype=np.int64).view(np.uint64) ^ (positions * _GOLDEN))
+    if scores is not None:
+        score_bits = np.asarray(scores, dtype=np.float32).view(np.uint32).astype(np.uint64)
+        values ^= _mix(score_bits ^ ((positions + np.uint64(1)) * _SCORE_SALT))
+
+    rows = np.zeros(len(lengths), dtype=np.uint64)
+    if total:
+        # У пустых списков начало совпадает с концом массива, поэтому индекс ограничивается, а результат обнуляется
+        reduced = np.bitwise_xor.reduceat(values, np.minimum(offsets[:-1], total - 1))
+        rows = np.where(lengths > 0, reduced, rows)
+    return _mix(rows ^ _mix(lengths.astype(np.uint64) ^ _LENGTH_SALT))
+
+
+class FingerprintDiff(NamedTuple):
+    """
+    Сравнение построения с последней опубликованной версией.
+
+    Attributes:
+        previous (bool): Были ли опубликованы отпечатки раньше (иначе публикуются все строки).
+        positions (np.ndarray): Позиции изменённых и новых элементов в результате построения.
+        changed (int): Количество элементов, список которых изменился.
+        added (int): Количество новых элементов.
+        unchanged (int): Количество пропускаемых элементов с прежним списком.
+        deleted_ids (np.ndarray): Идентификаторы удалённых элементов.
+        ids (np.ndarray): Отсортированные идентификаторы после публикации.
+        fingerprints (np.ndarray): Отпечатки в порядке `ids`.
+    """
+    previous: bool
+    positions: np.ndarray
+    changed: int
+    added: int
+    unchanged: int
+    deleted_ids: np.ndarray
+    ids: np.ndarray
+    fingerprints: np.ndarray
+
+    @property
+    def deleted(self) -> int:
+        """Количество удалённых элементов."""
+        return len(self.deleted_ids)
+
+    @property
+    def empty(self) -> bool:
+        """Построение совпадает с опубликованным: публиковать нечего."""
+        return self.previous and not len(self.positions) and not self.deleted
+
+
+class RecommendationFingerprints:
+    """
+    Отпечатки последних опубликованных списков рекомендаций (16 байт на видео).
+
+    Файл содержит отсортированные идентификаторы видео (int64) и их отпечатки (uint64)
+    и читается через отображение в память. Построение сравнивается с ним, и в базу данных
+    и Redis публикуются только изменённые, новые и удалённые строки. Файл заменяется
+    (`save`) только после успешной публикации, поэтому откат не теряет изменений.
+
+    Attributes:
+        path (str): Путь к файлу отпечатков.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): Путь к файлу отпечатков.
+        """
+        self.path = path
+
+    def load(self) -> tuple[np.ndarray, np.ndarray] | None:
+        """
+        Отображает файл отпечатков в память.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray] | None: Идентификаторы и отпечатки или None,
+                если отпечатки ещё не сохранялись.
+
+        Raises:
+            ValueError: Если файл не является файлом отпечатков поддерживаемой версии.
+        """
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return None
+        with f:
+            if os.fstat(f.fileno()).st_size < _HEADER.size:
+                raise ValueError(f"Файл отпечатков рекомендаций повреждён: {self.path}")
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, count = _HEADER.unpack_from(buffer)
+        if magic != FINGERPRINTS_MAGIC or version != FINGERPRINTS_VERSION:
+            raise ValueError(f"Неподдерживаемый формат отпечатков рекомендаций: {self.path}")
+        ids = np.frombuffer(buffer, dtype=_IDS, count=count, offset=_HEADER.size)
+        fingerprints = np.frombuffer(buffer, dtype=_FINGERPRINTS, count=count, offset=_HEADER.size + ids.nbytes)
+        return ids, fingerprints
+
+    def diff(self, result: RecommendationResult, deleted_ids=None) -> FingerprintDiff:
+        """
+        Сравнивает результат построения с последними опубликованными отпечатками.
+
+        Args:
+            result (RecommendationResult): Результат построения.
+            deleted_ids: Идентификаторы удалённых элементов для инкрементального построения
+                или None для полного построения (удалены все элементы, которых нет в результате).
+
+        Returns:
+            FingerprintDiff: Строки для публикации, счётчики и отпечатки после публикации.
+        """
+        ids = np.asarray(result.ids, dtype=np.int64)
+        fingerprints = fingerprint_rows(result.offsets, result.neighbour_ids, result.scores)
+        previous = self.load()
+
+        if previous is None:
+            deleted = np.asarray([] if deleted_ids is None else deleted_ids, dtype=np.int64)
+            order = np.argsort(ids, kind="stable")
+            return FingerprintDiff(
+                False, np.arange(len(ids)), 0, len(ids), 0, deleted, ids[order], fingerprints[order]
+            )
+
+        previous_ids, previous_fingerprints = previous
+        if len(previous_ids):
+            positions = np.minimum(np.searchsorted(previous_ids, ids), len(previous_ids) - 1)
+            found = previous_ids[positions] == ids
+            same = found & (previous_fingerprints[positions] == fingerprints)
+        else:
+            found = same = np.zeros(len(ids), dtype=bool)
+
+        if deleted_ids is None:
+            deleted = previous_ids[~np.isin(previous_ids, ids)]
+            next_ids, next_fingerprints = ids, fingerprints
+        else:
+            deleted = np.asarray(deleted_ids, dtype=np.int64)
+            kept = ~np.isin(previous_ids, np.concatenate([deleted, ids]))
+            next_ids = np.concatenate([previous_ids[kept], ids])
+            next_fingerprints = np.concatenate([previous_fingerprints[kept], fingerprints])
+
+        order = np.argsort(next_ids, kind="stable")
+        return FingerprintDiff(
+            True,
+            np.flatnonzero(~same),
+            int(np.count_nonzero(found & ~same)),
+            int(np.count_nonzero(~found)),
+            int(np.count_nonzero(same)),
+            deleted,
+            next_ids[order],
+            next_fingerprints[order],
+        )
+
+    def save(self, diff: FingerprintDiff) -> None:
+        """
+        Атомарно заменяет файл отпечатков отпечатками опубликованного построения.
+
+        Args:
+            diff (FingerprintDiff): Результат `diff` успешно опубликованного построения.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(FINGERPRINTS_MAGIC, FINGERPRINTS_VERSION, 0, len(diff.ids)))
+            f.write(np.ascontiguousarray(diff.ids, dtype=_IDS).data)
+            f.write(np.ascontiguousarray(diff.fingerprints, dtype=_FINGERPRINTS).data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,210 @@
+import logging
+import mmap
+import os
+import struct
+from typing import NamedTuple
+
+import numpy as np
+
+from recommendation.api.v1.adapters.recommendation_codec import ScoredRecommendations
+
+logger = logging.getLogger(__name__)
+
+# Заголовок: сигнатура, версия формата, флаги, количество видео, общее количество рекомендаций
+# и номер публикации в Redis, вместе с которой записан снимок
+SNAPSHOT_MAGIC = b"RECSNAP\x00"
+SNAPSHOT_VERSION = 2
+SNAPSHOT_HAS_SCORES = 1
+_HEADER = struct.Struct("<8sIIQQQ")
+
+_IDS = np.dtype("<i8")
+_OFFSETS = np.dtype("<i8")
+_NEIGHBOURS = np.dtype("<i4")
+_SCORES = np.dtype("<f4")
+_NEIGHBOURS_INFO = np.iinfo(_NEIGHBOURS)
+
+
+def write_snapshot(
+        path: str,
+        ids: np.ndarray,
+        neighbour_ids: np.ndarray,
+        scores: np.ndarray | None = None,
+        revision: int = 0
+) -> None:
+    """
+    Записывает неизменяемый снимок рекомендаций для чтения через отображение в память.
+
+    Формат файла: заголовок `_HEADER`, затем отсортированные идентификаторы видео (int64),
+    смещения их списков (int64, на одно больше, чем видео), плоский массив рекомендаций (int32)
+    и, если передано, сходство в том же порядке (float32). Все массивы выровнены по своему типу.
+
+    Файл сначала записывается рядом с целевым и затем атомарно заменяет его (`os.replace`),
+    поэтому читатели видят либо старый, либо новый снимок целиком. Процессы, уже отобразившие
+    старый файл, продолжают читать его до переключения.
+
+    Args:
+        path (str): Путь к файлу снимка.
+        ids (np.ndarray): Идентификаторы видео (N,).
+        neighbour_ids (np.ndarray): Идентификаторы рекомендованных видео (N x top_n).
+        scores (np.ndarray | None): Сходство с рекомендованными видео (N x top_n).
+        revision (int): Номер публикации в Redis, которой соответствует снимок.
+
+    Raises:
+        ValueError: Если рекомендации не помещаются в int32 или размеры массивов не совпадают.
+    """
+    ids = np.asarray(ids, dtype=_IDS)
+    neighbour_ids = np.asarray(neighbour_ids).reshape(len(ids), -1)
+    if neighbour_ids.size and (neighbour_ids.min() < _NEIGHBOURS_INFO.min or neighbour_ids.max() > _NEIGHBOURS_INFO.max):
+        raise ValueError("Идентификаторы рекомендаций должны помещаться в int32")
+    if scores is not None and np.shape(scores) != neighbour_ids.shape:
+        raise ValueError("Размер матрицы сходства не совпадает с размером матрицы рекомендаций")
+
+    order = np.argsort(ids, kind="stable")
+    width = neighbour_ids.shape[1]
+    offsets = np.arange(len(ids) + 1, dtype=_OFFSETS) * width
+    flags = SNAPSHOT_HAS_SCORES if scores is not None else 0
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, flags, len(ids), len(ids) * width, revision))
+        f.write(ids[order].data)
+        f.write(offsets.data)
+        f.write(np.ascontiguousarray(neighbour_ids[order], dtype=_NEIGHBOURS).data)
+        if scores is not None:
+            f.write(np.ascontiguousarray(np.asarray(scores)[order], dtype=_SCORES).data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class _SnapshotArrays(NamedTuple):
+    """Массивы одного отображённого файла снимка."""
+    identity: tuple
+    revision: int
+    ids: np.ndarray
+    offsets: np.ndarray
+    neighbours: np.ndarray
+    scores: np.ndarray | None
+
+
+class RecommendationSnapshot:
+    """
+    Снимок рекомендаций последнего построения, отображённый в память процесса.
+
+    Поиск — бинарный поиск по отсортированному массиву идентификаторов без сетевых запросов.
+    Файл открывается только на чтение, поэтому все процессы API на одной машине разделяют
+    одни и те же страницы page cache. Снимок не зависит от Redis и Postgres и продолжает
+    обслуживать запросы при их недоступности.
+
+    Снимок хранит номер публикации в Redis, с которой он записан: пока процесс учёл
+    другую публикацию, снимок не используется, чтобы не отдавать изменённые ею видео из старого снимка.
+
+    При появлении нового файла `reload` отображает его и одним присваиванием переключает
+    чтение на новые массивы; старое отображение освобождается, когда на него не останется ссылок.
+
+    Attributes:
+        path (str): Путь к файлу снимка.
+    """
+
+    def __init__(self, path: str):
+        """
+        Инициализирует пустой снимок; файл отображается при первом вызове `reload`.
+
+        Args:
+            path (str): Путь к файлу снимка.
+        """
+        self.path = path
+        self._arrays: _SnapshotArrays | None = None
+
+    def __len__(self) -> int:
+        arrays = self._arrays
+        return 0 if arrays is None else len(arrays.ids)
+
+    @property
+    def revision(self) -> int | None:
+        """Номер публикации, которой соответствует загруженный снимок, или None, если снимок не загружен."""
+        arrays = self._arrays
+        return None if arrays is None else arrays.revision
+
+    def reload(self) -> bool:
+        """
+        Переключается на новый файл снимка, если он изменился с прошлой загрузки.
+
+        Файл считается изменённым, если у пути другой inode или время изменения
+        (`write_snapshot` всегда создаёт новый файл). Если файл удалён, текущий снимок сохраняется.
+
+        Returns:
+            bool: True, если загружен новый снимок.
+
+        Raises:
+            ValueError: Если файл не является снимком поддерживаемой версии.
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        identity = (stat.st_dev, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if self._arrays is not None and self._arrays.identity == identity:
+            return False
+
+        self._arrays = self._map(identity)
+        logger.info(f"Загружен снимок рекомендаций {self.path}: {len(self._arrays.ids)} видео")
+        return True
+
+    def _map(self, identity: tuple) -> _SnapshotArrays:
+        """
+        Отображает файл снимка в память и создаёт представления его массивов без копирования.
+
+        Args:
+            identity (tuple): Идентичность файла (устройство, inode, время изменения, размер).
+
+        Returns:
+            _SnapshotArrays: Массивы снимка.
+        """
+        with open(self.path, "rb") as f:
+            if identity[3] < _HEADER.size:
+                raise ValueError(f"Файл снимка рекомендаций повреждён: {self.path}")
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, flags, count, total, revision = _HEADER.unpack_from(buffer)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError(f"Неподдерживаемый формат снимка рекомендаций: {self.path}")
+
+        position = _HEADER.size
+
+        def take(dtype: np.dtype, length: int) -> np.ndarray:
+            nonlocal position
+            array = np.frombuffer(buffer, dtype=dtype, count=length, offset=position)
+            position += array.nbytes
+            return array
+
+        ids = take(_IDS, count)
+        offsets = take(_OFFSETS, count + 1)
+        neighbours = take(_NEIGHBOURS, total)
+        scores = take(_SCORES, total) if flags & SNAPSHOT_HAS_SCORES else None
+        return _SnapshotArrays(identity, revision, ids, offsets, neighbours, scores)
+
+    def get(self, video_id: int) -> ScoredRecommendations | None:
+        """
+        Возвращает рекомендации видео.
+
+        Args:
+            video_id (int): ID видео.
+
+        Returns:
+            ScoredRecommendations | None: Рекомендации со сходством или None, если видео нет в снимке
+                или снимок ещё не загружен.
+        """
+        arrays = self._arrays
+        if arrays is None:
+            return None
+        position = int(np.searchsorted(arrays.ids, video_id))
+        if position == len(arrays.ids) or arrays.ids[position] != video_id:
+            return None
+        start, end = int(arrays.offsets[position]), int(arrays.offsets[position + 1])
+        return ScoredRecommendations(
+            arrays.neighbours[start:end].tolist(),
+            None if arrays.scores is None else arrays.scores[start:end].tolist(),
+        )
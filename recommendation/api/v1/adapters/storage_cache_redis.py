@@ -1,102 +1,376 @@
-import json
 from typing import Any, List, Dict
 
 import numpy as np
 import redis.asyncio as redis
+from redis.exceptions import WatchError
 
+from recommendation.api.v1.adapters.recommendation_codec import (
+    encode_recommendation_response,
+    encode_recommendations_batch,
+)
 from recommendation.api.v1.domain.cashe_repository import StorageRepository
+from recommendation.api.v1.utils.similarity_recommendation.recommendation_result import RecommendationResult
 
 
 class AsyncRedisStorage(StorageRepository):
-    """Асинхронное кеш-хранилище Redis, использующее базу 1 только при обновлении данных."""
+    """
+    Асинхронное кеш-хранилище Redis с переключением поколений построения (blue/green).
+
+    Каждое построение записывает ключи в собственное пространство с префиксом поколения
+    (`g{generation}:videos_id:{id}`), не трогая ключи, которые читают процессы API.
+    Публикация — атомарная запись номера поколения в ключ-указатель `active_generation_key`,
+    откат — возврат указателя на предыдущее поколение. Пространства старых поколений удаляются
+    при фиксации через `UNLINK`, освобождающий память в фоновом потоке Redis.
+
+    Поколение 0 — ключи без префикса, записанные до перехода на поколения; они читаются,
+    пока указатель не установлен, и удаляются вместе с остальными старыми поколениями.
+
+    Частичное построение (инкрементальное или публикующее только изменения) не создаёт
+    поколения (`begin_update`): изменённые ключи перезаписываются в активном поколении,
+    а ключи удалённых видео удаляются при фиксации. При откате записанные ключи удаляются,
+    и видео заново читаются из базы данных.
+
+    Каждая фиксация получает номер публикации и добавляет в журнал `changes_key` (Redis Stream)
+    запись с идентификаторами изменённых видео: процессы API сбрасывают в локальных кешах
+    только эти видео (`get_changes`), а не весь кеш.
+    """
+
+    # Счётчик номеров поколений: номера только растут, в том числе после отката
+    generation_key = "recommendations:generation"
+    # Указатель на поколение, из которого читают процессы API
+    active_generation_key = "recommendations:active_generation"
+    # Номера поколений, для которых в Redis могут остаться ключи
+    generations_key = "recommendations:generations"
+    # Ключи поколения 0, записанные без префикса
+    legacy_patterns = ("videos_id:*", "videos_response:*")
+    # Счётчик номеров публикаций и журнал видео, изменённых каждой публикацией
+    revision_key = "recommendations:revision"
+    changes_key = "recommendations:changes"
 
     def __init__(
             self,
             host: str = "172.17.0.1",
             port: int = 6379,
-            new_db: int = 0,
-            old_db: int = 1,
-            max_connections: int = 100
+            db: int = 0,
+            max_connections: int = 100,
+            generations_kept: int = 2,
+            changes_kept: int = 1000
     ):
         """
         :param host: Хост Redis
         :param port: Порт Redis
-        :param new_db: База данных для работы (основная)
-        :param old_db: Временная база данных (используется только при обновлении)
+        :param db: База данных Redis
         :param max_connections: Максимальное количество соединений
+        :param generations_kept: Сколько последних поколений, включая активное, хранить для отката
+        :param changes_kept: Сколько последних публикаций хранить в журнале изменённых видео
         """
         self.host = host
         self.port = port
-        self.new_db = new_db
-        self.old_db = old_db
+        self.db = db
+        self.generations_kept = generations_kept
+        self.changes_kept = changes_kept
 
-        # Пул соединений только для базы 0 (основной)
-        self.new_pool = redis.ConnectionPool(
-            host=host, port=port, db=new_db, max_connections=max_connections, encoding="utf-8", decode_responses=True
-        )
-        self.new_client = redis.Redis(connection_pool=self.new_pool)
-
-        # Старый клиент создаем как None, чтобы открывать только при необходимости
-        self.old_client = None
-
-    async def _get_old_client(self):
-        """Создает клиент Redis для базы 1 (если еще не создан)."""
-        if self.old_client is None:
-            self.old_client = redis.Redis(
-                host=self.host, port=self.port, db=self.old_db, encoding="utf-8", decode_responses=True
-            )
-        return self.old_client
-
-    async def bulk_set(self, data: List[Dict[str, Any]]):
-        """Обновляет данные в Redis, сохраняя предыдущие значения в базе 1."""
-        old_client = await self._get_old_client()
-
-        async with self.new_client.pipeline() as pipe_new, old_client.pipeline() as pipe_old:
-            for item in data:
-                key = f'videos_id:{item["id"]}'
-                recommended_ids = [
-                    int(i) if isinstance(i, (np.int64, np.int32)) else i
-                    for i in item["recommended_ids"]
-                ]
-                value = json.dumps(recommended_ids)
-
-                # Копируем старое значение в old_db перед обновлением
-                old_value = await self.new_client.get(key)
-                if old_value:
-                    await pipe_old.set(key, old_value)
-
-                # Записываем новое значение в new_db
-                await pipe_new.set(key, value)
-
-            await pipe_new.execute()
-            await pipe_old.execute()
+        # Значения бинарные, поэтому ответы не декодируются
+        self.pool = redis.ConnectionPool(host=host, port=port, db=db, max_connections=max_connections)
+        self.client = redis.Redis(connection_pool=self.pool)
+
+        # Поколение, из которого читает процесс (обновляется в `get_generation`)
+        self.generation = None
+        # Поколение, в которое пишет текущее построение, и поколение, активное до его публикации
+        self.staging_generation = None
+        self.previous_generation = None
+        # Активное поколение, которое обновляет частичное построение, и затронутые им видео
+        self.update_generation = None
+        self._updated_ids = []
+        self._deleted_ids = []
+        # Номер последней публикации, зафиксированной этим хранилищем
+        self.revision = None
+
+    @staticmethod
+    def _key(generation: int, key: str) -> str:
+        """Возвращает ключ в пространстве поколения."""
+        return key if generation == 0 else f"g{generation}:{key}"
+
+    async def _read_generation(self) -> int:
+        """Возвращает поколение для чтения, запрашивая указатель, если он ещё не известен."""
+        if self.generation is None:
+            await self.get_generation()
+        return self.generation
+
+    async def _get_staging_generation(self) -> int:
+        """Выделяет новое поколение для записи построения (если ещё не выделено)."""
+        if self.staging_generation is None:
+            self.staging_generation = await self.client.incr(self.generation_key)
+            await self.client.zadd(self.generations_key, {str(self.staging_generation): self.staging_generation})
+        return self.staging_generation
+
+    async def stage_generation(self) -> int:
+        """
+        Выделяет поколение для записи полного построения.
+
+        :return: Номер поколения построения.
+        """
+        return await self._get_staging_generation()
+
+    async def begin_update(self) -> int:
+        """
+        Начинает частичную публикацию в активное поколение без создания нового.
+
+        `bulk_set` перезаписывает ключи изменённых видео на месте, а `bulk_delete` откладывает
+        удаление ключей до фиксации, чтобы процессы API не заполнили их из базы данных
+        до фиксации её транзакции.
+
+        :return: Номер активного поколения.
+        """
+        self.update_generation = await self.get_generation()
+        self._updated_ids, self._deleted_ids = [], []
+        return self.update_generation
+
+    @staticmethod
+    def _video_keys(generation: int, ids) -> list[str]:
+        """Возвращает ключи рекомендаций и готовых тел ответа видео в пространстве поколения."""
+        return [
+            AsyncRedisStorage._key(generation, key)
+            for video_id in ids for key in (f'videos_id:{video_id}', f'videos_response:{video_id}')
+        ]
+
+    async def bulk_set(self, data: RecommendationResult):
+        """
+        Записывает рекомендации одним конвейером без чтений: в пространство нового поколения
+        или, после `begin_update`, на место ключей активного поколения.
+
+        Для каждого видео записываются два ключа: рекомендации в бинарном формате
+        (`videos_id:{id}`) и готовое тело ответа API (`videos_response:{id}`).
+        Значения строятся из срезов плоских массивов пакета.
+        """
+        if not len(data):
+            return
+        if self.update_generation is not None:
+            generation = self.update_generation
+            self._updated_ids.append(np.asarray(data.ids, dtype=np.int64))
+        else:
+            generation = await self._get_staging_generation()
+        values = encode_recommendations_batch(data.offsets, data.neighbour_ids, data.scores)
+        async with self.client.pipeline(transaction=False) as pipe:
+            for (video_id, neighbour_ids, scores), value in zip(data.rows(), values):
+                pipe.set(self._key(generation, f'videos_id:{video_id}'), value)
+                pipe.set(
+                    self._key(generation, f'videos_response:{video_id}'),
+                    encode_recommendation_response(video_id, neighbour_ids, scores)
+                )
+            await pipe.execute()
+
+    async def bulk_delete(self, ids: List[int]):
+        """
+        Удаляет записи из пространства нового поколения.
+
+        В активном поколении ключи остаются до публикации, а после неё не читаются.
+        При частичной публикации ключи активного поколения удаляются при фиксации.
+        """
+        if not ids:
+            return
+        if self.update_generation is not None:
+            self._deleted_ids.append(np.asarray(ids, dtype=np.int64))
+            return
+        generation = await self._get_staging_generation()
+        await self.client.unlink(*self._video_keys(generation, ids))
+
+    async def set(self, key: str, value: Any):
+        """Записывает одно значение в активное поколение без участия в построении."""
+        await self.client.set(self._key(await self._read_generation(), key), value)
+
+    async def fill(self, items: Dict[str, Any], ttl: int):
+        """
+        Заполняет активное поколение значениями, прочитанными из базы, одним конвейером команд.
+
+        Используется `SET NX EX`: значения, уже записанные построением, не перезаписываются,
+        а заполненные записи живут не дольше `ttl` секунд.
+        """
+        if not items:
+            return
+        generation = await self._read_generation()
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.set(self._key(generation, key), value, ex=ttl, nx=True)
+            await pipe.execute()
 
     async def get(self, key: str) -> Any:
-        return await self.new_client.get(key)
+        return await self.client.get(self._key(await self._read_generation(), key))
+
+    async def mget(self, keys: List[str]) -> List[Any]:
+        """Получает значения нескольких ключей одной командой MGET (None для отсутствующих)."""
+        if not keys:
+            return []
+        generation = await self._read_generation()
+        return await self.client.mget([self._key(generation, key) for key in keys])
+
+    async def publish_generation(self) -> int:
+        """
+        Публикует построение, переключая указатель на его поколение.
+
+        Если построение ничего не записало, выделяется пустое поколение: все ключи
+        заполнятся из базы данных при чтении.
+
+        :return: Номер опубликованного поколения.
+        """
+        generation = await self._get_staging_generation()
+        previous = await self.client.set(self.active_generation_key, generation, get=True)
+        self.previous_generation = int(previous or 0)
+        await self.client.zadd(self.generations_key, {str(self.previous_generation): self.previous_generation})
+        self.generation = generation
+        return generation
+
+    async def get_generation(self) -> int:
+        """Возвращает активное поколение (0, если построений ещё не публиковалось) и читает из него."""
+        self.generation = int(await self.client.get(self.active_generation_key) or 0)
+        return self.generation
+
+    async def get_changes(self, revision: int | None) -> tuple[int, int, list[int] | None]:
+        """
+        Возвращает активное поколение, номер последней публикации и видео, изменённые после `revision`.
+
+        Все три значения читаются одной транзакцией. Если журнал уже не содержит всех
+        публикаций после `revision` (он ограничен `changes_kept` записями) или номер не известен,
+        вместо списка видео возвращается None: локальный кеш нужно сбросить целиком.
+
+        :param revision: Номер публикации, изменения до которой уже учтены (None — неизвестен).
+        :return: Поколение, номер последней публикации и ID изменённых видео или None.
+        """
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.get(self.active_generation_key)
+            pipe.xrevrange(self.changes_key, count=1)
+            pipe.xrange(self.changes_key, min=f"{(revision or 0) + 1}-0")
+            generation, latest, entries = await pipe.execute()
+
+        self.generation = int(generation or 0)
+        latest = int(latest[0][0].split(b"-")[0]) if latest else 0
+        if revision is None or latest < revision:
+            # Номер не известен или журнал создан заново: изменённые видео не известны
+            return self.generation, latest, None
+        if latest == revision:
+            return self.generation, latest, []
+        if int(entries[0][0].split(b"-")[0]) != revision + 1:
+            # Часть публикаций уже вытеснена из журнала
+            return self.generation, latest, None
+        ids = np.concatenate([np.frombuffer(fields[b"ids"], dtype="<i8") for _, fields in entries])
+        return self.generation, latest, ids.tolist()
+
+    async def _announce(self, ids: np.ndarray) -> int:
+        """
+        Добавляет публикацию в журнал изменённых видео.
+
+        :param ids: ID видео, ключи которых изменила публикация (пусто для нового поколения).
+        :return: Номер публикации.
+        """
+        self.revision = await self.client.incr(self.revision_key)
+        await self.client.xadd(
+            self.changes_key,
+            {"ids": np.ascontiguousarray(ids, dtype="<i8").tobytes()},
+            id=f"{self.revision}-0",
+            maxlen=self.changes_kept,
+            approximate=True
+        )
+        return self.revision
+
+    def _touched_ids(self) -> np.ndarray:
+        """Возвращает ID видео, записанных и удалённых частичной публикацией."""
+        parts = self._updated_ids + self._deleted_ids
+        return np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+
+    def _finish_update(self):
+        """Завершает частичную публикацию, сбрасывая её состояние."""
+        self.update_generation = None
+        self._updated_ids, self._deleted_ids = [], []
+
+    async def _delete_generation(self, generation: int):
+        """Удаляет все ключи поколения порциями через SCAN и UNLINK."""
+        patterns = self.legacy_patterns if generation == 0 else (f"g{generation}:*",)
+        for pattern in patterns:
+            keys = []
+            async for key in self.client.scan_iter(match=pattern, count=1000):
+                keys.append(key)
+                if len(keys) >= 1000:
+                    await self.client.unlink(*keys)
+                    keys = []
+            if keys:
+                await self.client.unlink(*keys)
+        await self.client.zrem(self.generations_key, str(generation))
 
     async def commit(self):
-        """Удаляет данные из базы 1 (подтверждает изменения в базе 0)."""
-        if self.old_client:
-            await self.old_client.flushdb()
+        """
+        Фиксирует построение: публикует его поколение, если оно ещё не опубликовано,
+        и удаляет поколения старше `generations_kept` последних. Частичная публикация удаляет
+        ключи удалённых видео в активном поколении. Публикация добавляется в журнал изменений.
+
+        Вызывается после фиксации транзакции базы данных, поэтому процессы API переключаются
+        на новое поколение, только когда база уже содержит данные построения.
+        Поколения новее активного не трогаются: их может записывать параллельное построение.
+        """
+        if self.update_generation is not None:
+            if self._deleted_ids:
+                await self.client.unlink(
+                    *self._video_keys(self.update_generation, np.concatenate(self._deleted_ids).tolist())
+                )
+            ids = self._touched_ids()
+            self._finish_update()
+            if len(ids):
+                await self._announce(ids)
+            return
+        if self.staging_generation is None:
+            return
+        if self.previous_generation is None:
+            await self.publish_generation()
+        active = await self.get_generation()
+        older = [
+            int(generation)
+            for generation in await self.client.zrangebyscore(self.generations_key, "-inf", f"({active}")
+        ]
+        for generation in sorted(older, reverse=True)[self.generations_kept - 1:]:
+            await self._delete_generation(generation)
+        self.staging_generation = self.previous_generation = None
+        # Процессы API сбрасывают кеш целиком по смене поколения, поэтому список видео не нужен
+        await self._announce(np.empty(0, dtype=np.int64))
 
     async def rollback(self):
-        """Откатывает обновление, восстанавливая старые данные из базы 1."""
-        if not self.old_client:
-            return  # Если old_client не создавался, откатывать нечего
+        """
+        Откатывает построение: удаляет его поколение, а если оно уже опубликовано,
+        сначала возвращает указатель на предыдущее поколение.
+
+        Частичная публикация удаляет записанные ею ключи активного поколения: видео заново
+        заполняются из базы данных, а процессы API сбрасывают их в локальных кешах по журналу.
+        """
+        if self.update_generation is not None:
+            generation = self.update_generation
+            updated = np.unique(np.concatenate(self._updated_ids)) if self._updated_ids else None
+            self._finish_update()
+            if updated is not None:
+                await self.client.unlink(*self._video_keys(generation, updated.tolist()))
+                await self._announce(updated)
+            return
+        if self.staging_generation is None:
+            return  # Построение ничего не записывало, откатывать нечего
 
-        async with self.new_client.pipeline() as pipe_new, self.old_client.pipeline() as pipe_old:
-            keys = await self.old_client.keys()
-            for key in keys:
-                old_value = await self.old_client.get(key)
-                if old_value:
-                    await pipe_new.set(key, old_value)  # Восстанавливаем старые данные
-                await pipe_old.delete(key)  # Удаляем восстановленные данные
+        if self.previous_generation is not None:
+            # Указатель возвращается, только если его не успело переключить другое построение
+            async with self.client.pipeline(transaction=True) as pipe:
+                try:
+                    await pipe.watch(self.active_generation_key)
+                    if int(await pipe.get(self.active_generation_key) or 0) == self.staging_generation:
+                        pipe.multi()
+                        if self.previous_generation == 0:
+                            pipe.delete(self.active_generation_key)
+                        else:
+                            pipe.set(self.active_generation_key, self.previous_generation)
+                        await pipe.execute()
+                except WatchError:
+                    pass
+            await self.get_generation()
 
-            await pipe_new.execute()
-            await pipe_old.execute()
+        await self._delete_generation(self.staging_generation)
+        self.staging_generation = self.previous_generation = None
 
     async def close(self):
         """Закрывает соединения с Redis."""
-        await self.new_client.aclose()
-        if self.old_client:
-            await self.old_client.aclose()
+        await self.client.aclose()
+        # Клиент не владеет переданным ему пулом, поэтому пул закрывается отдельно
+        await self.pool.disconnect()
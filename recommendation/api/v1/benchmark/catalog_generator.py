@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+
+# Слоги для построения псевдослов; из них собирается словарь каталога
+SYLLABLES = [
+    "ka", "lo", "mi", "ne", "ra", "to", "vi", "za", "po", "de", "su", "ga", "bi", "fe", "ho", "ju",
+    "ly", "mo", "nu", "pe", "qu", "ri", "sa", "te", "un", "ve", "wo", "xi", "yo", "ze", "an", "or",
+]
+
+
+def make_vocabulary(size: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Создаёт словарь уникальных псевдослов.
+
+    Args:
+        size (int): Количество слов.
+        rng (np.random.Generator): Генератор случайных чисел.
+
+    Returns:
+        np.ndarray: Массив слов.
+    """
+    words = set()
+    while len(words) < size:
+        lengths = rng.integers(2, 5, size=size)
+        for length in lengths:
+            words.add("".join(rng.choice(SYLLABLES, size=length)))
+            if len(words) == size:
+                break
+    return np.array(sorted(words))
+
+
+def zipf_weights(size: int, exponent: float = 1.1) -> np.ndarray:
+    """
+    Возвращает нормированные веса закона Ципфа для рангов 1..size.
+
+    Args:
+        size (int): Количество рангов.
+        exponent (float): Показатель степени.
+
+    Returns:
+        np.ndarray: Вероятности рангов.
+    """
+    weights = 1.0 / np.arange(1, size + 1) ** exponent
+    return weights / weights.sum()
+
+
+def generate_catalog(
+        num_rows: int,
+        vocabulary_size: int = 50_000,
+        num_topics: int = 500,
+        num_categories: int = 60,
+        num_tags: int = 5_000,
+        seed: int = 42
+) -> pd.DataFrame:
+    """
+    Генерирует синтетический каталог видео с реалистичными распределениями текста.
+
+    Каждое видео относится к теме; тема задаёт собственный поднабор словаря,
+    из которого берётся большая часть слов заголовка и описания, остальные слова
+    берутся из общего словаря по закону Ципфа. Длины заголовков и описаний
+    распределены логнормально, категории и теги — по закону Ципфа.
+
+    Args:
+        num_rows (int): Количество видео.
+        vocabulary_size (int): Размер общего словаря.
+        num_topics (int): Количество тем.
+        num_categories (int): Количество категорий.
+        num_tags (int): Количество различных тегов.
+        seed (int): Зерно генератора случайных чисел.
+
+    Returns:
+        pd.DataFrame: Каталог с колонками id, title, description, categories, tags.
+    """
+    rng = np.random.default_rng(seed)
+    vocabulary = make_vocabulary(vocabulary_size, rng)
+    # Выборка по весам через searchsorted по функции распределения работает за O(log V) на слово
+    word_cdf = np.cumsum(zipf_weights(vocabulary_size))
+    tag_cdf = np.cumsum(zipf_weights(num_tags))
+    topic_words = np.searchsorted(word_cdf, rng.random((num_topics, 60)))
+    topic_categories = rng.choice(num_categories, size=num_topics, p=zipf_weights(num_categories))
+    categories = np.array([f"category{i}" for i in range(num_categories)])
+    tags = np.array([f"tag{i}" for i in range(num_tags)])
+
+    topics = rng.choice(num_topics, size=num_rows, p=zipf_weights(num_topics, exponent=0.8))
+    title_lengths = np.clip(rng.lognormal(1.8, 0.35, size=num_rows).astype(int), 2, 16)
+    description_lengths = np.clip(rng.lognormal(3.5, 0.5, size=num_rows).astype(int), 5, 200)
+    tag_counts = rng.integers(2, 9, size=num_rows)
+
+    def join_rows(words: np.ndarray, lengths: np.ndarray, separator: str) -> list[str]:
+        return [separator.join(row) for row in np.split(words, np.cumsum(lengths)[:-1])]
+
+    def make_texts(lengths: np.ndarray) -> list[str]:
+        # Около 70% слов из словаря темы, остальные из общего словаря
+        total = int(lengths.sum())
+        row_topics = np.repeat(topics, lengths)
+        word_ids = np.where(
+            rng.random(total) < 0.7,
+            topic_words[row_topics, rng.integers(0, topic_words.shape[1], size=total)],
+            np.searchsorted(word_cdf, rng.random(total)),
+        )
+        return join_rows(vocabulary[np.minimum(word_ids, vocabulary_size - 1)], lengths, " ")
+
+    tag_ids = np.minimum(np.searchsorted(tag_cdf, rng.random(int(tag_counts.sum()))), num_tags - 1)
+    return pd.DataFrame({
+        "id": rng.permutation(num_rows) + 1,
+        "title": make_texts(title_lengths),
+        "description": make_texts(description_lengths),
+        "categories": categories[topic_categories[topics]],
+        "tags": join_rows(tags[tag_ids], tag_counts, ", "),
+    })
@@ -0,0 +1,117 @@
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from typing import Awaitable, Callable
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from recommendation.api.v1.adapters.database_asyncpg import AsyncpgRecommendationRepository
+from recommendation.api.v1.adapters.models import POSTGRES_DSN, SimilarContentRecommendation, engine
+
+
+def latency_summary(latencies: list[float]) -> dict:
+    """
+    Сводит задержки запросов в статистику.
+
+    Args:
+        latencies (list[float]): Задержки запросов в секундах.
+
+    Returns:
+        dict: Количество запросов, среднее, p50, p95 и p99 в миллисекундах.
+    """
+    values = np.asarray(latencies, dtype=np.float64) * 1000
+    return {
+        "requests": len(latencies),
+        "mean_ms": round(float(values.mean()), 4),
+        "p50_ms": round(float(np.percentile(values, 50)), 4),
+        "p95_ms": round(float(np.percentile(values, 95)), 4),
+        "p99_ms": round(float(np.percentile(values, 99)), 4),
+    }
+
+
+async def measure(lookup: Callable[[int], Awaitable], video_ids: list[int]) -> dict:
+    """
+    Последовательно выполняет поиск рекомендаций и измеряет задержку каждого запроса.
+
+    Args:
+        lookup (Callable[[int], Awaitable]): Функция поиска рекомендаций по ID видео.
+        video_ids (list[int]): ID видео для запросов.
+
+    Returns:
+        dict: Статистика задержек.
+    """
+    latencies = []
+    for video_id in video_ids:
+        started = time.perf_counter()
+        await lookup(video_id)
+        latencies.append(time.perf_counter() - started)
+    return latency_summary(latencies)
+
+
+async def run_benchmark(requests: int, warmup: int = 100, seed: int = 42) -> dict:
+    """
+    Сравнивает задержку чтения рекомендаций через ORM (`AsyncSession.get`) и через
+    репозиторий asyncpg с подготовленными запросами на локальном Postgres.
+
+    Args:
+        requests (int): Количество измеряемых запросов для каждого пути.
+        warmup (int): Количество запросов прогрева (подключения и подготовка запросов).
+        seed (int): Зерно выбора ID видео.
+
+    Returns:
+        dict: Параметры запуска (meta) и статистика по путям чтения (results).
+    """
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+    repository = await AsyncpgRecommendationRepository.create(POSTGRES_DSN, min_size=1, max_size=1)
+    try:
+        async with sessionmaker() as session:
+            sample = (await session.execute(select(SimilarContentRecommendation.id).limit(10_000))).scalars().all()
+        if not sample:
+            raise RuntimeError("Таблица similar_recommendation пуста: сначала загрузите каталог")
+        rng = random.Random(seed)
+        video_ids = [rng.choice(sample) for _ in range(requests)]
+        warmup_ids = [rng.choice(sample) for _ in range(warmup)]
+
+        async def orm_lookup(video_id: int):
+            # Новая сессия на запрос, как в зависимости FastAPI
+            async with sessionmaker() as session:
+                return await session.get(SimilarContentRecommendation, video_id)
+
+        results = {}
+        for name, lookup in (("orm", orm_lookup), ("asyncpg", repository.get)):
+            await measure(lookup, warmup_ids)
+            results[name] = await measure(lookup, video_ids)
+    finally:
+        await repository.close()
+        await engine.dispose()
+
+    return {
+        "meta": {"requests": requests, "warmup": warmup, "seed": seed, "sample_size": len(sample)},
+        "results": results,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк задержки чтения рекомендаций из Postgres")
+    parser.add_argument("--requests", type=int, default=10_000, help="Количество запросов для каждого пути")
+    parser.add_argument("--warmup", type=int, default=100, help="Количество запросов прогрева")
+    parser.add_argument("--seed", type=int, default=42, help="Зерно выбора ID видео")
+    parser.add_argument("--output", default=None, help="Файл для JSON-отчёта (по умолчанию stdout)")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run_benchmark(args.requests, args.warmup, args.seed))
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
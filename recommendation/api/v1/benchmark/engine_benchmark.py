@@ -0,0 +1,293 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import scipy
+import sklearn
+
+from recommendation.api.v1.benchmark.catalog_generator import generate_catalog
+from recommendation.api.v1.utils.similarity_recommendation.recommendation_engine import RecommendationEnginePandas
+from recommendation.api.v1.utils.similarity_recommendation.recommendation_engine_ann import RecommendationEngineANN
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+STAGES = ["load", "prepare", "vectorize", "similarity", "top_n"]
+MODES = ["stages", "ann"]
+
+
+def reset_peak_rss() -> bool:
+    """
+    Сбрасывает пиковое потребление памяти процесса (VmHWM) до текущего значения.
+
+    Работает только в Linux; в остальных системах пик считается от старта процесса.
+
+    Returns:
+        bool: True, если пик удалось сбросить.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb() -> float:
+    """
+    Возвращает пиковое потребление памяти процесса в мегабайтах.
+
+    Returns:
+        float: Значение VmHWM из /proc/self/status либо ru_maxrss, если /proc недоступен.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss в Linux измеряется в килобайтах, в macOS — в байтах
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / 1024 ** 2 if sys.platform == "darwin" else max_rss / 1024
+
+
+class StageTimer:
+    """
+    Накопитель времени и пикового потребления памяти по стадиям.
+
+    Стадия может измеряться несколькими интервалами (например, similarity и top_n
+    чередуются по блокам): время суммируется, а для памяти берётся максимум.
+
+    Attributes:
+        stages (dict): Результаты по стадиям: {stage: {"seconds": float, "peak_rss_mb": float}}.
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def measure(self, stage: str):
+        """
+        Измеряет время и пиковое потребление памяти блока кода.
+
+        Args:
+            stage (str): Название стадии.
+        """
+        reset_peak_rss()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            result = self.stages.setdefault(stage, {"seconds": 0.0, "peak_rss_mb": 0.0})
+            result["seconds"] += elapsed
+            result["peak_rss_mb"] = max(result["peak_rss_mb"], peak_rss_mb())
+
+
+def benchmark_engine(
+        path: str,
+        top_n: int,
+        block_size: int,
+        similarity_rows: int | None = None
+) -> dict:
+    """
+    Прогоняет стадии рекомендательного движка на файле данных и измеряет каждую.
+
+    Стадии повторяют `RecommendationEnginePandas.generate_recommendations`:
+    load (чтение файла), prepare (проверка колонок и объединение текста),
+    vectorize (обучение TF-IDF), similarity (поблочное умножение матриц)
+    и top_n (выбор соседей из блоков сходства).
+
+    Args:
+        path (str): Путь к файлу с данными.
+        top_n (int): Количество рекомендаций.
+        block_size (int): Размер блока строк для расчёта сходства.
+        similarity_rows (int | None): Сколько строк прогнать через similarity и top_n.
+            Полный расчёт квадратичен по N, поэтому на больших каталогах удобно
+            измерять выборку строк; None — все строки.
+
+    Returns:
+        dict: Количество строк и результаты по стадиям.
+    """
+    engine = RecommendationEnginePandas(path, top_n, block_size=block_size)
+    timer = StageTimer()
+
+    with timer.measure("load"):
+        df = engine._upload_data()
+    with timer.measure("prepare"):
+        df = engine._prepare_for_cosine_similarity(df)
+    with timer.measure("vectorize"):
+        _, tfidf_matrix = engine._fit_vectorizer(df)
+
+    num_rows = tfidf_matrix.shape[0]
+    scored_rows = num_rows if similarity_rows is None else min(similarity_rows, num_rows)
+    with timer.measure("similarity"):
+        transposed = tfidf_matrix.T.tocsr()
+    for start in range(0, scored_rows, block_size):
+        block_rows = np.arange(start, min(start + block_size, scored_rows))
+        with timer.measure("similarity"):
+            block = (tfidf_matrix[block_rows] @ transposed).toarray()
+        with timer.measure("top_n"):
+            engine._select_top_n(block, block_rows, top_n)
+        del block
+
+    return {
+        "rows": num_rows,
+        "scored_rows": scored_rows,
+        "vocabulary_size": tfidf_matrix.shape[1],
+        "tfidf_nnz": int(tfidf_matrix.nnz),
+        "stages": {stage: timer.stages[stage] for stage in STAGES if stage in timer.stages},
+    }
+
+
+def benchmark_ann(
+        path: str,
+        top_n: int,
+        block_size: int,
+        sample_size: int = 1000,
+        n_components: int = 128,
+        n_lists: int | None = None,
+        n_probe: int = 8
+) -> dict:
+    """
+    Измеряет полноту и время построения приближённого движка относительно точного поиска.
+
+    Использует `RecommendationEngineANN.recall_report`: приближённые соседи строятся
+    для всего каталога, точные — только для случайной выборки. Время точного построения
+    всего каталога оценивается по выборке линейно (каждая строка стоит умножения
+    на всю матрицу), поэтому режим применим и к каталогам, где точный движок слишком дорог.
+
+    Args:
+        path (str): Путь к файлу с данными.
+        top_n (int): Количество рекомендаций.
+        block_size (int): Размер блока строк для расчёта сходства.
+        sample_size (int): Количество элементов в выборке для точного поиска.
+        n_components (int): Размерность пространства после SVD.
+        n_lists (int | None): Количество кластеров (None — sqrt(N)).
+        n_probe (int): Количество просматриваемых кластеров.
+
+    Returns:
+        dict: Количество строк, отчёт recall@top_n, оценка ускорения и пиковая память.
+    """
+    engine = RecommendationEngineANN(
+        path, top_n, block_size=block_size, n_components=n_components, n_lists=n_lists, n_probe=n_probe
+    )
+    timer = StageTimer()
+    with timer.measure("recall_report"):
+        report = engine.recall_report(sample_size)
+
+    exact_seconds = report["exact_sample_seconds"] * report["num_items"] / max(report["sample_size"], 1)
+    return {
+        "rows": report["num_items"],
+        **report,
+        "exact_seconds_estimate": round(exact_seconds, 3),
+        "speedup_estimate": round(exact_seconds / report["ann_build_seconds"], 2)
+        if report["ann_build_seconds"] else None,
+        "peak_rss_mb": timer.stages["recall_report"]["peak_rss_mb"],
+    }
+
+
+def run_benchmark(
+        sizes: list[int],
+        top_n: int,
+        block_size: int,
+        similarity_rows: int | None = None,
+        seed: int = 42,
+        mode: str = "stages",
+        sample_size: int = 1000,
+        n_components: int = 128,
+        n_lists: int | None = None,
+        n_probe: int = 8
+) -> dict:
+    """
+    Запускает бенчмарк на синтетических каталогах заданных размеров.
+
+    Args:
+        sizes (list[int]): Размеры каталогов.
+        top_n (int): Количество рекомендаций.
+        block_size (int): Размер блока строк для расчёта сходства.
+        similarity_rows (int | None): Ограничение строк для стадий similarity и top_n.
+        seed (int): Зерно генератора каталога.
+        mode (str): `stages` — стадии точного движка (`benchmark_engine`),
+            `ann` — полнота и время приближённого движка (`benchmark_ann`).
+        sample_size (int): Размер выборки для точного поиска в режиме `ann`.
+        n_components (int): Размерность пространства после SVD в режиме `ann`.
+        n_lists (int | None): Количество кластеров в режиме `ann`.
+        n_probe (int): Количество просматриваемых кластеров в режиме `ann`.
+
+    Returns:
+        dict: Окружение запуска (meta) и результаты по размерам (results).
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            path = os.path.join(directory, f"catalog_{size}.csv")
+            generate_catalog(size, seed=seed).to_csv(path, index=False)
+            if mode == "ann":
+                results.append(
+                    benchmark_ann(path, top_n, block_size, sample_size, n_components, n_lists, n_probe)
+                )
+            else:
+                results.append(benchmark_engine(path, top_n, block_size, similarity_rows))
+            os.remove(path)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "scipy": scipy.__version__,
+            "pandas": pd.__version__,
+            "sklearn": sklearn.__version__,
+            "mode": mode,
+            "top_n": top_n,
+            "block_size": block_size,
+            "similarity_rows": similarity_rows,
+            "seed": seed,
+            "peak_rss_per_stage": reset_peak_rss(),
+        },
+        "results": results,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк стадий рекомендательного движка")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Размеры каталогов")
+    parser.add_argument("--top-n", type=int, default=20, help="Количество рекомендаций")
+    parser.add_argument("--block-size", type=int, default=256, help="Размер блока строк для расчёта сходства")
+    parser.add_argument("--similarity-rows", type=int, default=None,
+                        help="Сколько строк прогнать через similarity и top_n (по умолчанию все)")
+    parser.add_argument("--seed", type=int, default=42, help="Зерно генератора каталога")
+    parser.add_argument("--mode", choices=MODES, default="stages",
+                        help="stages — стадии точного движка, ann — recall и время приближённого движка")
+    parser.add_argument("--sample-size", type=int, default=1000,
+                        help="Размер выборки для точного поиска в режиме ann")
+    parser.add_argument("--n-components", type=int, default=128, help="Размерность SVD в режиме ann")
+    parser.add_argument("--n-lists", type=int, default=None,
+                        help="Количество кластеров в режиме ann (по умолчанию sqrt(N))")
+    parser.add_argument("--n-probe", type=int, default=8, help="Количество просматриваемых кластеров в режиме ann")
+    parser.add_argument("--output", default=None, help="Файл для JSON-отчёта (по умолчанию stdout)")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(
+        args.sizes, args.top_n, args.block_size, args.similarity_rows, args.seed,
+        args.mode, args.sample_size, args.n_components, args.n_lists, args.n_probe
+    )
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import hashlib
+from typing import Any
+
+import orjson
+from starlette.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON-ответ, сериализуемый через orjson.
+
+    Быстрее стандартного `json`, сериализует массивы numpy и словари с нестроковыми
+    ключами (например, ID видео). Неизвестные типы приводятся к строке.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content, default=str, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Собирает сильный ETag из частей версии ресурса.
+
+    Args:
+        *parts (Any): Части версии (например, хеш содержимого ответа).
+
+    Returns:
+        str: ETag в кавычках, например `"3-0-42"`.
+    """
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+
+def content_etag(body: bytes) -> str:
+    """
+    Собирает сильный ETag из хеша тела ответа.
+
+    Тело, собранное детерминированным кодировщиком, одинаково на всех хостах API,
+    поэтому и ETag одинаков и меняется только вместе с содержимым ответа.
+
+    Args:
+        body (bytes): Тело ответа.
+
+    Returns:
+        str: ETag в кавычках (BLAKE2b, 128 бит).
+    """
+    return make_etag(hashlib.blake2b(body, digest_size=16).hexdigest())
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Проверяет заголовок `If-None-Match` по правилам слабого сравнения (RFC 9110, 13.1.2).
+
+    Вызывается для найденного ресурса, поэтому `*` совпадает всегда.
+
+    Args:
+        if_none_match (str | None): Значение заголовка: `*` или список ETag через запятую.
+        etag (str): Текущий ETag ресурса.
+
+    Returns:
+        bool: True, если клиент уже имеет актуальную версию ресурса.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag.removeprefix("W/") for tag in if_none_match.split(","))
@@ -0,0 +1,39 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Объединяет одновременные вызовы с одинаковым ключом в одно выполнение.
+
+    Первый вызов запускает корутину, остальные вызовы с тем же ключом, пришедшие
+    до её завершения, ждут тот же результат (или то же исключение). После
+    завершения ключ освобождается, и следующий вызов выполняется заново.
+
+    Рассчитан на один цикл событий (один процесс API).
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Выполняет `func` или присоединяется к уже выполняющемуся вызову с тем же ключом.
+
+        Параметры:
+            key: Ключ вызова.
+            func: Функция без аргументов, возвращающая корутину.
+
+        Возвращает:
+            Результат выполнения `func`.
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = asyncio.ensure_future(func())
+            self._calls[key] = call
+            call.add_done_callback(lambda _: self._calls.pop(key, None))
+        # Отмена одного ожидающего не должна отменять общий вызов для остальных
+        return await asyncio.shield(call)
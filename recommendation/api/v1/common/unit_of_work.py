@@ -46,19 +46,28 @@ class AsyncUnitOfWork:
             exc_val: Значение исключения (если возникло).
             exc_tb: Трассировка стека исключения (если возникло).
         """
-        if exc_type:
-            await self.rollback()
-            await self.close()
-        else:
-            await self.commit()
+        try:
+            if exc_type:
+                await self.rollback()
+            else:
+                await self.commit()
+        finally:
             await self.close()
 
     async def commit(self):
         """
         Фиксирует изменения в базе данных и кеше.
+
+        Кеш фиксируется только после успешной фиксации базы данных; если она не удалась,
+        изменения кеша откатываются, а ошибка пробрасывается дальше.
         """
         if self.db_service:
-            await self.db_service.commit()
+            try:
+                await self.db_service.commit()
+            except Exception:
+                if self.cache_service:
+                    await self.cache_service.rollback()
+                raise
         if self.cache_service:
             await self.cache_service.commit()
 
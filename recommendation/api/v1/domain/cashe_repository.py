@@ -1,13 +1,40 @@
 from abc import ABC, abstractmethod
 from typing import Any, Dict, List
 
+from recommendation.api.v1.utils.similarity_recommendation.recommendation_result import RecommendationResult
+
 
 class StorageRepository(ABC):
     """Абстрактный класс ,который описывает интерфейс для работы с инструментами кеширования."""
 
     @abstractmethod
-    async def bulk_set(self, data: List[Dict[str, Any]]):
-        """Абстрактный метод ,который описывает массовое добавление строкового значения по ключу."""
+    async def stage_generation(self) -> int:
+        """Абстрактный метод для выделения поколения полного построения"""
+        pass
+
+    @abstractmethod
+    async def begin_update(self) -> int:
+        """Абстрактный метод для начала частичной публикации в активное поколение"""
+        pass
+
+    @abstractmethod
+    async def bulk_set(self, data: RecommendationResult):
+        """Абстрактный метод ,который описывает массовое добавление рекомендаций пакета построения."""
+        pass
+
+    @abstractmethod
+    async def bulk_delete(self, ids: List[int]):
+        """Абстрактный метод ,который описывает массовое удаление записей по идентификаторам."""
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: Any):
+        """Абстрактный метод для записи одного значения по ключу"""
+        pass
+
+    @abstractmethod
+    async def fill(self, items: Dict[str, Any], ttl: int):
+        """Абстрактный метод для заполнения отсутствующих ключей значениями с ограниченным временем жизни"""
         pass
 
     @abstractmethod
@@ -15,6 +42,26 @@ class StorageRepository(ABC):
         """Абстрактный метод для получения записи по ключу"""
         pass
 
+    @abstractmethod
+    async def mget(self, keys: List[str]) -> List[Any]:
+        """Абстрактный метод для получения нескольких записей по ключам за один запрос"""
+        pass
+
+    @abstractmethod
+    async def publish_generation(self) -> int:
+        """Абстрактный метод для публикации нового поколения построения рекомендаций (переключения чтения на него)"""
+        pass
+
+    @abstractmethod
+    async def get_generation(self) -> int:
+        """Абстрактный метод для получения текущего поколения построения рекомендаций"""
+        pass
+
+    @abstractmethod
+    async def get_changes(self, revision: int | None) -> tuple[int, int, list[int] | None]:
+        """Абстрактный метод для получения поколения, номера последней публикации и видео, изменённых после `revision`"""
+        pass
+
     @abstractmethod
     async def commit(self):
         """Aбстрактный метод для фиксации изменений после выполнения транзакции в базе данных"""
@@ -22,7 +69,7 @@ class StorageRepository(ABC):
 
     @abstractmethod
     async def rollback(self):
-        """Aбстрактный метод для отката изменений в случае ошибки в базе данных"""
+        """Aбстрактный метод для отката изменений (возврата к предыдущему поколению) в случае ошибки"""
         pass
 
     @abstractmethod
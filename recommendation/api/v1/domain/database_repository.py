@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import Any, AsyncIterable, Dict, Iterable, List
+
+from recommendation.api.v1.utils.similarity_recommendation.recommendation_result import RecommendationResult
 
 
 class DatabaseRepository(ABC):
@@ -8,19 +10,54 @@ class DatabaseRepository(ABC):
     """
 
     @abstractmethod
-    async def bulk_update(self, query: str, params: List[Dict[str, Any]]) -> Dict[str, Any] | None:
+    async def bulk_update(self, query: str, params: RecommendationResult) -> Dict[str, Any] | None:
         """
         Выполняет массовое обновление данных.
 
         Args:
             query (str): Сырой SQL-запрос.
-            params (List[Dict[str, Any]]): Список словарей с параметрами запроса.
+            params (RecommendationResult): Пакет рекомендаций, строки которого передаются в запрос.
 
         Returns:
             Dict[str, Any] | None: Результат операции или None в случае успеха.
         """
         pass
 
+    @abstractmethod
+    async def bulk_delete(self, query: str, ids: List[int]) -> None:
+        """
+        Выполняет массовое удаление данных.
+
+        Args:
+            query (str): Сырой SQL-запрос с параметром `:ids`.
+            ids (List[int]): Идентификаторы удаляемых записей.
+        """
+        pass
+
+    @abstractmethod
+    async def execute(self, query: str) -> None:
+        """
+        Выполняет один SQL-оператор без параметров (например, DDL) в текущей транзакции.
+
+        Args:
+            query (str): Сырой SQL-запрос.
+        """
+        pass
+
+    @abstractmethod
+    async def copy_records(
+            self, table: str, columns: List[str], records: Iterable[tuple] | AsyncIterable[tuple]
+    ) -> None:
+        """
+        Потоково загружает строки в таблицу командой COPY в текущей транзакции.
+
+        Args:
+            table (str): Имя таблицы.
+            columns (List[str]): Колонки в порядке значений строки.
+            records (Iterable[tuple] | AsyncIterable[tuple]): Строки для загрузки.
+        """
+        pass
+
     @abstractmethod
     async def get(self, model: Any, primary_key: int):
         """Ищет одну запись по первичному ключу"""
@@ -0,0 +1,42 @@
+from abc import ABC, abstractmethod
+from typing import Dict, List, Tuple
+
+# Рекомендации видео и сходство с ними (None, если сходство не сохранено)
+RecommendationRow = Tuple[List[int], List[float] | None]
+
+
+class RecommendationReadRepository(ABC):
+    """
+    Абстрактный класс, который описывает чтение рекомендаций на пути обслуживания запросов.
+    """
+
+    @abstractmethod
+    async def get(self, video_id: int) -> RecommendationRow | None:
+        """
+        Получает рекомендации одного видео.
+
+        Args:
+            video_id (int): ID видео.
+
+        Returns:
+            RecommendationRow | None: Рекомендации и сходство или None, если записи нет.
+        """
+        pass
+
+    @abstractmethod
+    async def get_many(self, video_ids: List[int]) -> Dict[int, RecommendationRow]:
+        """
+        Получает рекомендации нескольких видео одним запросом.
+
+        Args:
+            video_ids (List[int]): ID видео.
+
+        Returns:
+            Dict[int, RecommendationRow]: Рекомендации найденных видео.
+        """
+        pass
+
+    @abstractmethod
+    async def close(self):
+        """Aбстрактный метод для закрытия соединений"""
+        pass
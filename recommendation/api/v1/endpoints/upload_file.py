@@ -1,6 +1,6 @@
 from http import HTTPStatus
-from fastapi import UploadFile, File, APIRouter, Request
-from starlette.responses import JSONResponse
+from fastapi import UploadFile, File, APIRouter, Request, Query
+from recommendation.api.v1.common.responses import ORJSONResponse
 from recommendation.config import settings
 
 # Создаем новый роутер с префиксом "/api/v1/file"
@@ -8,7 +8,11 @@ router = APIRouter(prefix="/api/v1/file")
 
 
 @router.post("/upload_dataset/")
-async def load_dataset(request: Request, file: UploadFile = File(...)):
+async def load_dataset(
+        request: Request,
+        file: UploadFile = File(...),
+        delta: bool = Query(False, description="Файл содержит только изменённые строки каталога.")
+):
     """
     Эндпоинт для загрузки датасета и инициирования процесса генерации рекомендаций.
 
@@ -18,9 +22,11 @@ async def load_dataset(request: Request, file: UploadFile = File(...)):
     Параметры:
         request (Request): Объект запроса, используется для получения доступа к шине событий.
         file (UploadFile): Загружаемый файл, который будет использован для генерации рекомендаций.
+        delta (bool): Если истинно, файл содержит дельту каталога (колонка `action`: add, update, delete),
+            и рекомендации пересчитываются только для затронутых видео.
 
     Возвращает:
-        JSONResponse: Ответ с сообщением о статусе выполнения.
+        ORJSONResponse: Ответ с сообщением о статусе выполнения.
     """
     try:
         # Уведомляем шину событий о загрузке файла, передавая файл и путь для сохранения
@@ -29,10 +35,10 @@ async def load_dataset(request: Request, file: UploadFile = File(...)):
         )
 
         # Инициируем процесс генерации рекомендаций
-        await request.app.state.event_bus.notify("generate_recommendations",file_name=file.filename)
+        await request.app.state.event_bus.notify("generate_recommendations", file_name=file.filename, delta=delta)
 
         # Возвращаем успешный ответ с кодом 200 и сообщением о запуске процесса рекомендаций
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=HTTPStatus.OK,  # Код 200: ОК
             content={"message": "Набор данных успешно загружен. Начата генерация рекомендаций."}
         )
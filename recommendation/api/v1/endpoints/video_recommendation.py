@@ -1,16 +1,49 @@
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Depends, Header, Query, HTTPException, Request
 
-from recommendation.api.v1.adapters.models import RecommendationResponse
-from recommendation.api.v1.service_layer.similar_videos import get_similar_videos
-from starlette.status import HTTP_200_OK, HTTP_404_NOT_FOUND
-from starlette.responses import JSONResponse
+from recommendation.api.v1.adapters.dependencies import (
+    get_cache_manager,
+    get_local_cache,
+    get_read_repository,
+    get_snapshot,
+)
+from recommendation.api.v1.adapters.local_cache import LocalCache
+from recommendation.api.v1.adapters.models import (
+    RecommendationBatchRequest,
+    RecommendationBatchResponse,
+    RecommendationResponse,
+    VideoMetadata,
+)
+from recommendation.api.v1.adapters.recommendation_codec import encode_recommendation_response
+from recommendation.api.v1.adapters.recommendation_snapshot import RecommendationSnapshot
+from recommendation.api.v1.common.responses import ORJSONResponse, content_etag, etag_matches
+from recommendation.api.v1.domain.recommendation_read_repository import RecommendationReadRepository
+from recommendation.api.v1.service_layer.manager_storage import CacheStorageManager
+from recommendation.api.v1.service_layer.similar_videos import (
+    get_recommendation_body,
+    get_similar_videos,
+    get_similar_videos_batch,
+    get_similar_videos_by_metadata,
+)
+from recommendation.config import settings
+from starlette.status import HTTP_200_OK, HTTP_304_NOT_MODIFIED, HTTP_404_NOT_FOUND, HTTP_503_SERVICE_UNAVAILABLE
+from starlette.responses import Response
 
 # Создаём роутер с префиксом "/api/v1/recommendation"
 router = APIRouter(prefix="/api/v1/recommendation")
 
 
 @router.get("/get_recommendation/")
-async def get_recommendation(video_id: int = Query(..., ge=0)):
+async def get_recommendation(
+        video_id: int = Query(..., ge=0),
+        limit: int | None = Query(None, ge=1),
+        offset: int = Query(0, ge=0),
+        min_score: float | None = Query(None, ge=-1, le=1),
+        if_none_match: str | None = Header(None),
+        cache_manager: CacheStorageManager = Depends(get_cache_manager),
+        read_repository: RecommendationReadRepository = Depends(get_read_repository),
+        local_cache: LocalCache = Depends(get_local_cache),
+        snapshot: RecommendationSnapshot | None = Depends(get_snapshot)
+):
     """
     Получает список рекомендаций для видео на основе переданного video_id.
 
@@ -21,33 +54,156 @@ async def get_recommendation(video_id: int = Query(..., ge=0)):
     Параметры:
     - **video_id** (int, query-параметр): ID видео, для которого запрашиваются рекомендации.
       Должен быть целым числом и не может быть отрицательным (ge=0).
+    - **limit** (int, query-параметр): Максимальное количество рекомендаций (по умолчанию все сохранённые).
+    - **offset** (int, query-параметр): Сколько первых рекомендаций пропустить (по умолчанию 0).
+    - **min_score** (float, query-параметр): Минимальное сходство рекомендации от -1 до 1.
+      Не применяется к рекомендациям, сохранённым без сходства.
+    - **If-None-Match** (заголовок): ETag ранее полученного ответа.
 
     Возвращает:
-    - **200 OK**: JSON с рекомендациями вида `{"data_recommendations": [...]}`.
+    - **200 OK**: JSON с рекомендациями и их сходством вида `{"data_recommendations": [...]}`.
+      Если срез пуст (например, `offset` за концом списка), список рекомендаций пустой.
+    - **304 Not Modified**: Если ETag из `If-None-Match` совпадает с текущим или передан `*`
+      и рекомендации для видео есть. Если тело ответа есть в локальном кеше процесса,
+      Redis и база не опрашиваются.
     - **404 Not Found**: Если рекомендации не найдены.
     - **500 Internal Server Error**: В случае неожиданных ошибок сервера.
+
+    Рекомендации сначала ищутся в снимке последнего построения, отображённом в память,
+    затем в Redis и базе данных. Без параметров среза отдаётся тело ответа, сохранённое
+    при публикации построения, без десериализации и повторной сериализации.
+
+    ETag ответа — хеш его тела (`content_etag`): он одинаков на всех хостах API и меняется
+    только при изменении рекомендаций видео, а не при каждой публикации построения.
+    `Cache-Control: max-age` задаётся настройкой `recommendation_cache_max_age`.
     """
+    headers = {"Cache-Control": f"public, max-age={settings.recommendation_cache_max_age}"}
+
     try:
-        # Запрашиваем похожие видео через сервисный слой
-        recommendations = await get_similar_videos(video_id)
+        if limit is None and offset == 0 and min_score is None:
+            # Быстрый путь: готовое тело ответа из локального кеша или Redis
+            body = await get_recommendation_body(video_id, cache_manager, read_repository, local_cache, snapshot)
+        else:
+            # Запрашиваем срез похожих видео через сервисный слой; срез сериализуется тем же
+            # кодеком, что и готовое тело ответа, поэтому сходство в обоих путях выводится как float32
+            recommendations = await get_similar_videos(
+                video_id, cache_manager, read_repository, local_cache, limit, offset, min_score, snapshot
+            )
+            body = None if not recommendations else encode_recommendation_response(
+                video_id, recommendations.ids, recommendations.scores
+            )
 
         # Если рекомендации отсутствуют, выбрасываем HTTP-исключение с кодом 404
-        if not recommendations:
+        if body is None:
             raise HTTPException(
                 status_code=HTTP_404_NOT_FOUND,
                 detail="Похожие видео не найдены."
             )
 
+        headers["ETag"] = content_etag(body)
+        if etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=HTTP_304_NOT_MODIFIED, headers=headers)
+
         # Возвращаем список рекомендованных видео с кодом 200
-        return JSONResponse(
-            status_code=HTTP_200_OK,
-            content={
-                "data_recommendations": RecommendationResponse(
-                    id=video_id,
-                    recommendation_id=recommendations).model_dump()
-            }
-        )
+        return Response(content=body, status_code=HTTP_200_OK, headers=headers, media_type="application/json")
 
+    except HTTPException:
+        raise
     except Exception as e:
         # Логируем и выбрасываем ошибку сервера с описанием проблемы
         raise Exception(f"Внутренняя ошибка сервера: {str(e)}")
+
+
+@router.post("/get_recommendations_batch/")
+async def get_recommendations_batch(
+        batch: RecommendationBatchRequest,
+        cache_manager: CacheStorageManager = Depends(get_cache_manager),
+        read_repository: RecommendationReadRepository = Depends(get_read_repository),
+        local_cache: LocalCache = Depends(get_local_cache),
+        snapshot: RecommendationSnapshot | None = Depends(get_snapshot)
+):
+    """
+    Получает рекомендации сразу для нескольких видео.
+
+    ID, которых нет в снимке последнего построения, разрешаются одной командой MGET
+    к Redis, а промахи кеша — одним запросом к базе данных, вместо отдельного запроса
+    на каждое видео.
+
+    Параметры:
+    - **video_ids** (тело запроса): Список ID видео (неотрицательные целые,
+      не больше `recommendation_batch_max_size`).
+
+    Возвращает:
+    - **200 OK**: JSON вида `{"data_recommendations": {"recommendations": {"<id>": [...]}}}`.
+      Видео без рекомендаций в ответ не попадают.
+    - **500 Internal Server Error**: В случае неожиданных ошибок сервера.
+    """
+    try:
+        recommendations = await get_similar_videos_batch(
+            batch.video_ids, cache_manager, read_repository, local_cache, snapshot
+        )
+    except Exception as e:
+        raise Exception(f"Внутренняя ошибка сервера: {str(e)}")
+
+    return ORJSONResponse(
+        status_code=HTTP_200_OK,
+        content={
+            "data_recommendations": RecommendationBatchResponse(
+                recommendations=recommendations).model_dump()
+        }
+    )
+
+
+@router.post("/get_recommendation_by_metadata/")
+async def get_recommendation_by_metadata(
+        request: Request,
+        metadata: VideoMetadata,
+        cache_manager: CacheStorageManager = Depends(get_cache_manager),
+        read_repository: RecommendationReadRepository = Depends(get_read_repository),
+        local_cache: LocalCache = Depends(get_local_cache),
+        snapshot: RecommendationSnapshot | None = Depends(get_snapshot)
+):
+    """
+    Получает список рекомендаций для видео, которого ещё нет в последнем построении.
+
+    Если рекомендации для `metadata.id` уже рассчитаны, они возвращаются из кеша или базы.
+    Иначе топ-N считается по метаданным с помощью индекса сходства, загруженного в процесс API
+    (включается настройкой `similarity_index_enabled`), и сохраняется в кеш.
+
+    Параметры:
+    - **metadata** (тело запроса): id, title, description, categories и tags видео.
+
+    Возвращает:
+    - **200 OK**: JSON с рекомендациями вида `{"data_recommendations": [...]}`.
+    - **404 Not Found**: Если похожие видео не найдены.
+    - **503 Service Unavailable**: Если индекс сходства не загружен.
+    - **500 Internal Server Error**: В случае неожиданных ошибок сервера.
+    """
+    index = getattr(request.app.state, "similarity_index", None)
+    if index is None:
+        raise HTTPException(
+            status_code=HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Индекс сходства не загружен."
+        )
+
+    try:
+        recommendations = await get_similar_videos_by_metadata(
+            metadata, index, cache_manager, read_repository, local_cache, snapshot
+        )
+    except Exception as e:
+        raise Exception(f"Внутренняя ошибка сервера: {str(e)}")
+
+    if not recommendations:
+        raise HTTPException(
+            status_code=HTTP_404_NOT_FOUND,
+            detail="Похожие видео не найдены."
+        )
+
+    return ORJSONResponse(
+        status_code=HTTP_200_OK,
+        content={
+            "data_recommendations": RecommendationResponse(
+                id=metadata.id,
+                recommendation_id=recommendations).model_dump()
+        }
+    )
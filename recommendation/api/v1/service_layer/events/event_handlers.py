@@ -3,9 +3,10 @@ import signal
 
 from recommendation.api.v1.service_layer.task import generate_recommendation_task, error_handler
 from recommendation.api.v1.service_layer.file_storage.factory_saver_upload_file import FileSaverFactory
+from recommendation.config import settings
 
 
-async def generate_recommendations_handler(file_name):
+async def generate_recommendations_handler(file_name, delta=False):
     """
     Обработчик события для генерации рекомендаций.
 
@@ -15,10 +16,13 @@ async def generate_recommendations_handler(file_name):
 
     Задача выполняется асинхронно, и обработчик не блокирует выполнение других операций
     приложения.
+
+    Если `delta` истинно, файл обрабатывается как дельта каталога (инкрементальный пересчёт).
     """
     signal.signal(signal.SIGUSR1, error_handler)
-    process = multiprocessing.Process(target=generate_recommendation_task ,args=(file_name,))
-    process.daemon = True
+    process = multiprocessing.Process(target=generate_recommendation_task ,args=(file_name, delta))
+    # Демон-процессы не могут порождать дочерние, а параллельному построению нужен пул процессов
+    process.daemon = settings.similarity_workers == 1
     process.start()
 
 async def save_file_handler(file, path_uploaded_data_file):
@@ -1,5 +1,9 @@
 from fastapi import UploadFile
-from recommendation.api.v1.service_layer.file_storage.file_saver import FileHandlerCSV
+from recommendation.api.v1.service_layer.file_storage.file_saver import (
+    FileHandlerArrow,
+    FileHandlerCSV,
+    FileHandlerParquet,
+)
 
 
 class FileSaverFactory:
@@ -7,6 +11,14 @@ class FileSaverFactory:
     Фабрика для создания объектов, отвечающих за сохранение файлов в файловую систему.
     """
 
+    # Поддерживаемые расширения файлов и соответствующие им обработчики
+    savers = {
+        ".csv": FileHandlerCSV,
+        ".parquet": FileHandlerParquet,
+        ".arrow": FileHandlerArrow,
+        ".feather": FileHandlerArrow,
+    }
+
     @staticmethod
     def get_saver(file: UploadFile, path_uploaded_data_file: str):
         """
@@ -22,7 +34,7 @@ class FileSaverFactory:
         Raises:
             ValueError: Если формат файла не поддерживается.
         """
-        if file.filename.endswith(".csv"):
-            return FileHandlerCSV(file, path_uploaded_data_file)
-        else:
-            raise ValueError("Формат файла не поддерживается.")
+        for extension, saver in FileSaverFactory.savers.items():
+            if file.filename.endswith(extension):
+                return saver(file, path_uploaded_data_file)
+        raise ValueError("Формат файла не поддерживается.")
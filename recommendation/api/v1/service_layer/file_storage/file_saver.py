@@ -3,7 +3,7 @@ import aiofiles
 from fastapi import UploadFile
 
 
-class FileHandlerCSV:
+class FileHandler:
     """
     Класс для обработки файлов, включающий создание директорий и асинхронное сохранение файлов на диск.
 
@@ -59,3 +59,21 @@ class FileHandlerCSV:
                     await buffer.write(chunk)
         except Exception as e:
             raise RuntimeError(f"Ошибка при сохранении файла: {e}")
+
+
+class FileHandlerCSV(FileHandler):
+    """
+    Обработчик загружаемых датасетов в формате CSV.
+    """
+
+
+class FileHandlerParquet(FileHandler):
+    """
+    Обработчик загружаемых датасетов в формате Parquet.
+    """
+
+
+class FileHandlerArrow(FileHandler):
+    """
+    Обработчик загружаемых датасетов в формате Arrow IPC (Feather v2).
+    """
@@ -1,6 +1,6 @@
-from typing import Dict, Any, List
-import pandas as pd
+from typing import Dict, Any, AsyncIterable, Iterable, List
 from recommendation.api.v1.domain.database_repository import DatabaseRepository
+from recommendation.api.v1.utils.similarity_recommendation.recommendation_result import RecommendationResult
 
 
 class DataBaseService:
@@ -16,28 +16,44 @@ class DataBaseService:
         """
         self.repository = repository
 
-    async def bulk_update(self, query: str, params: List[Dict[str, Any]]) -> Dict[str, Any] | None:
+    async def bulk_update(self, query: str, params: RecommendationResult) -> Dict[str, Any] | None:
         """
         Выполняет массовое обновление записей в базе данных.
 
         :param query: SQL-запрос для выполнения.
-        :param params: Список параметров для массового обновления.
+        :param params: Пакет рекомендаций для массового обновления.
         :return: Результат операции в виде `Dict`, либо `None` в случае успеха.
         """
         return await self.repository.bulk_update(query, params)
 
-    def batch_generator(self, df: pd.DataFrame, batch_size: int = 1000):
+    async def bulk_delete(self, query: str, ids: List[int]) -> None:
         """
-        Разбивает `DataFrame` на батчи заданного размера.
+        Выполняет массовое удаление записей из базы данных.
 
-        :param df: `pandas.DataFrame`, который нужно разбить.
-        :param batch_size: Размер одной партии (по умолчанию 1000).
-        :return: Генератор батчей данных.
-        :raises NotImplementedError: Если метод `batch_generator` не реализован в репозитории.
+        :param query: SQL-запрос с параметром `:ids`.
+        :param ids: Идентификаторы удаляемых записей.
         """
-        if hasattr(self.repository, 'batch_generator'):
-            return self.repository.batch_generator(df, batch_size)
-        raise NotImplementedError("Метод `batch_generator` не реализован в репозитории.")
+        await self.repository.bulk_delete(query, ids)
+
+    async def execute(self, query: str) -> None:
+        """
+        Выполняет один SQL-оператор без параметров (например, DDL).
+
+        :param query: SQL-запрос для выполнения.
+        """
+        await self.repository.execute(query)
+
+    async def copy_records(
+            self, table: str, columns: List[str], records: Iterable[tuple] | AsyncIterable[tuple]
+    ) -> None:
+        """
+        Потоково загружает строки в таблицу командой COPY.
+
+        :param table: Имя таблицы.
+        :param columns: Колонки в порядке значений строки.
+        :param records: Строки для загрузки (синхронный или асинхронный итератор).
+        """
+        await self.repository.copy_records(table, columns, records)
 
     async def get(self, model: Any, key: Any) -> Any:
         """
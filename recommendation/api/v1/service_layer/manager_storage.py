@@ -1,5 +1,6 @@
 from typing import Any, List, Dict
 from recommendation.api.v1.domain.cashe_repository import StorageRepository
+from recommendation.api.v1.utils.similarity_recommendation.recommendation_result import RecommendationResult
 
 
 class CacheStorageManager:
@@ -17,14 +18,57 @@ class CacheStorageManager:
         """
         self.storage = storage
 
-    async def bulk_set(self, data: List[Dict[str, Any]]) -> None:
+    async def stage_generation(self) -> int:
+        """
+        Выделяет поколение, в которое записывается полное построение.
+
+        :return: Номер поколения построения.
+        """
+        return await self.storage.stage_generation()
+
+    async def begin_update(self) -> int:
+        """
+        Начинает частичную публикацию: записываются только ключи изменённых и удалённых
+        видео в активном поколении.
+
+        :return: Номер активного поколения.
+        """
+        return await self.storage.begin_update()
+
+    async def bulk_set(self, data: RecommendationResult) -> None:
         """
         Сохраняет сразу несколько значений в кеше.
 
-        :param data: Список словарей с данными для кеширования.
+        :param data: Пакет рекомендаций построения.
         """
         await self.storage.bulk_set(data)
 
+    async def bulk_delete(self, ids: List[int]) -> None:
+        """
+        Удаляет из кеша записи по идентификаторам.
+
+        :param ids: Список идентификаторов для удаления.
+        """
+        await self.storage.bulk_delete(ids)
+
+    async def set(self, key: str, value: Any) -> None:
+        """
+        Сохраняет одно значение в кеше.
+
+        :param key: Ключ, по которому сохраняются данные.
+        :param value: Значение для сохранения.
+        """
+        await self.storage.set(key, value)
+
+    async def fill(self, items: Dict[str, Any], ttl: int) -> None:
+        """
+        Заполняет кеш значениями, которых в нём ещё нет.
+
+        :param items: Словарь ключ -> значение.
+        :param ttl: Время жизни записей в секундах.
+        """
+        await self.storage.fill(items, ttl)
+
     async def get(self, key: str) -> Any:
         """
         Получает значение из кеша по указанному ключу.
@@ -34,6 +78,53 @@ class CacheStorageManager:
         """
         return await self.storage.get(key)
 
+    async def mget(self, keys: List[str]) -> List[Any]:
+        """
+        Получает значения нескольких ключей за один запрос к кешу.
+
+        :param keys: Ключи, по которым нужно получить данные.
+        :return: Значения в порядке ключей (`None` для отсутствующих).
+        """
+        return await self.storage.mget(keys)
+
+    async def publish_generation(self) -> int:
+        """
+        Публикует новое поколение построения рекомендаций.
+
+        Процессы API начинают читать ключи нового поколения и сбрасывают локальные кеши,
+        увидев его при следующей проверке.
+
+        :return: Номер нового поколения.
+        """
+        return await self.storage.publish_generation()
+
+    async def get_generation(self) -> int:
+        """
+        Получает текущее поколение построения рекомендаций.
+
+        :return: Номер поколения (0, если построений ещё не было).
+        """
+        return await self.storage.get_generation()
+
+    async def get_changes(self, revision: int | None) -> tuple[int, int, list[int] | None]:
+        """
+        Получает активное поколение и видео, изменённые публикациями после `revision`.
+
+        :param revision: Номер публикации, изменения до которой уже учтены (None — неизвестен).
+        :return: Поколение, номер последней публикации и ID изменённых видео
+            или None, если кеш нужно сбросить целиком.
+        """
+        return await self.storage.get_changes(revision)
+
+    @property
+    def revision(self) -> int | None:
+        """
+        Номер последней публикации, зафиксированной через этот менеджер.
+
+        :return: Номер публикации или None, если публикаций не было.
+        """
+        return self.storage.revision
+
     async def commit(self) -> None:
         """
         Фиксирует все изменения в кеше.
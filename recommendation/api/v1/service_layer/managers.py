@@ -16,15 +16,20 @@ async def create_async_database_manager(db: AsyncSession) -> DataBaseService:
     return DataBaseService(repository)
 
 
-async def create_async_cache_manager(host: str, port: int, new_db: int, old_db: int) -> CacheStorageManager:
+async def create_async_cache_manager(
+        host: str, port: int, db: int, generations_kept: int = 2, changes_kept: int = 1000
+) -> CacheStorageManager:
     """
     Создаёт сервис для работы с кешированием.
 
     :param host: Хост Redis.
     :param port: Порт Redis.
-    :param new_db: Индекс новой базы Redis.
-    :param old_db: Индекс старой базы Redis.
+    :param db: Индекс базы Redis.
+    :param generations_kept: Сколько последних поколений построения хранить для отката.
+    :param changes_kept: Сколько последних публикаций хранить в журнале изменённых видео.
     :return: Экземпляр `CacheStorageManager`.
     """
-    storage = AsyncRedisStorage(host=host, port=port, new_db=new_db, old_db=old_db)
+    storage = AsyncRedisStorage(
+        host=host, port=port, db=db, generations_kept=generations_kept, changes_kept=changes_kept
+    )
     return CacheStorageManager(storage)
@@ -0,0 +1,59 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Sequence
+
+# Признак конца потока пакетов в очереди потребителя
+_DONE = object()
+
+Consumer = Callable[[AsyncIterator[Any]], Awaitable[None]]
+
+
+async def _iterate(queue: asyncio.Queue) -> AsyncIterator[Any]:
+    """
+    Перебирает пакеты из очереди потребителя до признака конца.
+
+    :param queue: Очередь пакетов потребителя.
+    :return: Асинхронный итератор пакетов.
+    """
+    while True:
+        batch = await queue.get()
+        if batch is _DONE:
+            return
+        yield batch
+
+
+async def publish_batches(batches: Iterable[Any], consumers: Sequence[Consumer], max_in_flight: int) -> None:
+    """
+    Публикует пакеты в несколько независимых приёмников одновременно.
+
+    Пакеты создаются один раз и раздаются всем потребителям через собственные
+    ограниченные очереди: каждый потребитель пишет в свой приёмник в своём темпе, поэтому
+    время публикации определяется самым медленным приёмником, а не суммой всех.
+    Когда очередь какого-либо потребителя заполнена, производитель ждёт — в памяти
+    находится не больше `max_in_flight` неопубликованных пакетов на приёмник.
+
+    Потребитель должен перебрать переданный ему итератор до конца. При ошибке
+    любого участника остальные отменяются, а ошибка пробрасывается вызывающему.
+
+    :param batches: Пакеты для публикации (перебираются один раз).
+    :param consumers: Корутины-потребители, принимающие асинхронный итератор пакетов.
+    :param max_in_flight: Максимальное количество пакетов в очереди одного потребителя.
+    """
+    queues = [asyncio.Queue(maxsize=max_in_flight) for _ in consumers]
+
+    async def produce():
+        for batch in batches:
+            for queue in queues:
+                await queue.put(batch)
+        for queue in queues:
+            await queue.put(_DONE)
+
+    tasks = [asyncio.create_task(produce())]
+    tasks += [asyncio.create_task(consumer(_iterate(queue))) for consumer, queue in zip(consumers, queues)]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
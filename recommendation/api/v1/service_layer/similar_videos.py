@@ -1,45 +1,363 @@
+import asyncio
 import logging
-import orjson
-from recommendation.api.v1.adapters.dependencies import get_db
-from recommendation.api.v1.adapters.models import SimilarContentRecommendation, RecommendationResponse
-from recommendation.api.v1.service_layer.managers import create_async_cache_manager, create_async_database_manager
+from starlette.concurrency import run_in_threadpool
+
+from recommendation.api.v1.adapters.local_cache import LocalCache
+from recommendation.api.v1.adapters.models import VideoMetadata
+from recommendation.api.v1.adapters.recommendation_codec import (
+    ScoredRecommendations,
+    decode_scored_recommendations,
+    encode_recommendation_response,
+    encode_recommendations,
+)
+from recommendation.api.v1.adapters.recommendation_snapshot import RecommendationSnapshot
+from recommendation.api.v1.common.single_flight import SingleFlight
+from recommendation.api.v1.domain.recommendation_read_repository import RecommendationReadRepository
+from recommendation.api.v1.service_layer.manager_storage import CacheStorageManager
+from recommendation.api.v1.utils.similarity_recommendation.similarity_index import SparseSimilarityIndex
 from recommendation.config import settings
 
 logger = logging.getLogger(__name__)
 
-async def get_similar_videos(video_id: int) -> list[int] | None:
+# Значение в Redis для видео, рекомендаций для которого нет ни в кеше, ни в базе
+NOT_FOUND = encode_recommendations([])
+
+# Одновременные промахи кеша по одному video_id внутри процесса разделяют один запрос к БД
+_database_lookups = SingleFlight()
+
+def _current_snapshot(
+        snapshot: RecommendationSnapshot | None, local_cache: LocalCache | None
+) -> RecommendationSnapshot | None:
+    """
+    Возвращает снимок, если он записан с той публикацией, изменения которой учёл процесс.
+
+    Снимок записывается после публикации в Redis, поэтому какое-то время процесс может
+    видеть новую публикацию со старым снимком: изменённые ею видео тогда читаются из Redis.
+    Пока публикация не известна (Redis недоступен), снимок используется.
+
+    :param snapshot: Снимок рекомендаций последнего построения.
+    :param local_cache: Локальный кеш процесса с номером учтённой публикации.
+    :return: Снимок или None, если он относится к другой публикации.
+    """
+    if snapshot is None or local_cache is None or local_cache.revision is None:
+        return snapshot
+    return snapshot if snapshot.revision == local_cache.revision else None
+
+
+async def get_similar_videos(
+        video_id: int,
+        cache_manager: CacheStorageManager,
+        read_repository: RecommendationReadRepository,
+        local_cache: LocalCache | None = None,
+        limit: int | None = None,
+        offset: int = 0,
+        min_score: float | None = None,
+        snapshot: RecommendationSnapshot | None = None
+) -> ScoredRecommendations | None:
     """
     Получает похожие видео по `video_id`.
 
-    1. Проверяет кеш Redis.
-    2. Если данных нет, загружает их из базы данных.
-    3. Если данных нет в базе, возвращает None.
+    1. Проверяет локальный кеш процесса.
+    2. Если данных нет, ищет их в снимке последнего построения, отображённом в память.
+    3. Если данных нет, проверяет кеш Redis.
+    4. Если данных нет, загружает их из базы данных и записывает в Redis
+       (отсутствие данных запоминается на `negative_cache_ttl` секунд).
+    5. Если данных нет в базе, возвращает None.
+
+    Найденный в Redis или базе список сохраняется в локальный кеш целиком,
+    а вызывающему возвращается только запрошенный срез.
+    Одновременные промахи по одному `video_id` разделяют один запрос к базе.
 
     :param video_id: ID видео, для которого ищем рекомендации.
-    :return: Список ID похожих видео или None, если данных нет.
+    :param cache_manager: Менеджер кеша поверх общего клиента Redis приложения.
+    :param read_repository: Репозиторий чтения рекомендаций из базы данных.
+    :param local_cache: Локальный кеш процесса с уже десериализованными списками.
+    :param limit: Максимальное количество рекомендаций (None — все сохранённые).
+    :param offset: Сколько первых рекомендаций пропустить.
+    :param min_score: Минимальное сходство рекомендации.
+    :param snapshot: Снимок рекомендаций последнего построения.
+    :return: Срез рекомендаций со сходством или None, если данных нет.
     """
+    key = f'videos_id:{str(video_id)}'
+    snapshot = _current_snapshot(snapshot, local_cache)
 
-    # Создаём менеджер кэша Redis
-    cache_manager = await create_async_cache_manager(
-        host=settings.redis_host,
-        port=settings.redis_port,
-        new_db=settings.new_db,
-        old_db=settings.old_db
-    )
+    # Проверяем локальный кеш процесса
+    if local_cache is not None and (videos := local_cache.get(key)) is not None:
+        return videos.slice(limit, offset, min_score)
 
-    # Проверяем кэш в Redis
-    if videos := await cache_manager.get(f'videos_id:{str(video_id)}'):
-        logger.info(f"Данные из кэша: {videos}")
-        return orjson.loads(videos)  # Десериализуем JSON и возвращаем список
+    # Снимок уже в памяти, поэтому найденное в нём не дублируется в локальном кеше
+    if snapshot is not None and (videos := snapshot.get(video_id)) is not None and videos.ids:
+        return videos.slice(limit, offset, min_score)
 
-    # Если данных нет в кэше, создаём менеджер базы данных
-    db = await get_db()
-    database_service = await create_async_database_manager(db)
+    # Проверяем кэш в Redis
+    if videos := await cache_manager.get(key):
+        videos = decode_scored_recommendations(videos)
+        logger.info(f"Данные из кэша: {videos.ids}")
+    # Если данных нет в кэше, запрашиваем данные из БД
+    else:
+        videos = await _database_lookups.do(
+            video_id, lambda: _load_from_database(video_id, cache_manager, read_repository)
+        )
 
-    # Запрашиваем данные из БД
-    if videos := await database_service.get(SimilarContentRecommendation, video_id):
-        logger.info(f"Данные из БД: {videos.recommendation_id}")
-        return videos.recommendation_id  # Возвращаем список рекомендаций из ORM-модели
+    if videos and videos.ids:
+        if local_cache is not None:
+            local_cache.set(key, videos)
+        return videos.slice(limit, offset, min_score)
 
     # Если данных нет ни в кэше, ни в базе — возвращаем None
     return None
+
+
+async def get_recommendation_body(
+        video_id: int,
+        cache_manager: CacheStorageManager,
+        read_repository: RecommendationReadRepository,
+        local_cache: LocalCache | None = None,
+        snapshot: RecommendationSnapshot | None = None
+) -> bytes | None:
+    """
+    Получает готовое тело ответа с полным списком рекомендаций для `video_id`.
+
+    1. Проверяет локальный кеш процесса.
+    2. Если тела нет, собирает его из снимка последнего построения.
+    3. Если видео нет в снимке, читает тело, сохранённое в Redis при публикации построения.
+    4. Если его нет и там, собирает тело из рекомендаций (`get_similar_videos`).
+
+    Тело отдаётся клиенту как есть, без десериализации и повторной сериализации.
+
+    :param video_id: ID видео, для которого ищем рекомендации.
+    :param cache_manager: Менеджер кеша поверх общего клиента Redis приложения.
+    :param read_repository: Репозиторий чтения рекомендаций из базы данных.
+    :param local_cache: Локальный кеш процесса.
+    :param snapshot: Снимок рекомендаций последнего построения.
+    :return: Тело ответа в JSON или None, если рекомендаций нет.
+    """
+    key = f'videos_response:{str(video_id)}'
+    snapshot = _current_snapshot(snapshot, local_cache)
+    if local_cache is not None and (body := local_cache.get(key)) is not None:
+        return body
+
+    if snapshot is not None and (videos := snapshot.get(video_id)) is not None and videos.ids:
+        body = encode_recommendation_response(video_id, *videos)
+    elif not (body := await cache_manager.get(key)):
+        if not (videos := await get_similar_videos(video_id, cache_manager, read_repository, local_cache)):
+            return None
+        body = encode_recommendation_response(video_id, *videos)
+
+    if local_cache is not None:
+        local_cache.set(key, body)
+    return body
+
+
+def _cache_items(video_id: int, videos: ScoredRecommendations) -> dict[str, bytes]:
+    """
+    Собирает записи Redis для рекомендаций, прочитанных из базы данных или рассчитанных по запросу.
+
+    Записываются оба ключа, как при публикации построения: рекомендации в бинарном формате
+    и готовое тело ответа, чтобы следующие запросы не собирали тело заново.
+
+    :param video_id: ID видео.
+    :param videos: Рекомендации видео со сходством.
+    :return: Словарь ключ Redis -> значение.
+    """
+    return {
+        f'videos_id:{str(video_id)}': encode_recommendations(*videos),
+        f'videos_response:{str(video_id)}': encode_recommendation_response(video_id, *videos),
+    }
+
+
+async def _load_from_database(
+        video_id: int,
+        cache_manager: CacheStorageManager,
+        read_repository: RecommendationReadRepository
+) -> ScoredRecommendations | None:
+    """
+    Загружает рекомендации из базы данных и записывает результат в Redis (`_cache_items`).
+
+    :param video_id: ID видео, для которого ищем рекомендации.
+    :param cache_manager: Менеджер кеша поверх общего клиента Redis приложения.
+    :param read_repository: Репозиторий чтения рекомендаций из базы данных.
+    :return: Рекомендации со сходством или None, если данных нет.
+    """
+    key = f'videos_id:{str(video_id)}'
+    videos = None
+    if (row := await read_repository.get(video_id)) and row[0]:
+        logger.info(f"Данные из БД: {row[0]}")
+        videos = ScoredRecommendations(*row)
+
+    if videos:
+        await cache_manager.fill(_cache_items(video_id, videos), settings.cache_fill_ttl)
+    else:
+        await cache_manager.fill({key: NOT_FOUND}, settings.negative_cache_ttl)
+    return videos
+
+
+async def get_similar_videos_batch(
+        video_ids: list[int],
+        cache_manager: CacheStorageManager,
+        read_repository: RecommendationReadRepository,
+        local_cache: LocalCache | None = None,
+        snapshot: RecommendationSnapshot | None = None
+) -> dict[int, list[int]]:
+    """
+    Получает похожие видео сразу для нескольких `video_id`.
+
+    1. Берёт найденные списки из локального кеша процесса и снимка последнего построения.
+    2. Остальные запрашивает из Redis одной командой MGET.
+    3. Промахи Redis загружает из базы данных одним запросом `WHERE id = ANY(:ids)`
+       и записывает результат в Redis вместе с отметками об отсутствии данных.
+
+    :param video_ids: ID видео, для которых ищем рекомендации.
+    :param cache_manager: Менеджер кеша поверх общего клиента Redis приложения.
+    :param read_repository: Репозиторий чтения рекомендаций из базы данных.
+    :param local_cache: Локальный кеш процесса с уже десериализованными списками.
+    :param snapshot: Снимок рекомендаций последнего построения.
+    :return: Словарь ID видео -> список ID похожих видео; видео без рекомендаций в него не попадают.
+    """
+    videos = {}
+    missing = []
+    snapshot = _current_snapshot(snapshot, local_cache)
+    for video_id in dict.fromkeys(video_ids):
+        if local_cache is not None and (cached := local_cache.get(f'videos_id:{str(video_id)}')) is not None:
+            videos[video_id] = cached.ids
+        elif snapshot is not None and (cached := snapshot.get(video_id)) is not None and cached.ids:
+            videos[video_id] = cached.ids
+        else:
+            missing.append(video_id)
+
+    # Промахи локального кеша и снимка запрашиваем из Redis одним запросом
+    cache_misses = []
+    values = await cache_manager.mget([f'videos_id:{str(video_id)}' for video_id in missing])
+    for video_id, value in zip(missing, values):
+        if value is None:
+            cache_misses.append(video_id)
+        elif (value := decode_scored_recommendations(value)).ids:
+            videos[video_id] = value.ids
+            if local_cache is not None:
+                local_cache.set(f'videos_id:{str(video_id)}', value)
+
+    # Промахи Redis загружаем из БД одним запросом
+    if cache_misses:
+        rows = await read_repository.get_many(cache_misses)
+        found = {}
+        for video_id, row in rows.items():
+            if row[0]:
+                value = ScoredRecommendations(*row)
+                videos[video_id] = value.ids
+                found.update(_cache_items(video_id, value))
+                if local_cache is not None:
+                    local_cache.set(f'videos_id:{str(video_id)}', value)
+
+        await cache_manager.fill(found, settings.cache_fill_ttl)
+        await cache_manager.fill(
+            {f'videos_id:{str(video_id)}': NOT_FOUND for video_id in cache_misses if video_id not in videos},
+            settings.negative_cache_ttl
+        )
+
+    logger.info(f"Пакет рекомендаций: найдено {len(videos)}, запрошено из Redis {len(missing)}, "
+                f"из БД {len(cache_misses)}")
+    return videos
+
+
+async def get_similar_videos_by_metadata(
+        metadata: VideoMetadata,
+        index: SparseSimilarityIndex,
+        cache_manager: CacheStorageManager,
+        read_repository: RecommendationReadRepository,
+        local_cache: LocalCache | None = None,
+        snapshot: RecommendationSnapshot | None = None
+) -> list[int]:
+    """
+    Получает похожие видео по метаданным видео, для которого рекомендации ещё не рассчитаны.
+
+    1. Если рекомендации уже есть в кеше или базе данных, возвращает их.
+    2. Иначе считает топ-N по индексу сходства одним произведением разреженной матрицы на вектор.
+    3. Сохраняет результат в кеш Redis на время `cache_fill_ttl`, чтобы следующие запросы
+       обслуживались как обычно, а рекомендации следующего построения не перекрывались надолго.
+
+    :param metadata: Метаданные видео (id, title, description, categories, tags).
+    :param index: Индекс сходства, загруженный из состояния последнего построения.
+    :param cache_manager: Менеджер кеша поверх общего клиента Redis приложения.
+    :param read_repository: Репозиторий чтения рекомендаций из базы данных.
+    :param local_cache: Локальный кеш процесса с уже десериализованными списками.
+    :param snapshot: Снимок рекомендаций последнего построения.
+    :return: Список ID похожих видео (пустой, если похожих нет).
+    """
+    if videos := await get_similar_videos(
+            metadata.id, cache_manager, read_repository, local_cache, snapshot=snapshot
+    ):
+        return videos.ids
+
+    text = " ".join((metadata.title, metadata.description, metadata.categories, metadata.tags))
+    # Расчёт выполняется в пуле потоков, чтобы не блокировать цикл событий
+    videos = ScoredRecommendations(
+        *await run_in_threadpool(index.query_scored, text, settings.recommendation_top_n, metadata.id)
+    )
+    logger.info(f"Данные из индекса сходства: {videos.ids}")
+
+    if videos.ids:
+        await cache_manager.fill(_cache_items(metadata.id, videos), settings.cache_fill_ttl)
+        if local_cache is not None:
+            local_cache.set(f'videos_id:{str(metadata.id)}', videos)
+    return videos.ids
+
+
+async def watch_cache_generation(
+        local_cache: LocalCache,
+        cache_manager: CacheStorageManager,
+        interval: float,
+        snapshot: RecommendationSnapshot | None = None,
+        index: SparseSimilarityIndex | None = None
+) -> None:
+    """
+    Периодически сверяет публикации рекомендаций в Redis и обновляет локальный кеш.
+
+    При смене поколения построения локальный кеш сбрасывается целиком, а после частичной
+    публикации из него удаляются только изменённые ею видео (журнал `get_changes`).
+
+    Если передан снимок рекомендаций, после проверки Redis снимок переключается на новый файл.
+    Локальный кеш при этом сбрасывается, только если снимок записан не с той публикацией,
+    которую учёл процесс (например, Redis недоступен): изменения учтённой публикации
+    уже удалены из кеша по журналу.
+
+    Если передан индекс сходства, он перезагружается, когда построение делает опорным новое
+    состояние TF-IDF.
+
+    Работает до отмены задачи; ошибки связи с Redis, чтения снимка и индекса не прерывают цикл.
+
+    :param local_cache: Локальный кеш процесса.
+    :param cache_manager: Менеджер кеша поверх общего клиента Redis приложения.
+    :param interval: Пауза между проверками в секундах.
+    :param snapshot: Снимок рекомендаций последнего построения.
+    :param index: Индекс сходства для расчёта рекомендаций по запросу.
+    """
+    while True:
+        try:
+            generation, revision, changed_ids = await cache_manager.get_changes(local_cache.revision)
+            if local_cache.set_generation(generation):
+                logger.info(f"Локальный кеш сброшен, поколение построения: {generation}")
+            elif changed_ids is None:
+                local_cache.clear()
+                logger.info(f"Локальный кеш сброшен, публикация: {revision}")
+            elif changed_ids:
+                local_cache.discard(
+                    key for video_id in changed_ids
+                    for key in (f'videos_id:{str(video_id)}', f'videos_response:{str(video_id)}')
+                )
+                logger.info(f"Из локального кеша удалено видео: {len(changed_ids)}, публикация: {revision}")
+            local_cache.revision = revision
+        except Exception as e:
+            logger.warning(f"Не удалось получить публикации рекомендаций: {e}")
+        if snapshot is not None:
+            try:
+                if snapshot.reload() and snapshot.revision != local_cache.revision:
+                    local_cache.clear()
+            except Exception as e:
+                logger.warning(f"Не удалось загрузить снимок рекомендаций: {e}")
+        if index is not None:
+            try:
+                # Загрузка словаря и idf не должна блокировать цикл событий
+                await asyncio.to_thread(index.reload)
+            except Exception as e:
+                logger.warning(f"Не удалось загрузить индекс сходства: {e}")
+        await asyncio.sleep(interval)
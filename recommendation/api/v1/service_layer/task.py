@@ -1,73 +1,310 @@
+import fcntl
 import os
 import signal
 import traceback
+from contextlib import contextmanager
 
 from celery.utils.log import get_task_logger
 import asyncio
 
 from recommendation.api.v1.adapters.dependencies import get_db
+from recommendation.api.v1.adapters.models import engine as database_engine
+from recommendation.api.v1.adapters.recommendation_fingerprints import RecommendationFingerprints
+from recommendation.api.v1.adapters.recommendation_snapshot import write_snapshot
 from recommendation.api.v1.common.unit_of_work import AsyncUnitOfWork
 from recommendation.api.v1.service_layer.managers import create_async_database_manager, create_async_cache_manager
+from recommendation.api.v1.service_layer.publish_pipeline import publish_batches
 from recommendation.api.v1.task.worker import celery
 from recommendation.config import settings
 from recommendation.api.v1.utils.similarity_recommendation.recommendation_engine import RecommendationEnginePandas
+from recommendation.api.v1.utils.similarity_recommendation.recommendation_engine_ann import RecommendationEngineANN
+from recommendation.api.v1.utils.similarity_recommendation.recommendation_engine_incremental import (
+    RecommendationEngineIncremental
+)
 from recommendation.api.v1.utils.similarity_recommendation.recommendation_service import RecommendationService
+from recommendation.api.v1.utils.similarity_recommendation.tfidf_state import TfidfState
 
+logger = get_task_logger(__name__)
 
-async def async_save_to_db_and_cache(result):
+UPSERT_QUERY = """
+    INSERT INTO similar_recommendation (id, recommendation_id, recommendation_score) 
+    VALUES (:id, :recommended_ids, :scores) 
+    ON CONFLICT (id) DO UPDATE SET
+        recommendation_id = EXCLUDED.recommendation_id,
+        recommendation_score = EXCLUDED.recommendation_score;
+"""
+
+# Состояние построения записывается сюда и становится опорным только после успешной публикации
+STAGED_TFIDF_STATE = f"{settings.path_tfidf_state}.staged"
+# Построения идут в отдельных процессах и разделяют промежуточное и опорное состояние,
+# отпечатки и журнал публикаций, поэтому выполняются по одному
+BUILD_LOCK = f"{settings.path_tfidf_state}.lock"
+
+STAGING_TABLE = "similar_recommendation_staging"
+STAGING_COLUMNS = ["id", "recommendation_id", "recommendation_score"]
+
+# Таблица без журнала и индексов: COPY в неё не пишет WAL и не перестраивает индексы на каждую строку
+CREATE_STAGING_QUERIES = (
+    f"DROP TABLE IF EXISTS {STAGING_TABLE};",
+    f"CREATE UNLOGGED TABLE {STAGING_TABLE} (LIKE similar_recommendation INCLUDING DEFAULTS);",
+)
+
+# Индексы строятся один раз после загрузки; SET LOGGED записывает таблицу в WAL целиком,
+# чтобы после замены данные переживали сбой сервера
+PREPARE_STAGING_QUERIES = (
+    f"""
+    UPDATE {STAGING_TABLE} AS staging SET created_at = current.created_at
+    FROM similar_recommendation AS current WHERE current.id = staging.id;
+    """,
+    f"ALTER TABLE {STAGING_TABLE} ADD CONSTRAINT {STAGING_TABLE}_pkey PRIMARY KEY (id);",
+    f"CREATE INDEX ix_{STAGING_TABLE}_id ON {STAGING_TABLE} (id);",
+    f"ALTER TABLE {STAGING_TABLE} SET LOGGED;",
+)
+
+# Замена занимает эксклюзивную блокировку только до конца транзакции; последовательность id
+# переходит новой таблице, чтобы не удалиться вместе со старой
+SWAP_STAGING_QUERIES = (
+    f"ALTER SEQUENCE IF EXISTS similar_recommendation_id_seq OWNED BY {STAGING_TABLE}.id;",
+    "DROP TABLE similar_recommendation;",
+    f"ALTER TABLE {STAGING_TABLE} RENAME TO similar_recommendation;",
+    f"ALTER INDEX {STAGING_TABLE}_pkey RENAME TO similar_recommendation_pkey;",
+    f"ALTER INDEX ix_{STAGING_TABLE}_id RENAME TO ix_similar_recommendation_id;",
+)
+
+
+async def batch_records(batches):
+    """
+    Перебирает строки таблицы рекомендаций из пакетов по мере их поступления (для COPY).
+
+    :param batches: Асинхронный итератор пакетов `RecommendationResult`.
+    :return: Асинхронный итератор кортежей (id, recommendation_id, recommendation_score).
+    """
+    async for batch in batches:
+        for record in batch.records(batch_size=len(batch)):
+            yield record
+
+
+async def async_save_to_db_and_cache(result, deleted_ids=None) -> int | None:
     """
     Асинхронная функция для сохранения данных в базу данных и кэш.
+
+    Результат полного построения (`deleted_ids` равен None) при включённой настройке
+    `database_bulk_load` загружается командой COPY в промежуточную таблицу, которая
+    заменяет `similar_recommendation` переименованием в той же транзакции: читатели видят
+    либо старую таблицу, либо новую целиком. Видео, которых нет в новом построении,
+    удаляются из таблицы вместе со старой таблицей. Результат инкрементального построения
+    применяется пакетными upsert.
+
+    Запись в базу данных и в Redis идёт одновременно (`publish_batches`): каждый приёмник
+    читает общие пакеты из своей ограниченной очереди (`publish_max_in_flight_batches`).
+
+    При включённой настройке `publish_diff_enabled` построение сравнивается по отпечаткам
+    с последним опубликованным: публикуются только изменённые и новые строки, а удалённые
+    видео удаляются, как при инкрементальном построении. Если ничего не изменилось, ничего
+    не публикуется. Частичное построение не создаёт поколения Redis (`begin_update`):
+    перезаписываются ключи только изменённых видео и удаляются ключи удалённых, а процессы API
+    сбрасывают в локальных кешах только эти видео. Отпечатки сохраняются только после
+    успешной публикации.
+
+    :param result: Результат построения (`RecommendationResult`); пакеты для upsert и Redis —
+        срезы его массивов.
+    :param deleted_ids: Идентификаторы элементов, удалённых из каталога (инкрементальный режим).
+    :return: Номер публикации в Redis или None, если публиковать было нечего.
     """
-    db = await get_db()
-    try:
-        database_service = await create_async_database_manager(db)
-        cache_manager = await create_async_cache_manager(
-            host='redis',
-            port=6379,
-            new_db=0,
-            old_db=1
+    fingerprints = diff = None
+    if settings.publish_diff_enabled:
+        fingerprints = RecommendationFingerprints(settings.path_publish_fingerprints)
+        diff = fingerprints.diff(result, deleted_ids)
+        logger.info(
+            f"Публикация рекомендаций: изменено {diff.changed}, добавлено {diff.added}, "
+            f"удалено {diff.deleted}, без изменений {diff.unchanged}"
         )
+        if diff.empty:
+            return None
+        if diff.previous:
+            result, deleted_ids = result.take(diff.positions), diff.deleted_ids
+
+    db = await get_db()
+    database_service = await create_async_database_manager(db)
+    # Тот же Redis, из которого процессы API читают указатель поколения
+    cache_manager = await create_async_cache_manager(
+        host=settings.redis_host,
+        port=settings.redis_port,
+        db=settings.new_db,
+        generations_kept=settings.redis_generations_kept,
+        changes_kept=settings.redis_changes_kept
+    )
+
+    bulk_load = deleted_ids is None and settings.database_bulk_load
 
-        # Оборачиваем в UnitOfWork
-        async with AsyncUnitOfWork(database_service, cache_manager) as uow:
-            batch_gen = database_service.batch_generator(result, batch_size=1000)
-
-            for batch in batch_gen:
-                await database_service.bulk_update(
-                    query="""
-                        INSERT INTO similar_recommendation (id, recommendation_id) 
-                        VALUES (:id, :recommended_ids) 
-                        ON CONFLICT (id) DO UPDATE SET
-                            recommendation_id = EXCLUDED.recommendation_id;
-                    """,
-                    params=batch
-                )
+    # Оборачиваем в UnitOfWork
+    async with AsyncUnitOfWork(database_service, cache_manager) as uow:
+        # Полное построение пишется в новое поколение Redis, частичное — на место изменённых ключей
+        if deleted_ids is None:
+            await cache_manager.stage_generation()
+        else:
+            await cache_manager.begin_update()
+
+        if bulk_load:
+            for query in CREATE_STAGING_QUERIES:
+                await database_service.execute(query)
+
+        async def write_database(batches):
+            if bulk_load:
+                await database_service.copy_records(STAGING_TABLE, STAGING_COLUMNS, batch_records(batches))
+            else:
+                async for batch in batches:
+                    await database_service.bulk_update(query=UPSERT_QUERY, params=batch)
+
+        async def write_cache(batches):
+            async for batch in batches:
                 await cache_manager.bulk_set(batch)
 
-        #logger.info("Рекомендации успешно сохранены в БД и кэш.")
+        await publish_batches(
+            result.batches(settings.publish_batch_size),
+            [write_database, write_cache],
+            max_in_flight=settings.publish_max_in_flight_batches
+        )
 
-    except Exception as e:
-        #logger.error(f"Ошибка при сохранении данных в БД и кэш: {e}")
-        raise
+        if bulk_load:
+            for query in PREPARE_STAGING_QUERIES:
+                await database_service.execute(query)
+            # Замена выполняется последней, чтобы блокировка таблицы держалась до фиксации как можно меньше
+            for query in SWAP_STAGING_QUERIES:
+                await database_service.execute(query)
+
+        if deleted_ids is not None and len(deleted_ids):
+            ids = [int(video_id) for video_id in deleted_ids]
+            await database_service.bulk_delete(
+                query="DELETE FROM similar_recommendation WHERE id = ANY(:ids);",
+                ids=ids
+            )
+            await cache_manager.bulk_delete(ids)
 
+        # Поколение Redis и удаление ключей публикуются при фиксации, после транзакции базы данных:
+        # процессы API не должны заполнять кеш строками прежнего построения
 
-def generate_recommendation_task(file_name):
+    if fingerprints is not None:
+        fingerprints.save(diff)
+    return cache_manager.revision
+
+
+@contextmanager
+def build_lock(path: str = BUILD_LOCK):
+    """
+    Удерживает эксклюзивную блокировку файла на время построения и публикации.
+
+    Блокировку снимает ОС и при аварийном завершении процесса.
+
+    :param path: Путь к файлу блокировки.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def save_recommendation_snapshot(revision: int,
+                                 state_dir: str = settings.path_tfidf_state,
+                                 path: str = settings.path_recommendation_snapshot) -> None:
+    """
+    Записывает снимок рекомендаций для процессов API из состояния последнего построения.
+
+    Состояние содержит полные рекомендации каталога и после инкрементального построения,
+    поэтому снимок всегда полный. Процессы API переключаются на новый файл при следующей
+    проверке (`watch_cache_generation`).
+
+    :param revision: Номер публикации в Redis, с которой записывается снимок.
+    :param state_dir: Директория с состоянием последнего построения.
+    :param path: Путь к файлу снимка.
+    """
+    state = TfidfState.load(state_dir, mmap_mode="r")
+    write_snapshot(path, state.ids, state.neighbour_ids, state.scores, revision)
+
+
+def create_recommendation_engine(path: str, top_n: int = settings.recommendation_top_n, delta: bool = False) -> RecommendationEnginePandas:
+    """
+    Создаёт движок рекомендаций, выбранный в настройках (`recommendation_engine`).
+
+    Движок записывает состояние построения в `STAGED_TFIDF_STATE`; опорным для следующей
+    дельты оно становится в `generate_recommendation_task` после успешной публикации.
+
+    :param path: Путь к файлу с данными.
+    :param top_n: Количество рекомендаций для каждого элемента.
+    :param delta: Файл содержит дельту каталога, а не весь каталог.
+    :return: Точный (`RecommendationEnginePandas`), приближённый (`RecommendationEngineANN`)
+        или инкрементальный (`RecommendationEngineIncremental`) движок.
+    """
+    if delta:
+        return RecommendationEngineIncremental(
+            path, top_n,
+            state_dir=settings.path_tfidf_state,
+            block_size=settings.similarity_block_size,
+            staged_state_dir=STAGED_TFIDF_STATE
+        )
+    if settings.recommendation_engine == "ann":
+        return RecommendationEngineANN(
+            path, top_n,
+            block_size=settings.similarity_block_size,
+            state_dir=STAGED_TFIDF_STATE,
+            artifact_dir=settings.path_tfidf_artifacts,
+            chunk_size=settings.ingestion_chunk_size or None,
+            hashing_n_features=settings.hashing_n_features,
+            n_components=settings.ann_n_components,
+            n_lists=settings.ann_n_lists or None,
+            n_probe=settings.ann_n_probe
+        )
+    return RecommendationEnginePandas(
+        path, top_n,
+        block_size=settings.similarity_block_size,
+        state_dir=STAGED_TFIDF_STATE,
+        workers=settings.similarity_workers,
+        artifact_dir=settings.path_tfidf_artifacts,
+        chunk_size=settings.ingestion_chunk_size or None,
+        hashing_n_features=settings.hashing_n_features
+    )
+
+
+def generate_recommendation_task(file_name, delta=False):
     """
     Синхронная Celery-таска:
     1. Генерирует рекомендации (синхронно).
-    2. Вызывает асинхронную функцию для сохранения в БД и кэш.
+    2. Вызывает асинхронную функцию для сохранения в БД и кэш и после успешного сохранения
+       делает состояние построения опорным.
+    3. Записывает снимок рекомендаций для процессов API (`recommendation_snapshot_enabled`).
+
+    Шаги выполняются под `build_lock`: следующее построение ждёт, пока предыдущее
+    не опубликует рекомендации и не сделает своё состояние опорным.
+
+    Если `delta` истинно, файл считается дельтой каталога и пересчитываются только затронутые элементы.
     """
     loop = None
     try:
-        # 1. Генерация рекомендаций (синхронно)
-        engine = RecommendationEnginePandas(str(os.path.join(settings.path_uploaded_data_file,file_name)), 20)
-        service = RecommendationService(engine)
-        result = service.generate_recommendations()
-
-        # 2. Запускаем асинхронное сохранение в фоне с использованием уже активного event loop
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(async_save_to_db_and_cache(result))
+        with build_lock():
+            # 1. Генерация рекомендаций (синхронно)
+            engine = create_recommendation_engine(
+                str(os.path.join(settings.path_uploaded_data_file, file_name)), delta=delta
+            )
+            service = RecommendationService(engine)
+            result = service.generate_recommendations()
+
+            # 2. Запускаем асинхронное сохранение в фоне с использованием уже активного event loop.
+            # Пул соединений Postgres унаследован от процесса API при fork: не закрывая чужие
+            # соединения, отбрасываем их, чтобы процесс открыл собственные
+            database_engine.sync_engine.dispose(close=False)
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            revision = loop.run_until_complete(async_save_to_db_and_cache(result, getattr(engine, "deleted_ids", None)))
+            # Состояние построения становится опорным для следующей дельты только после публикации
+            TfidfState.promote(STAGED_TFIDF_STATE, settings.path_tfidf_state)
+
+            # 3. Снимок пишется после успешного сохранения, чтобы не опережать базу данных;
+            # если рекомендации не изменились, прежний снимок остаётся актуальным
+            if settings.recommendation_snapshot_enabled and revision is not None:
+                save_recommendation_snapshot(revision)
     except Exception as e:
         with open("error.txt", "w") as f:
             f.write(traceback.format_exc())  # Записываем ошибку в файл
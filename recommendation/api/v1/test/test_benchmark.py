@@ -0,0 +1,48 @@
+import json
+
+from recommendation.api.v1.benchmark.catalog_generator import generate_catalog
+from recommendation.api.v1.benchmark.engine_benchmark import STAGES, main
+
+
+def test_generate_catalog():
+    """
+    Тестирует генератор синтетического каталога: колонки, уникальность id и воспроизводимость.
+    """
+    catalog = generate_catalog(200, vocabulary_size=500, num_tags=50, seed=1)
+
+    assert list(catalog.columns) == ["id", "title", "description", "categories", "tags"]
+    assert catalog["id"].is_unique
+    assert catalog.equals(generate_catalog(200, vocabulary_size=500, num_tags=50, seed=1))
+
+
+def test_benchmark_report(tmp_path):
+    """
+    Тестирует, что бенчмарк пишет JSON-отчёт со всеми стадиями для каждого размера.
+    """
+    output = tmp_path / "bench.json"
+
+    main(["--sizes", "100", "200", "--top-n", "5", "--block-size", "64", "--output", str(output)])
+
+    report = json.loads(output.read_text(encoding="utf-8"))
+    assert report["meta"]["top_n"] == 5
+    assert [result["rows"] for result in report["results"]] == [100, 200]
+    for result in report["results"]:
+        assert list(result["stages"]) == STAGES
+        assert all(stage["seconds"] >= 0 and stage["peak_rss_mb"] > 0 for stage in result["stages"].values())
+
+
+def test_benchmark_ann_report(tmp_path):
+    """
+    Тестирует режим ann: отчёт содержит recall@top_n, время построения и оценку точного расчёта.
+    """
+    output = tmp_path / "bench.json"
+
+    main(["--mode", "ann", "--sizes", "200", "--top-n", "5", "--sample-size", "20",
+          "--n-components", "8", "--n-lists", "4", "--n-probe", "2", "--output", str(output)])
+
+    report = json.loads(output.read_text(encoding="utf-8"))
+    assert report["meta"]["mode"] == "ann"
+    (result,) = report["results"]
+    assert result["rows"] == 200 and result["sample_size"] == 20 and result["n_lists"] == 4
+    assert 0.0 <= result["recall@5"] <= 1.0
+    assert result["ann_build_seconds"] >= 0 and result["exact_seconds_estimate"] >= 0
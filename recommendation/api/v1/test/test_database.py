@@ -1,4 +1,4 @@
-from unittest.mock import MagicMock, ANY
+from unittest.mock import AsyncMock, MagicMock, ANY
 import pytest
 from sqlalchemy.orm import Session
 
@@ -86,3 +86,25 @@ def test_bulk_update_rollback_on_error(mock_session):
 
     # Проверяем, что метод вернул словарь с ошибкой
     assert result == {"error": "DB Error"}
+
+
+@pytest.mark.asyncio
+async def test_copy_records_uses_session_connection():
+    """
+    Проверяет, что SQLAlchemyRepository.copy_records() загружает строки через COPY
+    на соединении asyncpg той же сессии (в той же транзакции).
+    """
+    driver_connection = MagicMock()
+    driver_connection.copy_records_to_table = AsyncMock()
+    connection = MagicMock()
+    connection.get_raw_connection = AsyncMock(return_value=MagicMock(driver_connection=driver_connection))
+    session = MagicMock()
+    session.connection = AsyncMock(return_value=connection)
+    records = [(1, [2, 3], [0.5, 0.25])]
+
+    await SQLAlchemyRepository(session).copy_records("staging", ["id", "recommendation_id", "recommendation_score"],
+                                                      records)
+
+    driver_connection.copy_records_to_table.assert_awaited_once_with(
+        "staging", records=records, columns=["id", "recommendation_id", "recommendation_score"]
+    )
@@ -0,0 +1,49 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from recommendation.api.v1.adapters.database_asyncpg import AsyncpgRecommendationRepository
+
+
+@pytest.fixture
+def connection():
+    """
+    Фикстура для мокированного соединения asyncpg.
+    """
+    return MagicMock()
+
+
+@pytest.fixture
+def repository(connection):
+    """
+    Фикстура репозитория поверх мокированного пула, выдающего одно соединение.
+    """
+    pool = MagicMock()
+    pool.acquire.return_value.__aenter__ = AsyncMock(return_value=connection)
+    pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+    pool.close = AsyncMock()
+    return AsyncpgRecommendationRepository(pool)
+
+
+@pytest.mark.asyncio
+async def test_get(repository, connection):
+    """
+    Проверяет, что get выполняет параметризованный запрос и возвращает рекомендации со сходством.
+    """
+    connection.fetchrow = AsyncMock(side_effect=[([2, 3], [0.5, 0.25]), None])
+
+    assert await repository.get(1) == ([2, 3], [0.5, 0.25])
+    assert await repository.get(9) is None
+    connection.fetchrow.assert_awaited_with(AsyncpgRecommendationRepository.GET_QUERY, 9)
+
+
+@pytest.mark.asyncio
+async def test_get_many(repository, connection):
+    """
+    Проверяет, что get_many делает один запрос на все ID и не обращается к базе без ID.
+    """
+    connection.fetch = AsyncMock(return_value=[(5, [6, 7], [0.5, 0.25])])
+
+    assert await repository.get_many([5, 9]) == {5: ([6, 7], [0.5, 0.25])}
+    assert await repository.get_many([]) == {}
+    connection.fetch.assert_awaited_once_with(AsyncpgRecommendationRepository.GET_MANY_QUERY, [5, 9])
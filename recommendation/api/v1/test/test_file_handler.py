@@ -2,7 +2,8 @@ import pytest
 from unittest.mock import patch, AsyncMock
 from fastapi import UploadFile
 from io import BytesIO
-from recommendation.api.v1.service_layer.file_storage.file_saver import FileHandlerCSV
+from recommendation.api.v1.service_layer.file_storage.factory_saver_upload_file import FileSaverFactory
+from recommendation.api.v1.service_layer.file_storage.file_saver import FileHandlerCSV, FileHandlerParquet
 
 
 
@@ -60,3 +61,14 @@ async def test_save_file_failure():
 
         with pytest.raises(RuntimeError, match="Ошибка при сохранении файла: Ошибка записи"):
             await file_handler.save_file()
+
+def test_factory_selects_saver_by_extension():
+    upload_file = UploadFile(file=BytesIO(b"data"), filename="dataset.parquet")
+
+    with patch("os.makedirs"):
+        saver = FileSaverFactory.get_saver(upload_file, "/path/to/save")
+
+    assert isinstance(saver, FileHandlerParquet)
+
+    with pytest.raises(ValueError, match="Формат файла не поддерживается."):
+        FileSaverFactory.get_saver(UploadFile(file=BytesIO(b"data"), filename="dataset.txt"), "/path/to/save")
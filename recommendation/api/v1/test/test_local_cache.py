@@ -0,0 +1,45 @@
+from recommendation.api.v1.adapters.local_cache import LocalCache
+
+
+def test_lru_eviction():
+    """
+    Тестирует вытеснение давно не использованных записей при переполнении.
+    """
+    cache = LocalCache(max_size=2, ttl=60)
+    cache.set("a", [1])
+    cache.set("b", [2])
+    cache.get("a")
+    cache.set("c", [3])
+
+    assert cache.get("a") == [1]
+    assert cache.get("b") is None
+    assert cache.get("c") == [3]
+
+
+def test_ttl_expiration(mocker):
+    """
+    Тестирует, что запись с истёкшим временем жизни не возвращается и удаляется.
+    """
+    monotonic = mocker.patch("recommendation.api.v1.adapters.local_cache.time.monotonic", return_value=100.0)
+    cache = LocalCache(max_size=10, ttl=5)
+    cache.set("a", [1])
+
+    monotonic.return_value = 104.0
+    assert cache.get("a") == [1]
+    monotonic.return_value = 105.0
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_generation_change_clears_cache():
+    """
+    Тестирует сброс кеша при смене поколения построения и сохранение записей при том же поколении.
+    """
+    cache = LocalCache(max_size=10, ttl=60)
+    assert cache.set_generation(1)
+    cache.set("a", [1])
+
+    assert not cache.set_generation(1)
+    assert cache.get("a") == [1]
+    assert cache.set_generation(2)
+    assert cache.get("a") is None
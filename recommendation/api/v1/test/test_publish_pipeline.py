@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from recommendation.api.v1.service_layer.publish_pipeline import publish_batches
+
+
+@pytest.mark.asyncio
+async def test_consumers_receive_all_batches_concurrently():
+    """
+    Тестирует, что все приёмники получают все пакеты по порядку и пишут их одновременно.
+    """
+    received = {"database": [], "cache": []}
+
+    def make_consumer(name, delay):
+        async def consume(batches):
+            async for batch in batches:
+                await asyncio.sleep(delay)
+                received[name].append(batch)
+        return consume
+
+    loop = asyncio.get_running_loop()
+    begin = loop.time()
+    await publish_batches(range(5), [make_consumer("database", 0.02), make_consumer("cache", 0.02)], max_in_flight=2)
+
+    assert received == {"database": [0, 1, 2, 3, 4], "cache": [0, 1, 2, 3, 4]}
+    # Приёмники работают параллельно: время ближе к одному приёмнику, чем к сумме
+    assert loop.time() - begin < 0.18
+
+
+@pytest.mark.asyncio
+async def test_producer_waits_for_slow_consumer():
+    """
+    Тестирует, что производитель не опережает медленный приёмник больше чем на `max_in_flight` пакетов.
+    """
+    produced = []
+    consumed = []
+
+    def batches():
+        for batch in range(10):
+            produced.append(batch)
+            yield batch
+
+    async def slow(items):
+        async for batch in items:
+            # Взятый из очереди пакет и пакет, ожидающий места в очереди, тоже в пути
+            assert len(produced) - len(consumed) <= 2 + 2
+            await asyncio.sleep(0.001)
+            consumed.append(batch)
+
+    async def fast(items):
+        async for _ in items:
+            pass
+
+    await publish_batches(batches(), [slow, fast], max_in_flight=2)
+
+    assert consumed == list(range(10))
+
+
+@pytest.mark.asyncio
+async def test_consumer_error_cancels_pipeline():
+    """
+    Тестирует, что ошибка приёмника отменяет остальных участников и пробрасывается.
+    """
+    cancelled = asyncio.Event()
+
+    async def failing(batches):
+        async for _ in batches:
+            raise RuntimeError("redis unavailable")
+
+    async def blocked(batches):
+        try:
+            async for _ in batches:
+                await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(RuntimeError, match="redis unavailable"):
+        await publish_batches(range(100), [failing, blocked], max_in_flight=1)
+    assert cancelled.is_set()
@@ -0,0 +1,54 @@
+import numpy as np
+import orjson
+import pytest
+
+from recommendation.api.v1.adapters.recommendation_codec import (
+    FORMAT_INT32_V1,
+    FORMAT_SCORED_V2,
+    decode_recommendations,
+    decode_scored_recommendations,
+    encode_recommendations,
+)
+
+
+def test_binary_round_trip():
+    """
+    Тестирует кодирование в бинарный формат int32 и обратное декодирование, в том числе из массива numpy.
+    """
+    value = encode_recommendations(np.array([5, 1, 2_000_000_000], dtype=np.int64))
+
+    assert value.startswith(FORMAT_INT32_V1)
+    assert len(value) == len(FORMAT_INT32_V1) + 3 * 4
+    assert decode_recommendations(value) == [5, 1, 2_000_000_000]
+    assert decode_recommendations(encode_recommendations([])) == []
+
+
+def test_decode_legacy_json():
+    """
+    Тестирует чтение значений, записанных в Redis в формате JSON до перехода на бинарный формат.
+    """
+    assert decode_recommendations(orjson.dumps([3, 4])) == [3, 4]
+    assert decode_recommendations("[3, 4]") == [3, 4]
+
+
+def test_encode_rejects_out_of_range_ids():
+    """
+    Тестирует, что идентификатор вне диапазона int32 не кодируется с переполнением.
+    """
+    with pytest.raises(ValueError):
+        encode_recommendations([2 ** 31])
+
+
+def test_scored_round_trip_and_slice():
+    """
+    Тестирует формат со сходством и выбор среза по limit, offset и min_score.
+    """
+    value = encode_recommendations([3, 4, 5], [0.9, 0.5, 0.1])
+
+    assert value.startswith(FORMAT_SCORED_V2)
+    recommendations = decode_scored_recommendations(value)
+    assert recommendations.ids == [3, 4, 5]
+    assert recommendations.scores == pytest.approx([0.9, 0.5, 0.1])
+    assert recommendations.slice(limit=1, offset=1).ids == [4]
+    assert recommendations.slice(min_score=0.5).ids == [3, 4]
+    assert decode_scored_recommendations(encode_recommendations([3])).scores is None
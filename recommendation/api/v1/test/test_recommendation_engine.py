@@ -4,6 +4,7 @@ import numpy as np
 from recommendation.api.v1.utils.similarity_recommendation.recommendation_engine import (
     RecommendationEnginePandas,
 )
+from recommendation.api.v1.utils.similarity_recommendation.recommendation_result import RecommendationResult
 
 
 @pytest.fixture
@@ -110,24 +111,156 @@ def test_get_top_recommendations_from_matrix(recommendation_engine, sample_data)
     recommendations_df = recommendation_engine._get_top_recommendations_from_matrix(
         similarity_matrix, df, top_n=2
     )
-    assert isinstance(recommendations_df, pd.DataFrame)
+    assert isinstance(recommendations_df, RecommendationResult)
     assert len(recommendations_df) == 3
-    assert all(
-        len(recommendations_df.loc[i, "recommended_ids"]) == 2
-        for i in range(len(recommendations_df))
-    )
+    assert all(len(recommended_ids) == 2 for _, recommended_ids, _ in recommendations_df.rows())
 
 
 def test_generate_recommendations(recommendation_engine):
     """
     Тестирует генерацию рекомендаций.
 
-    Проверяет, что метод generate_recommendations возвращает корректный DataFrame.
+    Проверяет, что метод generate_recommendations возвращает корректный результат.
     """
     recommendations_df = recommendation_engine.generate_recommendations()
-    assert isinstance(recommendations_df, pd.DataFrame)
+    assert isinstance(recommendations_df, RecommendationResult)
     assert len(recommendations_df) == 3
-    assert all(
-        len(recommendations_df.loc[i, "recommended_ids"]) == 2
-        for i in range(len(recommendations_df))
+    assert all(len(recommended_ids) == 2 for _, recommended_ids, _ in recommendations_df.rows())
+    # Сходство сохраняется вместе с рекомендациями и отсортировано по убыванию
+    assert all(np.all(np.diff(scores) <= 0) for _, _, scores in recommendations_df.rows())
+
+
+def test_generate_recommendations_blocked(tmp_path, sample_data):
+    """
+    Тестирует поблочный расчёт рекомендаций.
+
+    Проверяет, что результат совпадает с расчётом по полной матрице сходства
+    и что элемент не рекомендуется сам себе.
+    """
+    path = tmp_path / "test_data.csv"
+    sample_data.to_csv(path, index=False)
+
+    full_df = RecommendationEnginePandas(str(path), top_n=2).generate_recommendations()
+    blocked_df = RecommendationEnginePandas(str(path), top_n=2, block_size=2).generate_recommendations()
+
+    assert blocked_df.ids.tolist() == full_df.ids.tolist()
+    for item_id, recommended_ids, _ in blocked_df.rows():
+        assert len(recommended_ids) == 2
+        assert item_id not in recommended_ids
+
+
+def test_select_top_n_excludes_item_by_index():
+    """
+    Тестирует векторный выбор топ-N соседей.
+
+    Проверяет, что при дубликатах (одинаковое сходство 1.0) исключается именно сам
+    элемент, а соседи отсортированы по убыванию сходства.
+    """
+    similarity_matrix = np.array([
+        [1.0, 1.0, 0.2],
+        [1.0, 1.0, 0.5],
+        [0.2, 0.5, 1.0],
+    ])
+    positions = RecommendationEnginePandas._select_top_n(similarity_matrix, np.arange(3), top_n=2)
+
+    assert positions.tolist() == [[1, 2], [0, 2], [1, 0]]
+
+
+def test_generate_recommendations_parallel(tmp_path):
+    """
+    Тестирует параллельный расчёт рекомендаций в пуле процессов.
+
+    Проверяет, что результат совпадает с последовательным поблочным расчётом.
+    """
+    topics = ["python coding", "football match", "cooking pasta", "space rocket"]
+    data = pd.DataFrame({
+        "id": range(1, 31),
+        "title": [f"{topics[i % 4]} video{i}" for i in range(30)],
+        "description": [f"{topics[i % 4]} part{i % 7}" for i in range(30)],
+        "categories": [topics[i % 4].split()[0] for i in range(30)],
+        "tags": [f"tag{i % 5}" for i in range(30)],
+    })
+    path = tmp_path / "test_data.csv"
+    data.to_csv(path, index=False)
+
+    serial_engine = RecommendationEnginePandas(str(path), top_n=3, block_size=4)
+    parallel_engine = RecommendationEnginePandas(str(path), top_n=3, block_size=4, workers=2)
+    serial_df = serial_engine.generate_recommendations()
+    parallel_df = parallel_engine.generate_recommendations()
+
+    assert parallel_df.ids.tolist() == serial_df.ids.tolist()
+    assert parallel_df.neighbour_ids.tolist() == serial_df.neighbour_ids.tolist()
+
+
+def test_generate_recommendations_reuses_artifact(tmp_path, sample_data, mocker):
+    """
+    Тестирует переиспользование сохранённого артефакта векторизации.
+
+    Проверяет, что при неизменном датасете повторное построение не читает CSV,
+    а результат совпадает с первым построением.
+    """
+    path = tmp_path / "test_data.csv"
+    sample_data.to_csv(path, index=False)
+    artifact_dir = str(tmp_path / "artifacts")
+
+    first_df = RecommendationEnginePandas(str(path), top_n=2, artifact_dir=artifact_dir).generate_recommendations()
+
+    engine = RecommendationEnginePandas(str(path), top_n=2, artifact_dir=artifact_dir)
+    upload_spy = mocker.spy(engine, "_upload_data")
+    second_df = engine.generate_recommendations()
+
+    upload_spy.assert_not_called()
+    assert second_df.neighbour_ids.tolist() == first_df.neighbour_ids.tolist()
+
+
+def test_streaming_vectorization_matches_vocabulary(tmp_path):
+    """
+    Тестирует потоковую векторизацию частями с хешированием терминов.
+
+    Проверяет, что косинусное сходство совпадает с векторизацией всего файла
+    через `TfidfVectorizer`.
+    """
+    data = pd.DataFrame({
+        "id": range(1, 11),
+        "title": [f"video number{i} about topic{i % 3}" for i in range(10)],
+        "description": [f"description{i % 4} of topic{i % 3}" for i in range(10)],
+        "categories": [f"category{i % 2}" for i in range(10)],
+        "tags": [None if i == 5 else f"tag{i % 5}" for i in range(10)],
+    })
+    path = tmp_path / "test_data.csv"
+    data.to_csv(path, index=False)
+
+    full = RecommendationEnginePandas(str(path), top_n=3)._load_vectorized()
+    streaming = RecommendationEnginePandas(str(path), top_n=3, chunk_size=3)._load_vectorized()
+
+    assert streaming.ids.tolist() == full.ids.tolist()
+    np.testing.assert_allclose(
+        (streaming.tfidf_matrix @ streaming.tfidf_matrix.T).toarray(),
+        (full.tfidf_matrix @ full.tfidf_matrix.T).toarray(),
     )
+
+
+@pytest.mark.parametrize("extension", [".parquet", ".arrow"])
+def test_upload_columnar_data(tmp_path, sample_data, extension):
+    """
+    Тестирует загрузку данных из Parquet и Arrow IPC.
+
+    Проверяет, что лишние колонки не загружаются, а данные совпадают с исходными
+    как при полной загрузке, так и при чтении частями.
+    """
+    path = str(tmp_path / f"test_data{extension}")
+    data = sample_data.assign(views=[10, 20, 30])
+    if extension == ".parquet":
+        data.to_parquet(path, index=False)
+    else:
+        data.to_feather(path)
+
+    engine = RecommendationEnginePandas(path, top_n=2, chunk_size=2)
+    df = engine._upload_data()
+    chunks = list(engine._iter_chunks())
+
+    assert list(df.columns) == list(sample_data.columns)
+    assert df["id"].tolist() == sample_data["id"].tolist()
+    assert sum(len(chunk) for chunk in chunks) == 3
+    assert all("views" not in chunk.columns for chunk in chunks)
+    assert len(engine.generate_recommendations()) == 3
@@ -0,0 +1,67 @@
+import pytest
+import pandas as pd
+import numpy as np
+from recommendation.api.v1.utils.similarity_recommendation.recommendation_engine_ann import (
+    RecommendationEngineANN,
+    recall_at_top_n,
+)
+
+
+@pytest.fixture
+def catalog_path(tmp_path):
+    """
+    Фикстура, сохраняющая небольшой каталог с несколькими тематическими группами.
+
+    Returns:
+        str: Путь к CSV-файлу.
+    """
+    topics = ["python coding", "football match", "cooking pasta", "space rocket"]
+    rows = []
+    for i in range(60):
+        topic = topics[i % len(topics)]
+        rows.append({
+            "id": i + 1,
+            "title": f"{topic} video {i}",
+            "description": f"about {topic} part {i % 7}",
+            "categories": topic.split()[0],
+            "tags": f"{topic} tag{i % 5}",
+        })
+    path = tmp_path / "catalog.csv"
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return str(path)
+
+
+def test_generate_recommendations_ann(catalog_path):
+    """
+    Тестирует генерацию приближённых рекомендаций.
+
+    Проверяет, что каждый элемент получает top_n соседей без самого себя.
+    """
+    engine = RecommendationEngineANN(catalog_path, top_n=5, n_components=8, n_lists=4, n_probe=2)
+    recommendations_df = engine.generate_recommendations()
+
+    assert len(recommendations_df) == 60
+    for item_id, recommended_ids, _ in recommendations_df.rows():
+        assert len(recommended_ids) == 5
+        assert item_id not in recommended_ids
+
+
+def test_recall_report(catalog_path):
+    """
+    Тестирует отчёт recall@top_n относительно точного поиска.
+    """
+    engine = RecommendationEngineANN(catalog_path, top_n=5, n_components=8, n_lists=4, n_probe=4)
+    report = engine.recall_report(sample_size=20)
+
+    assert report["sample_size"] == 20
+    assert report["n_lists"] == 4
+    assert 0.0 <= report["recall@5"] <= 1.0
+
+
+def test_recall_at_top_n():
+    """
+    Тестирует расчёт recall@top_n.
+    """
+    exact = np.array([[1, 2], [3, 4]])
+    approx = np.array([[2, 1], [3, 5]])
+    assert recall_at_top_n(exact, approx) == 0.75
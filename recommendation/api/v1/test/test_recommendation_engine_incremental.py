@@ -0,0 +1,100 @@
+import pytest
+import pandas as pd
+import numpy as np
+from recommendation.api.v1.utils.similarity_recommendation.recommendation_engine import RecommendationEnginePandas
+from recommendation.api.v1.utils.similarity_recommendation.recommendation_engine_incremental import (
+    RecommendationEngineIncremental,
+)
+from recommendation.api.v1.utils.similarity_recommendation.tfidf_state import TfidfState
+
+
+def make_rows(ids, topic_offset=0):
+    """
+    Создаёт строки каталога с несколькими тематическими группами.
+    """
+    topics = ["python coding", "football match", "cooking pasta", "space rocket", "jazz guitar"]
+    return [
+        {
+            "id": i,
+            "title": f"{topics[(i + topic_offset) % len(topics)]} episode{i % 11}",
+            "description": f"{topics[(i + topic_offset) % len(topics)]} part{i % 7} note{i % 3}",
+            "categories": topics[(i + topic_offset) % len(topics)].split()[0],
+            "tags": f"tag{i % 13}",
+        }
+        for i in ids
+    ]
+
+
+@pytest.fixture
+def built_state(tmp_path):
+    """
+    Фикстура, выполняющая полное построение с сохранением состояния.
+
+    Returns:
+        tuple[str, str]: Директория состояния и временная директория.
+    """
+    path = tmp_path / "catalog.csv"
+    pd.DataFrame(make_rows(range(1, 41))).to_csv(path, index=False)
+    state_dir = str(tmp_path / "state")
+    RecommendationEnginePandas(str(path), top_n=5, block_size=8, state_dir=state_dir).generate_recommendations()
+    return state_dir, tmp_path
+
+
+def test_incremental_matches_full_recompute(built_state):
+    """
+    Тестирует применение дельты.
+
+    Проверяет, что после добавления, изменения и удаления элементов сохранённые
+    топ-N совпадают с полным пересчётом по обновлённой TF-IDF матрице,
+    а возвращаются только затронутые элементы.
+    """
+    state_dir, tmp_path = built_state
+    delta = pd.DataFrame(make_rows([3, 41, 42], topic_offset=2) + make_rows([7]))
+    delta["action"] = ["update", "add", "add", "delete"]
+    delta_path = tmp_path / "delta.csv"
+    delta.to_csv(delta_path, index=False)
+
+    engine = RecommendationEngineIncremental(str(delta_path), top_n=5, state_dir=state_dir, block_size=8)
+    recommendations_df = engine.generate_recommendations()
+
+    state = TfidfState.load(state_dir)
+    assert 7 not in state.ids
+    assert {3, 41, 42} <= set(recommendations_df.ids.tolist())
+    assert len(recommendations_df) < len(state.ids)
+    assert engine.deleted_ids.tolist() == [7]
+
+    _, expected_scores = RecommendationEnginePandas._calculate_top_n(
+        state.tfidf_matrix, np.arange(len(state.ids)), top_n=5
+    )
+    np.testing.assert_allclose(state.scores, expected_scores)
+    assert not np.isin(state.neighbour_ids, [7]).any()
+
+
+def test_incremental_requires_state(tmp_path):
+    """
+    Тестирует, что дельта без сохранённого состояния не применяется.
+    """
+    delta_path = tmp_path / "delta.csv"
+    pd.DataFrame(make_rows([1])).to_csv(delta_path, index=False)
+    engine = RecommendationEngineIncremental(str(delta_path), top_n=5, state_dir=str(tmp_path / "missing"))
+    with pytest.raises(FileNotFoundError):
+        engine.generate_recommendations()
+
+
+def test_incremental_stages_state_until_promoted(built_state):
+    """
+    Тестирует, что при заданной `staged_state_dir` опорное состояние не меняется,
+    пока новое не станет опорным после публикации.
+    """
+    state_dir, tmp_path = built_state
+    delta_path = tmp_path / "delta.csv"
+    pd.DataFrame(make_rows([41], topic_offset=1)).to_csv(delta_path, index=False)
+    staged_dir = str(tmp_path / "state.staged")
+
+    RecommendationEngineIncremental(
+        str(delta_path), top_n=5, state_dir=state_dir, block_size=8, staged_state_dir=staged_dir
+    ).generate_recommendations()
+
+    assert 41 not in TfidfState.load(state_dir).ids
+    TfidfState.promote(staged_dir, state_dir)
+    assert 41 in TfidfState.load(state_dir).ids
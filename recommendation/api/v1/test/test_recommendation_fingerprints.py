@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from recommendation.api.v1.adapters.recommendation_fingerprints import RecommendationFingerprints, fingerprint_rows
+from recommendation.api.v1.utils.similarity_recommendation.recommendation_result import RecommendationResult
+
+
+def build(rows):
+    """Результат построения из словаря {id: [рекомендации]} со сходством 0.5."""
+    ids = np.array(list(rows))
+    return RecommendationResult.from_matrix(ids, np.array(list(rows.values())), np.full((len(ids), 2), 0.5))
+
+
+def test_fingerprint_rows_detects_order_and_scores():
+    """
+    Тестирует, что отпечаток меняется при перестановке соседей, изменении сходства и длины списка.
+    """
+    offsets = np.array([0, 2, 4, 6, 7, 7])
+    neighbours = np.array([2, 3, 3, 2, 2, 3, 2])
+    scores = np.array([0.9, 0.5, 0.9, 0.5, 0.9, 0.4, 0.9])
+
+    fingerprints = fingerprint_rows(offsets, neighbours, scores)
+
+    assert fingerprints.dtype == np.uint64
+    assert len(set(fingerprints.tolist())) == 5
+    assert np.array_equal(fingerprint_rows(offsets, neighbours.copy(), scores.copy()), fingerprints)
+
+
+@pytest.fixture
+def fingerprints(tmp_path):
+    """
+    Фикстура файла отпечатков с опубликованным построением из трёх видео.
+    """
+    fingerprints = RecommendationFingerprints(str(tmp_path / "fingerprints.bin"))
+    diff = fingerprints.diff(build({1: [2, 3], 2: [1, 3], 3: [1, 2]}))
+    assert not diff.previous and diff.added == 3
+    fingerprints.save(diff)
+    return fingerprints
+
+
+def test_full_build_publishes_only_changes(fingerprints):
+    """
+    Тестирует, что полное построение публикует изменённые и новые строки и удаляет пропавшие.
+    """
+    result = build({4: [1, 2], 2: [3, 1], 1: [2, 3]})
+
+    diff = fingerprints.diff(result)
+
+    assert (diff.changed, diff.added, diff.unchanged, diff.deleted) == (1, 1, 1, 1)
+    assert result.take(diff.positions).ids.tolist() == [4, 2]
+    assert diff.deleted_ids.tolist() == [3]
+
+    fingerprints.save(diff)
+    assert fingerprints.diff(result).empty
+
+
+def test_incremental_build_merges_fingerprints(fingerprints):
+    """
+    Тестирует, что инкрементальное построение сохраняет отпечатки незатронутых видео.
+    """
+    diff = fingerprints.diff(build({3: [1, 2]}), deleted_ids=[1])
+
+    assert diff.empty is False
+    assert (diff.changed, diff.added, diff.unchanged, diff.deleted) == (0, 0, 1, 1)
+    fingerprints.save(diff)
+
+    ids, _ = fingerprints.load()
+    assert ids.tolist() == [2, 3]
+    assert fingerprints.diff(build({2: [1, 3]}), deleted_ids=[]).empty
+
+
+def test_take_selects_rows_of_any_length():
+    """
+    Тестирует выборку элементов результата со списками разной длины.
+    """
+    result = RecommendationResult(
+        np.array([1, 2, 3]), np.array([0, 2, 2, 5]), np.array([2, 3, 1, 2, 4]), np.arange(5, dtype=np.float32)
+    )
+
+    taken = result.take(np.array([2, 0, 1]))
+
+    assert taken.ids.tolist() == [3, 1, 2]
+    assert taken.offsets.tolist() == [0, 3, 5, 5]
+    assert taken.neighbour_ids.tolist() == [1, 2, 4, 2, 3]
+    assert taken.scores.tolist() == [2, 3, 4, 0, 1]
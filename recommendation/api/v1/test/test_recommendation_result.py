@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from recommendation.api.v1.adapters.recommendation_codec import decode_recommendations, encode_recommendations_batch
+from recommendation.api.v1.utils.similarity_recommendation.recommendation_result import RecommendationResult
+
+
+@pytest.fixture
+def result():
+    """
+    Фикстура результата построения из трёх элементов по два соседа.
+    """
+    return RecommendationResult.from_matrix(
+        np.array([10, 20, 30]),
+        np.array([[20, 30], [10, 30], [20, 10]]),
+        np.array([[0.9, 0.5], [0.9, 0.4], [0.5, 0.25]]),
+    )
+
+
+def test_batches_rebase_offsets(result):
+    """
+    Тестирует, что пакеты — срезы массивов со смещениями, начинающимися с нуля.
+    """
+    first, second = result.batches(2)
+
+    assert first.ids.tolist() == [10, 20]
+    assert second.offsets.tolist() == [0, 2]
+    assert second.neighbour_ids.tolist() == [20, 10]
+    assert np.shares_memory(second.neighbour_ids, result.neighbour_ids)
+
+
+def test_records(result):
+    """
+    Тестирует, что строки для базы данных — Python-значения в порядке элементов.
+    """
+    records = list(result.records(batch_size=2))
+
+    assert records[0] == (10, [20, 30], [pytest.approx(0.9), 0.5])
+    assert [record[1] for record in records] == [[20, 30], [10, 30], [20, 10]]
+    assert all(type(record[0]) is int for record in records)
+
+
+def test_encode_batch_matches_rows(result):
+    """
+    Тестирует, что пакетное кодирование для Redis делит общий буфер по смещениям элементов.
+    """
+    values = encode_recommendations_batch(result.offsets, result.neighbour_ids, result.scores)
+
+    assert [decode_recommendations(value) for value in values] == [[20, 30], [10, 30], [20, 10]]
+    with pytest.raises(ValueError):
+        encode_recommendations_batch([0, 1], np.array([2 ** 40]))
@@ -0,0 +1,90 @@
+import os
+
+import numpy as np
+import pytest
+
+from recommendation.api.v1.adapters.recommendation_snapshot import RecommendationSnapshot, write_snapshot
+
+
+@pytest.fixture
+def path(tmp_path):
+    """
+    Фикстура пути к файлу снимка во временной директории.
+    """
+    return str(tmp_path / "snapshot" / "recommendations.bin")
+
+
+def test_write_and_get(path):
+    """
+    Тестирует, что снимок находит рекомендации по ID независимо от порядка строк при записи.
+    """
+    write_snapshot(path, np.array([30, 10, 20]), np.array([[10, 20], [20, 30], [30, 10]]),
+                   np.array([[0.9, 0.5], [0.8, 0.4], [0.7, 0.3]]))
+    snapshot = RecommendationSnapshot(path)
+
+    assert snapshot.get(10) is None
+    assert snapshot.reload() is True
+    assert len(snapshot) == 3
+
+    recommendations = snapshot.get(10)
+    assert recommendations.ids == [20, 30]
+    assert recommendations.scores == pytest.approx([0.8, 0.4])
+    assert snapshot.get(30).ids == [10, 20]
+    assert snapshot.get(15) is None
+    assert snapshot.get(99) is None
+    assert not os.path.exists(f"{path}.tmp")
+
+
+def test_write_without_scores(path):
+    """
+    Тестирует снимок без сходства.
+    """
+    write_snapshot(path, np.array([1, 2]), np.array([[2], [1]]))
+    snapshot = RecommendationSnapshot(path)
+    snapshot.reload()
+
+    assert snapshot.get(1) == ([2], None)
+
+
+def test_revision(path):
+    """
+    Тестирует, что снимок хранит номер публикации, с которой он записан.
+    """
+    write_snapshot(path, np.array([1]), np.array([[2]]), revision=7)
+    snapshot = RecommendationSnapshot(path)
+    snapshot.reload()
+
+    assert snapshot.revision == 7
+
+
+def test_reload_switches_to_new_file(path):
+    """
+    Тестирует, что reload переключается только на новый файл, а удаление файла сохраняет текущий снимок.
+    """
+    write_snapshot(path, np.array([1]), np.array([[2]]))
+    snapshot = RecommendationSnapshot(path)
+    snapshot.reload()
+
+    assert snapshot.reload() is False
+
+    write_snapshot(path, np.array([1]), np.array([[3]]))
+    assert snapshot.reload() is True
+    assert snapshot.get(1).ids == [3]
+
+    os.remove(path)
+    assert snapshot.reload() is False
+    assert snapshot.get(1).ids == [3]
+
+
+def test_invalid_file(path):
+    """
+    Тестирует, что файл чужого формата не загружается, а рекомендации вне int32 не записываются.
+    """
+    os.makedirs(os.path.dirname(path))
+    with open(path, "wb") as f:
+        f.write(b"[1, 2, 3]" * 10)
+
+    with pytest.raises(ValueError):
+        RecommendationSnapshot(path).reload()
+    with pytest.raises(ValueError):
+        write_snapshot(path, np.array([1]), np.array([[2 ** 40]]))
@@ -0,0 +1,146 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from recommendation.api.v1.adapters.recommendation_codec import encode_recommendation_response, encode_recommendations
+from recommendation.api.v1.common.single_flight import SingleFlight
+from recommendation.api.v1.domain.recommendation_read_repository import RecommendationReadRepository
+from recommendation.api.v1.service_layer import similar_videos
+from recommendation.api.v1.service_layer.manager_storage import CacheStorageManager
+
+
+@pytest.fixture
+def cache_manager():
+    """
+    Фикстура для мокированного менеджера кеша без данных в Redis.
+    """
+    manager = MagicMock(spec=CacheStorageManager)
+    manager.get = AsyncMock(return_value=None)
+    manager.fill = AsyncMock()
+    return manager
+
+
+@pytest.fixture
+def read_repository():
+    """
+    Фикстура для мокированного репозитория чтения рекомендаций с медленным запросом.
+    """
+    async def get(video_id):
+        await asyncio.sleep(0.01)
+        return ([2, 3], [0.5, 0.25]) if video_id == 1 else None
+
+    repository = MagicMock(spec=RecommendationReadRepository)
+    repository.get = AsyncMock(side_effect=get)
+    return repository
+
+
+@pytest.mark.asyncio
+async def test_database_hit_is_written_back_once(cache_manager, read_repository):
+    """
+    Проверяет, что одновременные промахи по одному video_id делают один запрос к БД,
+    а найденный список записывается в Redis вместе с готовым телом ответа.
+    """
+    results = await asyncio.gather(*(
+        similar_videos.get_similar_videos(1, cache_manager, read_repository) for _ in range(5)
+    ))
+
+    assert [result.ids for result in results] == [[2, 3]] * 5
+    read_repository.get.assert_awaited_once()
+    cache_manager.fill.assert_awaited_once_with(
+        {
+            "videos_id:1": encode_recommendations([2, 3], [0.5, 0.25]),
+            "videos_response:1": encode_recommendation_response(1, [2, 3], [0.5, 0.25]),
+        },
+        similar_videos.settings.cache_fill_ttl
+    )
+    assert len(similar_videos._database_lookups) == 0
+
+
+@pytest.mark.asyncio
+async def test_negative_entry(cache_manager, read_repository):
+    """
+    Проверяет, что отсутствие данных в БД запоминается в Redis,
+    а отметка об отсутствии не приводит к повторному запросу к БД.
+    """
+    assert await similar_videos.get_similar_videos(9, cache_manager, read_repository) is None
+    cache_manager.fill.assert_awaited_once_with(
+        {"videos_id:9": similar_videos.NOT_FOUND}, similar_videos.settings.negative_cache_ttl
+    )
+
+    cache_manager.get.return_value = similar_videos.NOT_FOUND
+    assert await similar_videos.get_similar_videos(9, cache_manager, read_repository) is None
+    read_repository.get.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_single_flight_propagates_errors():
+    """
+    Проверяет, что ошибку общего вызова получают все ожидающие, а ключ освобождается.
+    """
+    single_flight = SingleFlight()
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(*(single_flight.do("key", failing) for _ in range(3)), return_exceptions=True)
+
+    assert calls == 1
+    assert all(isinstance(result, ValueError) for result in results)
+    assert len(single_flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_watcher_discards_only_changed_videos(monkeypatch):
+    """
+    Проверяет, что после частичной публикации из локального кеша удаляются только
+    изменённые видео, а пропуск в журнале сбрасывает кеш целиком.
+    """
+    local_cache = similar_videos.LocalCache(max_size=10, ttl=60)
+    local_cache.set_generation(1)
+    local_cache.revision = 4
+    for key in ("videos_id:1", "videos_response:1", "videos_id:2", "videos_response:2"):
+        local_cache.set(key, b"[]")
+    manager = MagicMock()
+    manager.get_changes = AsyncMock(side_effect=[(1, 5, [2]), (1, 9, None)])
+    cached = []
+
+    async def sleep(interval):
+        cached.append([key for key in ("videos_id:1", "videos_id:2", "videos_response:2") if local_cache.get(key)])
+        if len(cached) == 2:
+            raise asyncio.CancelledError
+
+    monkeypatch.setattr(similar_videos.asyncio, "sleep", sleep)
+
+    with pytest.raises(asyncio.CancelledError):
+        await similar_videos.watch_cache_generation(local_cache, manager, 1.0)
+
+    assert manager.get_changes.await_args_list[0].args == (4,)
+    assert manager.get_changes.await_args_list[1].args == (5,)
+    assert cached == [["videos_id:1"], []]
+    assert local_cache.revision == 9
+
+
+@pytest.mark.asyncio
+async def test_metadata_result_is_cached_with_ttl(cache_manager, read_repository):
+    """
+    Проверяет, что рекомендации, рассчитанные по метаданным, записываются в оба ключа
+    Redis со временем жизни `cache_fill_ttl`.
+    """
+    index = MagicMock()
+    index.query_scored = MagicMock(return_value=([4, 5], [0.75, 0.5]))
+    metadata = MagicMock(id=9, title="t", description="d", categories="c", tags="g")
+
+    assert await similar_videos.get_similar_videos_by_metadata(
+        metadata, index, cache_manager, read_repository
+    ) == [4, 5]
+
+    cache_manager.fill.assert_any_await({
+        "videos_id:9": encode_recommendations([4, 5], [0.75, 0.5]),
+        "videos_response:9": encode_recommendation_response(9, [4, 5], [0.75, 0.5]),
+    }, similar_videos.settings.cache_fill_ttl)
+    cache_manager.set.assert_not_called()
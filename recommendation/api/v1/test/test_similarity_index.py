@@ -0,0 +1,61 @@
+import pandas as pd
+from recommendation.api.v1.utils.similarity_recommendation.recommendation_engine import RecommendationEnginePandas
+from recommendation.api.v1.utils.similarity_recommendation.similarity_index import SparseSimilarityIndex
+from recommendation.api.v1.utils.similarity_recommendation.tfidf_state import TfidfState
+
+
+def test_query_by_metadata(tmp_path):
+    """
+    Тестирует расчёт рекомендаций по метаданным через индекс сходства.
+
+    Проверяет, что ближайшими оказываются видео той же тематики, а исключённый
+    идентификатор не попадает в результат.
+    """
+    data = pd.DataFrame({
+        "id": [1, 2, 3, 4],
+        "title": ["python coding", "python tutorial", "football match", "football goals"],
+        "description": ["learn python", "python basics", "match review", "best goals"],
+        "categories": ["programming", "programming", "sport", "sport"],
+        "tags": ["python", "python", "football", "football"],
+    })
+    path = tmp_path / "catalog.csv"
+    data.to_csv(path, index=False)
+    state_dir = str(tmp_path / "state")
+    RecommendationEnginePandas(str(path), top_n=2, state_dir=state_dir).generate_recommendations()
+
+    index = SparseSimilarityIndex.load(state_dir)
+
+    assert set(index.query("new python course for programming", top_n=2)) == {1, 2}
+    assert index.query("python coding python", top_n=1, exclude_id=1) == [2]
+
+
+def test_reload_after_promote(tmp_path):
+    """
+    Тестирует, что индекс переключается на состояние, ставшее опорным после нового построения,
+    и не перезагружается, пока директория не заменена.
+    """
+    data = pd.DataFrame({
+        "id": [1, 2, 3],
+        "title": ["python coding", "python tutorial", "football match"],
+        "description": ["learn python", "python basics", "match review"],
+        "categories": ["programming", "programming", "sport"],
+        "tags": ["python", "python", "football"],
+    })
+    path = tmp_path / "catalog.csv"
+    data.to_csv(path, index=False)
+    state_dir = str(tmp_path / "state")
+    RecommendationEnginePandas(str(path), top_n=2, state_dir=state_dir).generate_recommendations()
+    index = SparseSimilarityIndex.load(state_dir)
+
+    assert not index.reload()
+    assert len(index.state.ids) == 3
+
+    data.loc[len(data)] = [4, "chess opening", "chess basics", "games", "chess"]
+    data.to_csv(path, index=False)
+    staged_dir = str(tmp_path / "state.staged")
+    RecommendationEnginePandas(str(path), top_n=2, state_dir=staged_dir).generate_recommendations()
+    TfidfState.promote(staged_dir, state_dir)
+
+    assert index.reload()
+    assert len(index.state.ids) == 4
+    assert index.query("chess opening", top_n=1) == [4]
@@ -0,0 +1,322 @@
+import fnmatch
+from unittest.mock import AsyncMock
+
+import numpy as np
+import pytest
+
+from recommendation.api.v1.adapters.recommendation_codec import decode_recommendations
+from recommendation.api.v1.adapters.storage_cache_redis import AsyncRedisStorage
+from recommendation.api.v1.common.unit_of_work import AsyncUnitOfWork
+from recommendation.api.v1.utils.similarity_recommendation.recommendation_result import RecommendationResult
+
+
+def text(key):
+    """Ключи хранятся строками, а SCAN, как и Redis без декодирования ответов, возвращает байты."""
+    return key.decode() if isinstance(key, bytes) else key
+
+
+class FakeRedis:
+    """
+    Минимальная реализация используемых хранилищем команд Redis в памяти.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.commands = []
+
+    async def get(self, key):
+        self.commands.append("GET")
+        return self.data.get(key)
+
+    async def mget(self, keys):
+        self.commands.append("MGET")
+        return [self.data.get(key) for key in keys]
+
+    async def set(self, key, value, ex=None, nx=False, get=False):
+        self.commands.append("SET")
+        old_value = self.data.get(key)
+        if not (nx and key in self.data):
+            self.data[key] = value if isinstance(value, bytes) else str(value).encode()
+        return old_value if get else True
+
+    async def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+        return int(self.data[key])
+
+    async def zadd(self, key, mapping):
+        self.data.setdefault(key, {}).update(mapping)
+
+    async def zrangebyscore(self, key, low, high):
+        high = float(high.lstrip("("))
+        return [member.encode() for member, score in self.data.get(key, {}).items() if score < high]
+
+    async def zrem(self, key, member):
+        self.data.get(key, {}).pop(member, None)
+
+    async def unlink(self, *keys):
+        for key in keys:
+            self.data.pop(text(key), None)
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+    async def xadd(self, key, fields, id, maxlen=None, approximate=True):
+        self.commands.append("XADD")
+        entries = self.data.setdefault(key, [])
+        entries.append((id.encode(), {field.encode(): value for field, value in fields.items()}))
+        del entries[:-maxlen]
+        return id.encode()
+
+    async def xrange(self, key, min="-", max="+", count=None):
+        low = tuple(map(int, min.split("-"))) if min != "-" else (0, 0)
+        return [entry for entry in self.data.get(key, []) if tuple(map(int, entry[0].split(b"-"))) >= low]
+
+    async def xrevrange(self, key, max="+", min="-", count=None):
+        return list(reversed(self.data.get(key, [])))[:count]
+
+    async def scan_iter(self, match, count):
+        for key in list(self.data):
+            if fnmatch.fnmatchcase(key, match):
+                yield key.encode()
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """
+    Конвейер команд FakeRedis: команды выполняются при `execute`.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.queued = []
+        self.watching = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    async def watch(self, key):
+        self.watching = True
+
+    def get(self, key):
+        # После WATCH команды выполняются сразу, иначе — ставятся в очередь
+        if self.watching:
+            return self.client.get(key)
+        self.queued.append(self.client.get(key))
+
+    def xrange(self, *args, **kwargs):
+        self.queued.append(self.client.xrange(*args, **kwargs))
+
+    def xrevrange(self, *args, **kwargs):
+        self.queued.append(self.client.xrevrange(*args, **kwargs))
+
+    def multi(self):
+        pass
+
+    def set(self, *args, **kwargs):
+        self.queued.append(self.client.set(*args, **kwargs))
+
+    def delete(self, key):
+        self.queued.append(self.client.delete(key))
+
+    async def execute(self):
+        results = [await command for command in self.queued]
+        self.client.commands.append("EXEC")
+        return results
+
+
+@pytest.fixture
+def storage():
+    """
+    Фикстура хранилища поверх FakeRedis с ключами, записанными до перехода на поколения.
+    """
+    storage = AsyncRedisStorage(generations_kept=2)
+    storage.client = FakeRedis()
+    storage.client.data["videos_id:1"] = b"[2, 3]"
+    return storage
+
+
+def build(video_id, recommended_ids):
+    return RecommendationResult.from_matrix(
+        np.array([video_id]), np.array([recommended_ids]), np.full((1, len(recommended_ids)), 0.5)
+    )
+
+
+async def get_ids(storage, video_id):
+    value = await storage.get(f"videos_id:{video_id}")
+    return None if value is None else decode_recommendations(value)
+
+
+@pytest.mark.asyncio
+async def test_publish_switches_pointer(storage):
+    """
+    Тестирует, что построение пишется только конвейером в новое поколение и становится видимым
+    после публикации, а старые поколения удаляются при фиксации.
+    """
+    assert await get_ids(storage, 1) == [2, 3]
+
+    storage.client.commands.clear()
+    await storage.bulk_set(build(1, [4, 5]))
+    assert storage.client.commands == ["SET", "SET", "EXEC"]
+    # До публикации процессы читают прежние ключи
+    assert await get_ids(storage, 1) == [2, 3]
+
+    assert await storage.publish_generation() == 1
+    await storage.commit()
+    assert await get_ids(storage, 1) == [4, 5]
+    # Предыдущее поколение (ключи без префикса) хранится для отката
+    assert "videos_id:1" in storage.client.data
+
+    await storage.bulk_set(build(1, [6]))
+    await storage.publish_generation()
+    await storage.commit()
+    assert await get_ids(storage, 1) == [6]
+    assert "videos_id:1" not in storage.client.data
+    assert "g1:videos_id:1" in storage.client.data
+
+
+@pytest.mark.asyncio
+async def test_rollback_restores_pointer(storage):
+    """
+    Тестирует, что откат возвращает указатель на предыдущее поколение и удаляет ключи нового.
+    """
+    await storage.bulk_set(build(1, [4, 5]))
+    await storage.publish_generation()
+    await storage.commit()
+
+    await storage.bulk_set(build(7, [8]))
+    await storage.publish_generation()
+    assert await get_ids(storage, 7) == [8]
+    await storage.rollback()
+
+    assert await storage.get_generation() == 1
+    assert await get_ids(storage, 7) is None
+    assert await get_ids(storage, 1) == [4, 5]
+    assert not any(key.startswith("g2:") for key in storage.client.data)
+
+    # Номера поколений не переиспользуются после отката
+    await storage.bulk_set(build(7, [9]))
+    assert await storage.publish_generation() == 3
+
+
+@pytest.mark.asyncio
+async def test_fill_writes_to_active_generation(storage):
+    """
+    Тестирует, что заполнение из базы пишет в активное поколение и не перезаписывает построение.
+    """
+    await storage.bulk_set(build(1, [4, 5]))
+    await storage.publish_generation()
+    await storage.commit()
+
+    await storage.fill({"videos_id:1": b"\x01", "videos_id:9": b"\x01"}, ttl=30)
+
+    assert await get_ids(storage, 1) == [4, 5]
+    assert await storage.mget(["videos_id:9"]) == [b"\x01"]
+    assert "g1:videos_id:9" in storage.client.data
+
+
+@pytest.mark.asyncio
+async def test_partial_update_writes_only_changed_keys(storage):
+    """
+    Тестирует, что частичная публикация перезаписывает в активном поколении только ключи
+    изменённых видео, удаляет ключи удалённых при фиксации и не создаёт нового поколения.
+    """
+    await storage.stage_generation()
+    await storage.bulk_set(build(2, [3]))
+    await storage.bulk_set(build(5, [6]))
+    await storage.bulk_set(build(8, [9]))
+    await storage.commit()
+
+    storage.client.commands.clear()
+    assert await storage.begin_update() == 1
+    await storage.bulk_set(build(2, [7]))
+    await storage.bulk_delete([5])
+    # Удаление откладывается до фиксации: до неё процессы читают прежние ключи
+    assert await get_ids(storage, 5) == [6]
+    await storage.commit()
+
+    assert storage.client.commands.count("SET") == 2
+    assert await storage.get_generation() == 1
+    assert await get_ids(storage, 2) == [7]
+    assert await get_ids(storage, 5) is None
+    assert await get_ids(storage, 8) == [9]
+    assert "g1:videos_response:5" not in storage.client.data
+    assert not any(key.startswith("g2:") for key in storage.client.data)
+
+
+@pytest.mark.asyncio
+async def test_get_changes_reports_changed_videos(storage):
+    """
+    Тестирует журнал публикаций: после частичной публикации процесс получает только
+    изменённые видео, а при неизвестном номере или вытесненных записях — сигнал сбросить кеш.
+    """
+    await storage.stage_generation()
+    await storage.bulk_set(build(2, [3]))
+    await storage.commit()
+    generation, revision, changed = await storage.get_changes(None)
+    assert (generation, revision, changed) == (1, 1, None)
+    assert await storage.get_changes(revision) == (1, 1, [])
+
+    await storage.begin_update()
+    await storage.bulk_set(build(2, [4]))
+    await storage.bulk_delete([7])
+    await storage.commit()
+    assert storage.revision == 2
+    assert await storage.get_changes(1) == (1, 2, [2, 7])
+
+    storage.changes_kept = 1
+    await storage.begin_update()
+    await storage.bulk_set(build(2, [5]))
+    await storage.commit()
+    assert await storage.get_changes(1) == (1, 3, None)
+    assert await storage.get_changes(2) == (1, 3, [2])
+
+
+@pytest.mark.asyncio
+async def test_partial_update_rollback_removes_written_keys(storage):
+    """
+    Тестирует, что откат частичной публикации удаляет записанные ключи (видео заново
+    читаются из базы), не удаляет ключи удалённых видео и отмечает видео в журнале.
+    """
+    await storage.stage_generation()
+    await storage.bulk_set(build(2, [3]))
+    await storage.bulk_set(build(5, [6]))
+    await storage.commit()
+
+    await storage.begin_update()
+    await storage.bulk_set(build(2, [7]))
+    await storage.bulk_delete([5])
+    await storage.rollback()
+
+    assert await get_ids(storage, 2) is None
+    assert await get_ids(storage, 5) == [6]
+    assert await storage.get_changes(1) == (1, 2, [2])
+
+
+@pytest.mark.asyncio
+async def test_unit_of_work_publishes_after_database_commit(storage):
+    """
+    Тестирует, что поколение публикуется только после фиксации базы данных,
+    а при ошибке фиксации построение удаляется, не переключив указатель.
+    """
+    storage.close = AsyncMock()
+    database = AsyncMock()
+
+    async with AsyncUnitOfWork(database, storage):
+        await storage.bulk_set(build(1, [4, 5]))
+        assert await storage.get_generation() == 0
+    assert await get_ids(storage, 1) == [4, 5]
+
+    database.commit.side_effect = RuntimeError("commit failed")
+    with pytest.raises(RuntimeError):
+        async with AsyncUnitOfWork(database, storage):
+            await storage.bulk_set(build(1, [6]))
+
+    assert await storage.get_generation() == 1
+    assert await get_ids(storage, 1) == [4, 5]
+    assert not any(key.startswith("g2:") for key in storage.client.data)
+    database.close.assert_awaited()
@@ -0,0 +1,258 @@
+import sys
+import threading
+import time
+import types
+from contextlib import nullcontext
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import pytest
+
+# Модуль приложения Celery отсутствует в репозитории: подставляем заглушку до импорта задачи
+sys.modules.setdefault(
+    "recommendation.api.v1.task.worker", types.SimpleNamespace(celery=MagicMock())
+)
+
+from recommendation.api.v1.adapters.storage_cache_redis import AsyncRedisStorage  # noqa: E402
+from recommendation.api.v1.service_layer import task  # noqa: E402
+from recommendation.api.v1.service_layer.manager_storage import CacheStorageManager  # noqa: E402
+from recommendation.api.v1.test.test_storage_cache_redis import FakeRedis  # noqa: E402
+from recommendation.api.v1.utils.similarity_recommendation.recommendation_result import (  # noqa: E402
+    RecommendationResult
+)
+
+
+def statement(query):
+    """Приводит SQL к одной строке для сравнения."""
+    return " ".join(query.split())
+
+
+class FakeDatabaseService:
+    """
+    Сервис базы данных, записывающий выполненные команды и состояние Redis при фиксации.
+    """
+
+    def __init__(self, redis, fail_on=None):
+        self.redis = redis
+        self.fail_on = fail_on
+        self.statements = []
+        self.events = []
+        self.copied = []
+        self.active_generation_at_commit = None
+
+    async def execute(self, query):
+        self.statements.append(statement(query))
+        if self.fail_on is not None and statement(query) == statement(self.fail_on):
+            raise RuntimeError("сбой базы данных")
+
+    async def copy_records(self, table, columns, records):
+        self.statements.append(f"COPY {table} ({', '.join(columns)})")
+        self.copied.extend([record async for record in records])
+
+    async def bulk_update(self, query, params):
+        self.statements.append(f"UPSERT {params.ids.tolist()}")
+
+    async def bulk_delete(self, query, ids):
+        self.statements.append(f"DELETE {ids}")
+
+    async def commit(self):
+        self.events.append("commit")
+        self.active_generation_at_commit = self.redis.data.get(AsyncRedisStorage.active_generation_key)
+
+    async def rollback(self):
+        self.events.append("rollback")
+
+    async def close(self):
+        self.events.append("close")
+
+
+@pytest.fixture
+def redis():
+    """
+    Фикстура FakeRedis с рекомендациями, опубликованными до перехода на поколения.
+    """
+    redis = FakeRedis()
+    redis.data["videos_id:1"] = b"old"
+    redis.data["videos_id:3"] = b"old"
+    return redis
+
+
+@pytest.fixture
+def publish(monkeypatch, redis, tmp_path):
+    """
+    Фикстура, подменяющая базу данных и Redis публикации и возвращающая функцию запуска публикации.
+    """
+    monkeypatch.setattr(task.settings, "publish_diff_enabled", False)
+    monkeypatch.setattr(task.settings, "database_bulk_load", True)
+    monkeypatch.setattr(task.settings, "path_publish_fingerprints", str(tmp_path / "fingerprints"))
+    monkeypatch.setattr(task, "get_db", AsyncMock())
+
+    async def run(result, deleted_ids=None, fail_on=None):
+        database = FakeDatabaseService(redis, fail_on)
+        storage = AsyncRedisStorage()
+        storage.client = redis
+        storage.close = AsyncMock()
+        monkeypatch.setattr(task, "create_async_database_manager", AsyncMock(return_value=database))
+        monkeypatch.setattr(task, "create_async_cache_manager", AsyncMock(return_value=CacheStorageManager(storage)))
+        try:
+            return database, await task.async_save_to_db_and_cache(result, deleted_ids)
+        except RuntimeError:
+            return database, None
+
+    return run
+
+
+def build(rows):
+    """Создаёт результат построения из словаря ID видео -> рекомендации."""
+    ids = np.array(list(rows))
+    return RecommendationResult.from_matrix(ids, np.array(list(rows.values())), np.full((len(ids), 2), 0.5))
+
+
+def test_build_lock_serializes_builds(tmp_path):
+    """
+    Проверяет, что второе построение ждёт, пока первое не освободит блокировку.
+    """
+    path = str(tmp_path / "state" / "tfidf.lock")
+    events = []
+
+    def run_build(name):
+        with task.build_lock(path):
+            events.append(f"{name}:start")
+            time.sleep(0.05)
+            events.append(f"{name}:end")
+
+    with task.build_lock(path):
+        threads = [threading.Thread(target=run_build, args=(name,)) for name in ("a", "b")]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        assert events == []
+    for thread in threads:
+        thread.join()
+
+    assert events in (["a:start", "a:end", "b:start", "b:end"], ["b:start", "b:end", "a:start", "a:end"])
+
+
+@pytest.mark.asyncio
+async def test_bulk_load_statement_order(publish, redis):
+    """
+    Проверяет порядок команд полной публикации: промежуточная таблица, COPY, индексы и
+    SET LOGGED, затем замена таблицы, которая передаёт последовательность новой таблице
+    до удаления старой и последней переименовывает индексы. Поколение Redis публикуется
+    только после фиксации базы данных.
+    """
+    database, revision = await publish(build({1: [2, 3], 2: [1, 3]}))
+
+    assert database.statements == [
+        *map(statement, task.CREATE_STAGING_QUERIES),
+        "COPY similar_recommendation_staging (id, recommendation_id, recommendation_score)",
+        *map(statement, task.PREPARE_STAGING_QUERIES),
+        *map(statement, task.SWAP_STAGING_QUERIES),
+    ]
+    swap = database.statements[-len(task.SWAP_STAGING_QUERIES):]
+    assert swap[0] == (
+        "ALTER SEQUENCE IF EXISTS similar_recommendation_id_seq OWNED BY similar_recommendation_staging.id;"
+    )
+    assert swap[1] == "DROP TABLE similar_recommendation;"
+    assert swap[-2:] == [
+        "ALTER INDEX similar_recommendation_staging_pkey RENAME TO similar_recommendation_pkey;",
+        "ALTER INDEX ix_similar_recommendation_staging_id RENAME TO ix_similar_recommendation_id;",
+    ]
+    assert [record[0] for record in database.copied] == [1, 2]
+
+    assert database.events == ["commit", "close"]
+    assert database.active_generation_at_commit is None
+    assert redis.data[AsyncRedisStorage.active_generation_key] == b"1"
+    assert "g1:videos_id:1" in redis.data and "g1:videos_id:3" not in redis.data
+    assert revision == 1
+
+
+@pytest.mark.asyncio
+async def test_failure_during_swap_rolls_back(publish, redis):
+    """
+    Проверяет, что сбой посреди замены таблицы откатывает транзакцию базы данных и поколение
+    Redis: указатель не публикуется, записанные ключи удаляются, следующие команды не выполняются.
+    """
+    database, revision = await publish(build({1: [2, 3]}), fail_on="DROP TABLE similar_recommendation;")
+
+    assert database.statements[-1] == "DROP TABLE similar_recommendation;"
+    assert not any("RENAME" in query for query in database.statements)
+    assert database.events == ["rollback", "close"]
+    assert revision is None
+    assert AsyncRedisStorage.active_generation_key not in redis.data
+    assert not any(key.startswith("g1:") for key in redis.data)
+    assert redis.data["videos_id:1"] == b"old"
+
+
+@pytest.mark.asyncio
+async def test_delta_publish_updates_in_place(publish, redis):
+    """
+    Проверяет, что инкрементальная публикация применяет upsert и удаление без промежуточной
+    таблицы, перезаписывает ключи только изменённых видео в активном поколении и сообщает
+    о них в журнале изменений.
+    """
+    database, revision = await publish(build({1: [2, 4]}), deleted_ids=np.array([3]))
+
+    assert database.statements == ["UPSERT [1]", "DELETE [3]"]
+    assert database.events == ["commit", "close"]
+    assert AsyncRedisStorage.generation_key not in redis.data
+    assert redis.data["videos_id:1"] != b"old"
+    assert "videos_id:3" not in redis.data
+    ((entry_id, fields),) = redis.data[AsyncRedisStorage.changes_key]
+    assert entry_id == b"1-0"
+    assert np.frombuffer(fields[b"ids"], dtype="<i8").tolist() == [1, 3]
+    assert revision == 1
+
+
+@pytest.mark.asyncio
+async def test_diff_publish_writes_only_changed_rows(publish, redis, monkeypatch):
+    """
+    Проверяет публикацию по отпечаткам: первое построение публикуется целиком, повтор без
+    изменений не публикуется, а изменённая строка публикуется на месте без замены таблицы.
+    """
+    monkeypatch.setattr(task.settings, "publish_diff_enabled", True)
+
+    database, revision = await publish(build({1: [2, 3], 2: [1, 3]}))
+    assert statement(task.SWAP_STAGING_QUERIES[1]) in database.statements
+    assert revision == 1
+
+    database, revision = await publish(build({1: [2, 3], 2: [1, 3]}))
+    assert database.statements == [] and database.events == []
+    assert revision is None
+
+    database, revision = await publish(build({1: [2, 3], 2: [3, 1]}))
+    assert database.statements == ["UPSERT [2]"]
+    assert redis.data[AsyncRedisStorage.active_generation_key] == b"1"
+    assert revision == 2
+
+
+def test_generate_recommendation_task_order(monkeypatch):
+    """
+    Проверяет, что состояние построения становится опорным и снимок записывается только
+    после публикации, а снимок получает номер публикации; без публикации снимок не пишется.
+    """
+    calls = []
+    engine = MagicMock(deleted_ids=None)
+    monkeypatch.setattr(task, "build_lock", lambda: nullcontext(calls.append("lock")))
+    monkeypatch.setattr(task, "create_recommendation_engine", MagicMock(return_value=engine))
+    monkeypatch.setattr(task, "RecommendationService", MagicMock())
+    monkeypatch.setattr(task, "database_engine", MagicMock())
+    monkeypatch.setattr(task.settings, "recommendation_snapshot_enabled", True)
+    monkeypatch.setattr(task.TfidfState, "promote", lambda *args: calls.append("promote"))
+    monkeypatch.setattr(task, "save_recommendation_snapshot", lambda revision: calls.append(f"snapshot {revision}"))
+    monkeypatch.setattr(task.os, "kill", MagicMock(side_effect=AssertionError("построение завершилось ошибкой")))
+
+    async def save(result, deleted_ids):
+        calls.append("publish")
+        return revision
+
+    monkeypatch.setattr(task, "async_save_to_db_and_cache", save)
+
+    revision = 5
+    task.generate_recommendation_task("catalog.csv")
+    assert calls == ["lock", "publish", "promote", "snapshot 5"]
+
+    calls.clear()
+    revision = None
+    task.generate_recommendation_task("catalog.csv")
+    assert calls == ["lock", "publish", "promote"]
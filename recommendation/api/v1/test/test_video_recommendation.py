@@ -0,0 +1,217 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import orjson
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from recommendation.api.v1.adapters.local_cache import LocalCache
+from recommendation.api.v1.adapters.recommendation_codec import encode_recommendation_response, encode_recommendations
+from recommendation.api.v1.adapters.recommendation_snapshot import RecommendationSnapshot, write_snapshot
+from recommendation.api.v1.common.responses import content_etag
+from recommendation.api.v1.domain.cashe_repository import StorageRepository
+from recommendation.api.v1.domain.recommendation_read_repository import RecommendationReadRepository
+from recommendation.api.v1.endpoints.video_recommendation import router
+
+
+@pytest.fixture
+def cache_storage():
+    """
+    Фикстура для мокированного общего хранилища кеша приложения.
+    """
+    storage = MagicMock(spec=StorageRepository)
+    # Рекомендации в формате JSON, записанные до перехода на бинарный формат, без готового тела ответа
+    storage.get = AsyncMock(side_effect=lambda key: orjson.dumps([2, 3]) if key.startswith("videos_id:") else None)
+    return storage
+
+
+@pytest.fixture
+def app(cache_storage):
+    """
+    Фикстура приложения с клиентами в `app.state`, как после `main.lifespan`.
+    """
+    app = FastAPI()
+    app.include_router(router)
+    app.state.cache_storage = cache_storage
+    app.state.read_repository = MagicMock(spec=RecommendationReadRepository)
+    app.state.local_cache = LocalCache(max_size=10, ttl=60)
+    app.state.recommendation_snapshot = None
+    return app
+
+
+def test_get_recommendation_uses_app_clients(app, cache_storage):
+    """
+    Проверяет, что эндпоинт использует общий клиент кеша приложения и не обращается
+    к базе данных при попадании в Redis. Повторный запрос обслуживается локальным кешем процесса без обращения к Redis.
+    """
+    client = TestClient(app)
+
+    for _ in range(2):
+        response = client.get("/api/v1/recommendation/get_recommendation/", params={"video_id": 1})
+        assert response.status_code == 200
+        assert response.json()["data_recommendations"]["recommendation_id"] == [2, 3]
+
+    # Первый запрос: нет готового тела ответа, затем рекомендации; второй — из локального кеша
+    assert cache_storage.get.await_count == 2
+    app.state.read_repository.get.assert_not_called()
+
+
+def test_get_recommendation_pre_serialized_body(app, cache_storage):
+    """
+    Проверяет, что тело ответа, сохранённое при публикации построения, отдаётся как есть.
+    """
+    body = encode_recommendation_response(1, [2, 3], [0.5, 0.25])
+    cache_storage.get = AsyncMock(return_value=body)
+    client = TestClient(app)
+
+    response = client.get("/api/v1/recommendation/get_recommendation/", params={"video_id": 1})
+
+    assert response.status_code == 200
+    assert response.content == body
+    assert response.json()["data_recommendations"] == {"id": 1, "recommendation_id": [2, 3], "scores": [0.5, 0.25]}
+    cache_storage.get.assert_awaited_once_with("videos_response:1")
+
+
+def test_get_recommendations_batch(app, cache_storage):
+    """
+    Проверяет, что пакетный эндпоинт делает один MGET к Redis и один запрос к БД
+    только для промахов кеша, а видео без рекомендаций не попадают в ответ.
+    """
+    cache_storage.mget = AsyncMock(return_value=[orjson.dumps([2, 3]), None, None])
+    read_repository = app.state.read_repository
+    read_repository.get_many = AsyncMock(return_value={5: ([6, 7], [0.5, 0.25])})
+    client = TestClient(app)
+
+    response = client.post(
+        "/api/v1/recommendation/get_recommendations_batch/", json={"video_ids": [1, 5, 9, 1]}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["data_recommendations"]["recommendations"] == {"1": [2, 3], "5": [6, 7]}
+    cache_storage.mget.assert_awaited_once_with(["videos_id:1", "videos_id:5", "videos_id:9"])
+    read_repository.get_many.assert_awaited_once_with([5, 9])
+    # Найденное в БД записывается в Redis вместе с готовым телом ответа
+    assert set(cache_storage.fill.await_args_list[0].args[0]) == {"videos_id:5", "videos_response:5"}
+
+
+def test_get_recommendation_slice(app, cache_storage):
+    """
+    Проверяет, что параметры limit, offset и min_score возвращают только нужный срез
+    рекомендаций вместе со сходством.
+    """
+    cache_storage.get = AsyncMock(return_value=encode_recommendations([2, 3, 4, 5], [0.9, 0.7, 0.5, 0.3]))
+    client = TestClient(app)
+
+    def get(**params):
+        response = client.get("/api/v1/recommendation/get_recommendation/", params={"video_id": 1, **params})
+        assert response.status_code == 200
+        return response.json()["data_recommendations"]
+
+    assert get(limit=2)["recommendation_id"] == [2, 3]
+    assert get(limit=2, offset=1)["recommendation_id"] == [3, 4]
+    data = get(min_score=0.5)
+    assert data["recommendation_id"] == [2, 3, 4]
+    # Сходство выводится как float32 с кратчайшим представлением, как в готовом теле ответа
+    assert data["scores"] == [0.9, 0.7, 0.5]
+    assert get(offset=10)["recommendation_id"] == []
+
+    body = client.get("/api/v1/recommendation/get_recommendation/", params={"video_id": 1, "limit": 4}).content
+    assert body == encode_recommendation_response(1, [2, 3, 4, 5], [0.9, 0.7, 0.5, 0.3])
+
+
+def test_get_recommendation_from_snapshot(app, cache_storage, tmp_path):
+    """
+    Проверяет, что видео из снимка последнего построения обслуживаются без обращения к Redis,
+    даже если Redis недоступен, а остальные ищутся в Redis.
+    """
+    path = str(tmp_path / "recommendations.bin")
+    write_snapshot(path, np.array([1, 5]), np.array([[5, 9], [1, 9]]), np.array([[0.5, 0.25], [0.5, 0.125]]))
+    app.state.recommendation_snapshot = RecommendationSnapshot(path)
+    app.state.recommendation_snapshot.reload()
+    cache_storage.get = AsyncMock(side_effect=ConnectionError("Redis недоступен"))
+    cache_storage.mget = AsyncMock(return_value=[])
+    client = TestClient(app)
+
+    response = client.get("/api/v1/recommendation/get_recommendation/", params={"video_id": 1})
+    assert response.status_code == 200
+    assert response.json()["data_recommendations"] == {"id": 1, "recommendation_id": [5, 9], "scores": [0.5, 0.25]}
+
+    response = client.get("/api/v1/recommendation/get_recommendation/", params={"video_id": 5, "limit": 1})
+    assert response.json()["data_recommendations"]["recommendation_id"] == [1]
+
+    response = client.post("/api/v1/recommendation/get_recommendations_batch/", json={"video_ids": [1, 5]})
+    assert response.json()["data_recommendations"]["recommendations"] == {"1": [5, 9], "5": [1, 9]}
+
+    cache_storage.get.assert_not_called()
+    cache_storage.mget.assert_awaited_once_with([])
+
+
+def test_get_recommendation_conditional(app, cache_storage):
+    """
+    Проверяет, что ответ содержит ETag содержимого и Cache-Control, запрос с совпадающим
+    If-None-Match получает 304 без обращения к Redis, а ETag меняется только вместе с рекомендациями.
+    """
+    client = TestClient(app)
+    url = "/api/v1/recommendation/get_recommendation/"
+
+    response = client.get(url, params={"video_id": 1})
+    etag = response.headers["etag"]
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "public, max-age=60"
+    assert etag == content_etag(response.content)
+
+    cache_storage.get.reset_mock()
+    response = client.get(url, params={"video_id": 1}, headers={"If-None-Match": f'"other", W/{etag}'})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    cache_storage.get.assert_not_called()
+
+    # Другое видео не совпадает со старым ETag
+    assert client.get(url, params={"video_id": 2}, headers={"If-None-Match": etag}).status_code == 200
+
+    # Новое поколение с теми же рекомендациями не меняет ETag, изменённые рекомендации — меняют
+    app.state.local_cache.set_generation(4)
+    assert client.get(url, params={"video_id": 1}, headers={"If-None-Match": etag}).status_code == 304
+    app.state.local_cache.clear()
+    cache_storage.get = AsyncMock(side_effect=lambda key: orjson.dumps([2, 4]) if key.startswith("videos_id:") else None)
+    assert client.get(url, params={"video_id": 1}, headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_get_recommendation_if_none_match_any(app, cache_storage):
+    """
+    Проверяет, что `If-None-Match: *` получает 304 только для видео с рекомендациями.
+    """
+    cache_storage.get = AsyncMock(return_value=None)
+    app.state.read_repository.get = AsyncMock(side_effect=lambda video_id: ([2, 3], [0.5, 0.25]) if video_id == 1 else None)
+    client = TestClient(app)
+    url = "/api/v1/recommendation/get_recommendation/"
+
+    # Для видео без рекомендаций `*` не совпадает: ответ определяется поиском
+    assert client.get(url, params={"video_id": 7}, headers={"If-None-Match": "*"}).status_code == 404
+    assert client.get(url, params={"video_id": 7}).status_code == 404
+    app.state.read_repository.get.assert_awaited_with(7)
+    response = client.get(url, params={"video_id": 1}, headers={"If-None-Match": "*"})
+    assert response.status_code == 304
+    assert response.headers["etag"] == client.get(url, params={"video_id": 1}).headers["etag"]
+
+
+def test_snapshot_of_other_revision_is_ignored(app, cache_storage, tmp_path):
+    """
+    Проверяет, что снимок, записанный с другой публикацией, не используется, пока процесс
+    учёл более новую публикацию в Redis.
+    """
+    path = str(tmp_path / "recommendations.bin")
+    write_snapshot(path, np.array([1]), np.array([[5, 9]]), revision=2)
+    app.state.recommendation_snapshot = RecommendationSnapshot(path)
+    app.state.recommendation_snapshot.reload()
+    client = TestClient(app)
+    url = "/api/v1/recommendation/get_recommendation/"
+
+    app.state.local_cache.revision = 3
+    assert client.get(url, params={"video_id": 1}).json()["data_recommendations"]["recommendation_id"] == [2, 3]
+
+    app.state.local_cache = LocalCache(max_size=10, ttl=60)
+    app.state.local_cache.revision = 2
+    assert client.get(url, params={"video_id": 1}).json()["data_recommendations"]["recommendation_id"] == [5, 9]
@@ -0,0 +1,86 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+
+class HashingTfidfVectorizer:
+    """
+    TF-IDF векторизатор без словаря для потоковой обработки данных.
+
+    Термины отображаются в колонки хеш-функцией (`HashingVectorizer`), поэтому
+    проход по всему корпусу для построения словаря не нужен: каждая часть данных
+    векторизуется независимо, а для IDF накапливается только документная частота
+    по колонкам. Веса IDF и нормировка совпадают с `TfidfVectorizer`
+    (smooth_idf=True, норма L2) с точностью до коллизий хеша.
+
+    Attributes:
+        n_features (int): Количество колонок (размер хеш-пространства).
+        idf_ (np.ndarray | None): IDF-веса колонок после `finalize_idf`.
+    """
+
+    def __init__(self, n_features: int = 2 ** 20, idf: np.ndarray | None = None):
+        """
+        Инициализирует HashingTfidfVectorizer.
+
+        Args:
+            n_features (int): Количество колонок.
+            idf (np.ndarray | None): Готовые IDF-веса (например, из сохранённого состояния).
+        """
+        self.n_features = n_features
+        self.idf_ = idf
+        self._hashing = HashingVectorizer(
+            n_features=n_features, stop_words="english", alternate_sign=False, norm=None
+        )
+        self._document_frequency = np.zeros(n_features, dtype=np.int64)
+        self._n_documents = 0
+
+    def partial_fit_transform(self, texts) -> csr_matrix:
+        """
+        Векторизует часть корпуса в частоты терминов и учитывает её в документной частоте.
+
+        Args:
+            texts: Тексты очередной части данных.
+
+        Returns:
+            csr_matrix: Частоты терминов (len(texts) x n_features) без весов IDF.
+        """
+        counts = self._hashing.transform(texts)
+        self._document_frequency += np.bincount(counts.indices, minlength=self.n_features)
+        self._n_documents += counts.shape[0]
+        return counts
+
+    def finalize_idf(self) -> np.ndarray:
+        """
+        Вычисляет IDF-веса по накопленной документной частоте.
+
+        Returns:
+            np.ndarray: IDF-веса колонок.
+        """
+        self.idf_ = np.log((1 + self._n_documents) / (1 + self._document_frequency)) + 1
+        return self.idf_
+
+    def apply_idf(self, counts: csr_matrix) -> csr_matrix:
+        """
+        Применяет IDF-веса и нормировку L2 к матрице частот на месте.
+
+        Args:
+            counts (csr_matrix): Частоты терминов.
+
+        Returns:
+            csr_matrix: Нормированная TF-IDF матрица (та же матрица, без копирования).
+        """
+        counts.data *= self.idf_[counts.indices]
+        return normalize(counts, copy=False)
+
+    def transform(self, texts) -> csr_matrix:
+        """
+        Векторизует тексты с уже вычисленными IDF-весами.
+
+        Args:
+            texts: Тексты для векторизации.
+
+        Returns:
+            csr_matrix: Нормированная TF-IDF матрица.
+        """
+        return self.apply_idf(self._hashing.transform(texts))
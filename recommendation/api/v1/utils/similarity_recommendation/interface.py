@@ -13,6 +13,6 @@ class Recommendation(ABC):
         Генерирует рекомендации на основе входных данных.
 
         Returns:
-            DataFrame: DataFrame с рекомендациями. Структура DataFrame зависит от реализации.
+            RecommendationResult: Рекомендации в колоночном виде (идентификаторы, смещения и плоские массивы).
         """
         pass
\ No newline at end of file
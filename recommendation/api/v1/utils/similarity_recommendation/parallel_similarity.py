@@ -0,0 +1,135 @@
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+# Разделяемая TF-IDF матрица, подключённая в процессе-воркере
+_worker_state: Dict[str, Any] = {}
+
+
+def calculate_top_n_parallel(
+        tfidf_matrix: csr_matrix, top_n: int, block_size: int | None, workers: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Считает топ-N соседей всех элементов в пуле процессов.
+
+    CSR-массивы TF-IDF матрицы и её транспонированной копии один раз копируются
+    в разделяемую память; воркеры подключаются к ним без сериализации матрицы.
+    Строки делятся на шарды (по несколько на воркер для балансировки нагрузки),
+    каждый воркер обрабатывает свой шард поблочно и возвращает только топ-N,
+    которые затем собираются в итоговые массивы.
+
+    Args:
+        tfidf_matrix (csr_matrix): Нормированная TF-IDF матрица.
+        top_n (int): Количество рекомендаций.
+        block_size (int | None): Количество строк в одном блоке умножения внутри шарда.
+        workers (int): Количество процессов.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Позиции соседей и их сходство (N x top_n).
+    """
+    num_items = tfidf_matrix.shape[0]
+    width = max(min(top_n, num_items - 1), 0)
+    positions = np.empty((num_items, width), dtype=np.intp)
+    scores = np.empty((num_items, width))
+
+    shard_size = max(math.ceil(num_items / (workers * 4)), 1)
+    if block_size:
+        shard_size = math.ceil(shard_size / block_size) * block_size
+
+    segments: List[SharedMemory] = []
+    try:
+        matrix_spec = _share_csr(tfidf_matrix, segments)
+        transposed_spec = _share_csr(tfidf_matrix.T.tocsr(), segments)
+
+        with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(matrix_spec, transposed_spec)
+        ) as pool:
+            futures = [
+                pool.submit(_process_shard, start, min(start + shard_size, num_items), top_n, block_size)
+                for start in range(0, num_items, shard_size)
+            ]
+            for future in as_completed(futures):
+                start, shard_positions, shard_scores = future.result()
+                positions[start:start + len(shard_positions)] = shard_positions
+                scores[start:start + len(shard_scores)] = shard_scores
+    finally:
+        for segment in segments:
+            segment.close()
+            segment.unlink()
+
+    return positions, scores
+
+
+def _share_csr(matrix: csr_matrix, segments: List[SharedMemory]) -> Dict[str, Any]:
+    """
+    Копирует CSR-массивы матрицы в разделяемую память.
+
+    Args:
+        matrix (csr_matrix): Матрица для публикации.
+        segments (List[SharedMemory]): Список, в который добавляются созданные сегменты
+            (для освобождения вызывающей стороной).
+
+    Returns:
+        Dict[str, Any]: Описание матрицы для подключения в воркере.
+    """
+    spec = {"shape": matrix.shape}
+    for name in ("data", "indices", "indptr"):
+        array = getattr(matrix, name)
+        segment = SharedMemory(create=True, size=max(array.nbytes, 1))
+        segments.append(segment)
+        np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[:] = array
+        spec[name] = (segment.name, array.shape, array.dtype.str)
+    return spec
+
+
+def _attach_csr(spec: Dict[str, Any]) -> csr_matrix:
+    """
+    Подключает матрицу, опубликованную через `_share_csr`, без копирования данных.
+
+    Args:
+        spec (Dict[str, Any]): Описание матрицы.
+
+    Returns:
+        csr_matrix: Матрица поверх разделяемой памяти.
+    """
+    arrays = []
+    for name in ("data", "indices", "indptr"):
+        segment_name, shape, dtype = spec[name]
+        segment = SharedMemory(name=segment_name)
+        # Сегменты должны жить столько же, сколько процесс-воркер
+        _worker_state.setdefault("segments", []).append(segment)
+        arrays.append(np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf))
+    return csr_matrix(tuple(arrays), shape=spec["shape"], copy=False)
+
+
+def _init_worker(matrix_spec: Dict[str, Any], transposed_spec: Dict[str, Any]) -> None:
+    """
+    Инициализатор процесса-воркера: подключает разделяемые матрицы.
+    """
+    _worker_state["matrix"] = _attach_csr(matrix_spec)
+    _worker_state["transposed"] = _attach_csr(transposed_spec)
+
+
+def _process_shard(start: int, stop: int, top_n: int, block_size: int | None) -> tuple[int, np.ndarray, np.ndarray]:
+    """
+    Считает топ-N соседей для строк шарда [start, stop).
+
+    Returns:
+        tuple[int, np.ndarray, np.ndarray]: Начало шарда, позиции соседей и их сходство.
+    """
+    from recommendation.api.v1.utils.similarity_recommendation.recommendation_engine import (
+        RecommendationEnginePandas
+    )
+
+    positions, scores = RecommendationEnginePandas._calculate_top_n(
+        _worker_state["matrix"], np.arange(start, stop), top_n, block_size, _worker_state["transposed"]
+    )
+    return start, positions, scores
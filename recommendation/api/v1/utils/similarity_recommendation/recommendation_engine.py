@@ -1,8 +1,26 @@
+import os
+
 import pandas as pd
 import numpy as np
+import pyarrow.feather as feather
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+from scipy.sparse import csr_matrix, vstack
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
-from collections import defaultdict
+
+from recommendation.api.v1.utils.similarity_recommendation.hashing_vectorizer import HashingTfidfVectorizer
+from recommendation.api.v1.utils.similarity_recommendation.parallel_similarity import calculate_top_n_parallel
+from recommendation.api.v1.utils.similarity_recommendation.recommendation_result import RecommendationResult
+from recommendation.api.v1.utils.similarity_recommendation.tfidf_artifact import TfidfArtifactCache, dataset_hash
+from recommendation.api.v1.utils.similarity_recommendation.tfidf_state import TfidfState
+
+
+REQUIRED_COLUMNS = ["id", "title", "description", "categories", "tags"]
+
+# Расширения файлов колоночных форматов
+PARQUET_EXTENSIONS = (".parquet",)
+ARROW_EXTENSIONS = (".arrow", ".feather")
 
 
 class RecommendationEnginePandas:
@@ -12,47 +30,200 @@ class RecommendationEnginePandas:
     Использует TF-IDF для векторного представления текста и косинусное сходство
     для вычисления схожести между элементами.
 
+    Данные читаются из CSV, Parquet или Arrow IPC (Feather v2); загружаются только
+    колонки из `columns`.
+
     Attributes:
-        path (str): Путь к CSV-файлу с данными.
+        path (str): Путь к файлу с данными.
         top_n (int): Количество рекомендаций для каждого элемента.
+        block_size (int | None): Количество строк TF-IDF, обрабатываемых за один блок.
+            Если не задан, строится полная матрица сходства N x N.
+        workers (int): Количество процессов для параллельного расчёта сходства.
+        artifact_dir (str | None): Директория кеша артефактов векторизации.
+        chunk_size (int | None): Количество строк, читаемых за один раз в потоковом режиме.
+        hashing_n_features (int): Размер хеш-пространства в потоковом режиме.
     """
 
-    def __init__(self, path: str, top_n: int):
+    # Колонки, которые читаются из файла данных
+    columns = REQUIRED_COLUMNS
+
+    def __init__(
+            self,
+            path: str,
+            top_n: int,
+            block_size: int | None = None,
+            state_dir: str | None = None,
+            workers: int = 1,
+            artifact_dir: str | None = None,
+            chunk_size: int | None = None,
+            hashing_n_features: int = 2 ** 20
+    ):
         """
         Инициализирует RecommendationEnginePandas.
 
         Args:
-            path (str): Путь к CSV-файлу с данными.
+            path (str): Путь к файлу с данными (CSV, Parquet или Arrow IPC).
             top_n (int): Количество рекомендаций для каждого элемента.
+            block_size (int | None): Размер блока строк для поблочного расчёта сходства.
+            state_dir (str | None): Директория для сохранения состояния построения (`TfidfState`),
+                необходимого для инкрементального пересчёта. Если не задана, состояние не сохраняется.
+            workers (int): Количество процессов для расчёта сходства. При значении больше 1
+                блоки строк распределяются по пулу процессов (`calculate_top_n_parallel`).
+            artifact_dir (str | None): Директория кеша артефактов векторизации (`TfidfArtifactCache`).
+                Если задана, при неизменном содержимом датасета векторизация не повторяется.
+            chunk_size (int | None): Если задан, файл читается частями по `chunk_size` строк и каждая
+                часть векторизуется `HashingTfidfVectorizer` без общего словаря, поэтому пиковое
+                потребление памяти на исходный текст зависит от размера части, а не от размера файла.
+            hashing_n_features (int): Количество колонок хеш-пространства в потоковом режиме.
         """
         self.path = path
         self.top_n = top_n
+        self.block_size = block_size
+        self.state_dir = state_dir
+        self.workers = workers
+        self.artifact_dir = artifact_dir
+        self.chunk_size = chunk_size
+        self.hashing_n_features = hashing_n_features
 
-    def generate_recommendations(self) -> pd.DataFrame:
+    def generate_recommendations(self) -> RecommendationResult:
         """
         Генерирует рекомендации для всех элементов в данных.
 
         Returns:
-            pd.DataFrame: DataFrame с колонками:
-                - id: Идентификатор элемента.
-                - recommended_ids: Список рекомендованных идентификаторов.
+            RecommendationResult: Идентификаторы элементов, их рекомендации и сходство
+                по убыванию в колоночном виде.
+        """
+        artifact = self._load_vectorized()
+        tfidf_matrix, ids = artifact.tfidf_matrix, artifact.ids
+
+        # В поблочном режиме полная матрица N x N никогда не хранится в памяти
+        if self.workers > 1:
+            positions, scores = calculate_top_n_parallel(tfidf_matrix, self.top_n, self.block_size, self.workers)
+        else:
+            positions, scores = RecommendationEnginePandas._calculate_top_n(
+                tfidf_matrix, np.arange(len(ids)), self.top_n, self.block_size
+            )
+        if self.state_dir:
+            TfidfState(artifact.vocabulary, artifact.idf, tfidf_matrix, ids, ids[positions], scores).save(
+                self.state_dir
+            )
+        return RecommendationResult.from_matrix(ids, ids[positions], scores)
+
+    def _load_vectorized(self) -> TfidfState:
+        """
+        Возвращает результат векторизации датасета.
+
+        Если задан `artifact_dir` и для текущего содержимого датасета уже есть артефакт,
+        он загружается с отображением массивов в память, и исходный текст не читается.
+        Иначе данные загружаются, векторизуются и артефакт сохраняется в кеш.
+
+        Returns:
+            TfidfState: Словарь, IDF-веса, TF-IDF матрица и идентификаторы элементов.
         """
+        cache = TfidfArtifactCache(self.artifact_dir) if self.artifact_dir else None
+        key = dataset_hash(self.path) if cache else None
+        if key and self.chunk_size:
+            key = f"{key}-hashing{self.hashing_n_features}"
+        if cache and (artifact := cache.load(key)) is not None:
+            return artifact
+
+        if self.chunk_size:
+            artifact = self._vectorize_streaming()
+            if cache:
+                cache.save(key, artifact)
+            return artifact
+
         df = self._upload_data()
         df = self._prepare_for_cosine_similarity(df)
-        similarity_matrix = RecommendationEnginePandas._calculate_similarity_matrix(df)
-        recommendations_df = RecommendationEnginePandas._get_top_recommendations_from_matrix(
-            similarity_matrix, df, self.top_n
-        )
-        return recommendations_df
+        vectorizer, tfidf_matrix = RecommendationEnginePandas._fit_vectorizer(df)
+        artifact = TfidfState.from_vectorizer(vectorizer, tfidf_matrix, df["id"].to_numpy())
+        if cache:
+            cache.save(key, artifact)
+        return artifact
+
+    def _vectorize_streaming(self) -> TfidfState:
+        """
+        Векторизует датасет по частям без общего словаря.
+
+        Каждая часть файла подготавливается и превращается в разреженную матрицу частот,
+        после чего текст части освобождается. IDF-веса применяются один раз в конце
+        по накопленной документной частоте.
+
+        Returns:
+            TfidfState: Состояние без словаря (хеш-пространство) с TF-IDF матрицей и идентификаторами.
+        """
+        vectorizer = HashingTfidfVectorizer(n_features=self.hashing_n_features)
+        count_blocks, id_blocks = [], []
+        for chunk in self._iter_chunks():
+            chunk = self._prepare_for_cosine_similarity(chunk)
+            count_blocks.append(vectorizer.partial_fit_transform(chunk["text_data"]))
+            id_blocks.append(chunk["id"].to_numpy())
+
+        counts = vstack(count_blocks, format="csr") if count_blocks else csr_matrix((0, self.hashing_n_features))
+        del count_blocks
+        idf = vectorizer.finalize_idf()
+        tfidf_matrix = vectorizer.apply_idf(counts)
+        ids = np.concatenate(id_blocks) if id_blocks else np.empty(0, dtype=np.int64)
+        return TfidfState([], idf, tfidf_matrix, ids)
+
+    def _iter_chunks(self):
+        """
+        Читает файл данных частями, загружая только колонки из `columns`.
+
+        CSV и Parquet читаются частями по `chunk_size` строк, Arrow IPC — по записанным
+        в файле пакетам (record batches), отображённым в память.
+
+        Yields:
+            pd.DataFrame: Очередная часть данных.
+        """
+        if self.path.endswith(PARQUET_EXTENSIONS):
+            parquet_file = pq.ParquetFile(self.path)
+            columns = self._project_columns(parquet_file.schema_arrow.names)
+            for batch in parquet_file.iter_batches(batch_size=self.chunk_size, columns=columns):
+                yield batch.to_pandas()
+        elif self.path.endswith(ARROW_EXTENSIONS):
+            with ipc.open_file(self.path) as reader:
+                columns = self._project_columns(reader.schema.names)
+                for index in range(reader.num_record_batches):
+                    yield reader.get_batch(index).select(columns).to_pandas()
+        else:
+            yield from pd.read_csv(
+                self.path, chunksize=self.chunk_size, usecols=lambda column: column in self.columns
+            )
 
     def _upload_data(self) -> pd.DataFrame:
         """
-        Загружает данные из CSV-файла.
+        Загружает данные из файла (CSV, Parquet или Arrow IPC).
+
+        Колоночные форматы читаются через pyarrow с проекцией колонок, поэтому
+        лишние колонки не читаются с диска и не разбираются.
 
         Returns:
             pd.DataFrame: DataFrame с загруженными данными.
         """
-        return pd.read_csv(self.path)
+        if self.path.endswith(PARQUET_EXTENSIONS):
+            columns = self._project_columns(pq.read_schema(self.path).names)
+            return pq.read_table(self.path, columns=columns).to_pandas()
+        if self.path.endswith(ARROW_EXTENSIONS):
+            with ipc.open_file(self.path) as reader:
+                columns = self._project_columns(reader.schema.names)
+            return feather.read_table(self.path, columns=columns, memory_map=True).to_pandas()
+        return pd.read_csv(self.path, usecols=lambda column: column in self.columns)
+
+    def _project_columns(self, available: list[str]) -> list[str]:
+        """
+        Возвращает колонки из `columns`, присутствующие в файле.
+
+        Отсутствующие обязательные колонки не вызывают ошибку при чтении —
+        она формируется позже в `_check_required_columns`.
+
+        Args:
+            available (list[str]): Колонки файла.
+
+        Returns:
+            list[str]: Колонки для чтения.
+        """
+        return [column for column in self.columns if column in available]
 
     def _prepare_for_cosine_similarity(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -83,10 +254,9 @@ class RecommendationEnginePandas:
         Returns:
             pd.DataFrame: Проверенный DataFrame.
         """
-        required_columns = ["id", "title", "description", "categories", "tags"]
-        if not all(column in df.columns for column in required_columns):
+        if not all(column in df.columns for column in REQUIRED_COLUMNS):
             raise ValueError(
-                "CSV должен содержать колонки: id, title, description, categories, tags"
+                "Датасет должен содержать колонки: id, title, description, categories, tags"
             )
         return df
 
@@ -121,6 +291,37 @@ class RecommendationEnginePandas:
         )
         return df
 
+    @staticmethod
+    def _fit_vectorizer(df: pd.DataFrame) -> tuple[TfidfVectorizer, csr_matrix]:
+        """
+        Обучает TF-IDF векторизатор и строит разреженную матрицу по колонке `text_data`.
+
+        Строки матрицы нормированы по L2, поэтому скалярное произведение строк
+        равно их косинусному сходству.
+
+        Args:
+            df (pd.DataFrame): DataFrame с колонкой `text_data`.
+
+        Returns:
+            tuple[TfidfVectorizer, csr_matrix]: Обученный векторизатор и TF-IDF матрица (N x V),
+                где V — размер словаря.
+        """
+        tfidf_vectorizer = TfidfVectorizer(stop_words="english")
+        return tfidf_vectorizer, tfidf_vectorizer.fit_transform(df["text_data"])
+
+    @staticmethod
+    def _vectorize(df: pd.DataFrame) -> csr_matrix:
+        """
+        Строит разреженную TF-IDF матрицу по колонке `text_data`.
+
+        Args:
+            df (pd.DataFrame): DataFrame с колонкой `text_data`.
+
+        Returns:
+            csr_matrix: TF-IDF матрица размером (N x V).
+        """
+        return RecommendationEnginePandas._fit_vectorizer(df)[1]
+
     @staticmethod
     def _calculate_similarity_matrix(df: pd.DataFrame) -> np.ndarray:
         """
@@ -132,14 +333,57 @@ class RecommendationEnginePandas:
         Returns:
             np.ndarray: Матрица сходства (N x N), где N — количество элементов.
         """
-        tfidf_vectorizer = TfidfVectorizer(stop_words="english")
-        tfidf_matrix = tfidf_vectorizer.fit_transform(df["text_data"])
+        tfidf_matrix = RecommendationEnginePandas._vectorize(df)
         return cosine_similarity(tfidf_matrix, tfidf_matrix)
 
+    @staticmethod
+    def _calculate_top_n(
+        tfidf_matrix: csr_matrix,
+        rows: np.ndarray,
+        top_n: int,
+        block_size: int | None = None,
+        transposed: csr_matrix | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Считает топ-N соседей для заданных строк, перемножая TF-IDF матрицу поблочно.
+
+        За один шаг считается сходство `block_size` строк со всеми элементами,
+        из блока сохраняются только топ-N соседей, после чего блок освобождается.
+        Пиковое потребление памяти — O(block_size x N) вместо O(N^2).
+        Если `block_size` не задан, все строки обрабатываются одним блоком.
+
+        Args:
+            tfidf_matrix (csr_matrix): Нормированная TF-IDF матрица.
+            rows (np.ndarray): Позиции элементов, для которых ищутся соседи.
+            top_n (int): Количество рекомендаций.
+            block_size (int | None): Количество строк в одном блоке.
+            transposed (csr_matrix | None): Заранее транспонированная матрица в формате CSR.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Позиции соседей и их сходство (len(rows) x top_n),
+                отсортированные по убыванию сходства.
+        """
+        block_size = block_size or max(len(rows), 1)
+        if transposed is None:
+            transposed = tfidf_matrix.T.tocsr()
+
+        position_blocks, score_blocks = [], []
+        for start in range(0, len(rows), block_size):
+            block_rows = rows[start:start + block_size]
+            block = (tfidf_matrix[block_rows] @ transposed).toarray()
+            positions = RecommendationEnginePandas._select_top_n(block, block_rows, top_n)
+            position_blocks.append(positions)
+            score_blocks.append(np.take_along_axis(block, positions, axis=1))
+
+        if not position_blocks:
+            width = max(min(top_n, tfidf_matrix.shape[0] - 1), 0)
+            return np.empty((0, width), dtype=np.intp), np.empty((0, width))
+        return np.vstack(position_blocks), np.vstack(score_blocks)
+
     @staticmethod
     def _get_top_recommendations_from_matrix(
         similarity_matrix: np.ndarray, df: pd.DataFrame, top_n: int
-    ) -> pd.DataFrame:
+    ) -> RecommendationResult:
         """
         Выбирает топ-N рекомендаций для каждого элемента из матрицы сходства.
 
@@ -149,17 +393,44 @@ class RecommendationEnginePandas:
             top_n (int): Количество рекомендаций.
 
         Returns:
-            pd.DataFrame: DataFrame с колонками:
-                - id: Идентификатор элемента.
-                - recommended_ids: Список рекомендованных идентификаторов.
+            RecommendationResult: Идентификаторы элементов, их рекомендации и сходство
+                по убыванию в колоночном виде.
         """
-        recommendations = defaultdict(list)
-        num_items = similarity_matrix.shape[0]
+        ids = df["id"].to_numpy()
+        positions = RecommendationEnginePandas._select_top_n(
+            similarity_matrix, np.arange(similarity_matrix.shape[0]), top_n
+        )
+        scores = np.take_along_axis(similarity_matrix, positions, axis=1)
+        return RecommendationResult.from_matrix(ids, ids[positions], scores)
+
+    @staticmethod
+    def _select_top_n(similarity_block: np.ndarray, self_positions: np.ndarray, top_n: int) -> np.ndarray:
+        """
+        Векторно выбирает позиции топ-N соседей для каждой строки блока сходства.
+
+        Вместо полной сортировки строки используется `np.argpartition`, после чего
+        сортируются только top_n + 1 кандидатов. Сам элемент исключается по индексу
+        его колонки, а не по предположению, что он окажется первым.
+        Входной блок не изменяется.
+
+        Args:
+            similarity_block (np.ndarray): Блок сходства (rows x N).
+            self_positions (np.ndarray): Номер колонки самого элемента для каждой строки блока.
+            top_n (int): Количество рекомендаций.
+
+        Returns:
+            np.ndarray: Массив позиций соседей (rows x top_n), отсортированный по убыванию сходства.
+        """
+        num_rows, num_items = similarity_block.shape
+        top_n = min(top_n, num_items - 1)
+        if top_n <= 0:
+            return np.empty((num_rows, 0), dtype=np.intp)
+
+        # top_n + 1 кандидатов гарантированно содержат топ-N без самого элемента
+        candidates = np.argpartition(-similarity_block, kth=top_n, axis=1)[:, : top_n + 1]
+        scores = np.take_along_axis(similarity_block, candidates, axis=1).astype(np.float64)
 
-        for i in range(num_items):
-            similarity_scores = list(enumerate(similarity_matrix[i]))
-            similarity_scores = sorted(similarity_scores, key=lambda x: x[1], reverse=True)
-            top_recommendations = [df.iloc[j]["id"] for j, _ in similarity_scores[1 : top_n + 1]]
-            recommendations[df.iloc[i]["id"]] = top_recommendations
+        scores[candidates == np.asarray(self_positions)[:, None]] = -np.inf
 
-        return pd.DataFrame(list(recommendations.items()), columns=["id", "recommended_ids"])
+        order = np.argsort(-scores, axis=1, kind="stable")[:, :top_n]
+        return np.take_along_axis(candidates, order, axis=1)
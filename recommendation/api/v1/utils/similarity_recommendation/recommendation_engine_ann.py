@@ -0,0 +1,265 @@
+import time
+from typing import Any, Dict
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.decomposition import TruncatedSVD
+from sklearn.preprocessing import normalize
+
+from recommendation.api.v1.utils.similarity_recommendation.recommendation_engine import RecommendationEnginePandas
+from recommendation.api.v1.utils.similarity_recommendation.recommendation_result import RecommendationResult
+from recommendation.api.v1.utils.similarity_recommendation.tfidf_state import TfidfState
+
+
+class RecommendationEngineANN(RecommendationEnginePandas):
+    """
+    Приближённый рекомендательный движок (approximate nearest neighbours).
+
+    TF-IDF векторы сжимаются через TruncatedSVD, после чего элементы разбиваются
+    на кластеры грубым квантователем (IVF, MiniBatchKMeans). Соседи каждого элемента
+    ищутся только среди элементов `n_probe` ближайших кластеров и ранжируются по точному
+    косинусному сходству исходных TF-IDF векторов, поэтому сложность построения —
+    O(N x n_probe x N / n_lists) вместо O(N^2).
+
+    Параметры построения позволяют выбирать баланс между полнотой и скоростью:
+    больше `n_components` и `n_probe` — выше recall, меньше `n_lists` — больше кандидатов.
+
+    Attributes:
+        n_components (int): Размерность пространства после SVD.
+        n_lists (int | None): Количество кластеров. Если не задано, используется sqrt(N).
+        n_probe (int): Количество просматриваемых кластеров для каждого элемента.
+        random_state (int): Зерно генератора случайных чисел для SVD и KMeans.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            top_n: int,
+            block_size: int | None = None,
+            state_dir: str | None = None,
+            artifact_dir: str | None = None,
+            chunk_size: int | None = None,
+            hashing_n_features: int = 2 ** 20,
+            n_components: int = 128,
+            n_lists: int | None = None,
+            n_probe: int = 8,
+            random_state: int = 42
+    ):
+        """
+        Инициализирует RecommendationEngineANN.
+
+        Args:
+            path (str): Путь к файлу с данными.
+            top_n (int): Количество рекомендаций для каждого элемента.
+            block_size (int | None): Максимальное количество запросов в одном блоке умножения.
+            state_dir (str | None): Директория для сохранения состояния построения.
+            artifact_dir (str | None): Директория кеша артефактов векторизации.
+            chunk_size (int | None): Размер части файла в потоковом режиме.
+            hashing_n_features (int): Размер хеш-пространства в потоковом режиме.
+            n_components (int): Размерность пространства после SVD.
+            n_lists (int | None): Количество кластеров грубого квантователя.
+            n_probe (int): Количество просматриваемых кластеров.
+            random_state (int): Зерно генератора случайных чисел.
+        """
+        super().__init__(
+            path, top_n,
+            block_size=block_size or 1024,
+            state_dir=state_dir,
+            artifact_dir=artifact_dir,
+            chunk_size=chunk_size,
+            hashing_n_features=hashing_n_features
+        )
+        self.n_components = n_components
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.random_state = random_state
+
+    def generate_recommendations(self) -> RecommendationResult:
+        """
+        Генерирует приближённые рекомендации для всех элементов в данных.
+
+        Returns:
+            RecommendationResult: Идентификаторы элементов, их рекомендации и сходство
+                по убыванию в колоночном виде.
+        """
+        artifact = self._load_vectorized()
+        tfidf_matrix, ids = artifact.tfidf_matrix, artifact.ids
+        positions, scores = self._build_neighbours(tfidf_matrix)
+        if self.state_dir:
+            TfidfState(artifact.vocabulary, artifact.idf, tfidf_matrix, ids, ids[positions], scores).save(
+                self.state_dir
+            )
+        return RecommendationResult.from_matrix(ids, ids[positions], scores)
+
+    def recall_report(self, sample_size: int = 1000) -> Dict[str, Any]:
+        """
+        Сравнивает приближённые рекомендации с точными на случайной выборке элементов.
+
+        Для выборки точные топ-N считаются перемножением её TF-IDF строк со всей матрицей,
+        поэтому отчёт можно строить и на каталогах, для которых точный движок слишком дорог.
+
+        Args:
+            sample_size (int): Количество элементов в выборке.
+
+        Returns:
+            Dict[str, Any]: Отчёт с recall@top_n, параметрами построения и временем расчёта.
+        """
+        tfidf_matrix = self._load_vectorized().tfidf_matrix
+        num_items = tfidf_matrix.shape[0]
+
+        started = time.perf_counter()
+        approx_positions, _ = self._build_neighbours(tfidf_matrix)
+        ann_seconds = time.perf_counter() - started
+
+        rng = np.random.default_rng(self.random_state)
+        sample = np.sort(rng.choice(num_items, size=min(sample_size, num_items), replace=False))
+
+        started = time.perf_counter()
+        exact_positions, _ = self._calculate_top_n(tfidf_matrix, sample, self.top_n, self.block_size)
+        exact_seconds = time.perf_counter() - started
+
+        return {
+            "top_n": exact_positions.shape[1],
+            "sample_size": len(sample),
+            "num_items": num_items,
+            f"recall@{self.top_n}": recall_at_top_n(exact_positions, approx_positions[sample]),
+            "n_components": self.n_components,
+            "n_lists": self._resolve_n_lists(num_items),
+            "n_probe": self.n_probe,
+            "ann_build_seconds": round(ann_seconds, 3),
+            "exact_sample_seconds": round(exact_seconds, 3),
+        }
+
+    def _build_neighbours(self, tfidf_matrix: csr_matrix) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Строит матрицы позиций приближённых соседей и их сходства для всех элементов.
+
+        Args:
+            tfidf_matrix (csr_matrix): Нормированная TF-IDF матрица.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Позиции соседей и их сходство (N x top_n),
+                отсортированные по убыванию сходства.
+        """
+        num_items = tfidf_matrix.shape[0]
+        width = max(min(self.top_n, num_items - 1), 0)
+        vectors = self._reduce(tfidf_matrix)
+        labels, centroids = self._fit_coarse_quantizer(vectors)
+
+        # Списки элементов каждого кластера без прохода по кластерам в Python
+        order = np.argsort(labels, kind="stable")
+        bounds = np.concatenate(([0], np.cumsum(np.bincount(labels, minlength=len(centroids)))))
+        members = [order[bounds[c]:bounds[c + 1]] for c in range(len(centroids))]
+        centroid_order = np.argsort(-(centroids @ centroids.T), axis=1)
+
+        neighbours = np.empty((num_items, width), dtype=np.intp)
+        scores = np.empty((num_items, width))
+        for cluster, queries in enumerate(members):
+            if not len(queries):
+                continue
+            candidates = self._probe_candidates(cluster, centroid_order[cluster], members, width)
+            candidate_vectors = tfidf_matrix[candidates].T.tocsr()
+
+            # Элементы кластера стоят первыми среди кандидатов, поэтому
+            # позиция i-го запроса в списке кандидатов равна i
+            for start in range(0, len(queries), self.block_size):
+                stop = min(start + self.block_size, len(queries))
+                block = (tfidf_matrix[queries[start:stop]] @ candidate_vectors).toarray()
+                positions = self._select_top_n(block, np.arange(start, stop), width)
+                neighbours[queries[start:stop]] = candidates[positions]
+                scores[queries[start:stop]] = np.take_along_axis(block, positions, axis=1)
+        return neighbours, scores
+
+    def _probe_candidates(self, cluster: int, centroid_order: np.ndarray, members: list, width: int) -> np.ndarray:
+        """
+        Собирает кандидатов из `n_probe` ближайших кластеров.
+
+        Кластер самого запроса всегда идёт первым. Если кандидатов меньше, чем top_n + 1,
+        просматриваются дополнительные кластеры, чтобы у каждого элемента было top_n соседей.
+
+        Args:
+            cluster (int): Номер кластера запросов.
+            centroid_order (np.ndarray): Кластеры, отсортированные по близости к `cluster`.
+            members (list): Списки позиций элементов по кластерам.
+            width (int): Требуемое количество соседей.
+
+        Returns:
+            np.ndarray: Позиции кандидатов.
+        """
+        probed = [members[cluster]]
+        count = len(members[cluster])
+        for other in centroid_order:
+            if len(probed) >= self.n_probe and count > width:
+                break
+            if other == cluster:
+                continue
+            probed.append(members[other])
+            count += len(members[other])
+        return np.concatenate(probed)
+
+    def _reduce(self, tfidf_matrix: csr_matrix) -> np.ndarray:
+        """
+        Сжимает TF-IDF матрицу через TruncatedSVD и нормирует строки по L2.
+
+        Args:
+            tfidf_matrix (csr_matrix): TF-IDF матрица.
+
+        Returns:
+            np.ndarray: Плотная матрица (N x n_components) типа float32.
+        """
+        n_components = min(self.n_components, tfidf_matrix.shape[1] - 1, tfidf_matrix.shape[0] - 1)
+        if n_components < 1:
+            vectors = tfidf_matrix.toarray()
+        else:
+            svd = TruncatedSVD(n_components=n_components, random_state=self.random_state)
+            vectors = svd.fit_transform(tfidf_matrix)
+        return normalize(vectors).astype(np.float32)
+
+    def _fit_coarse_quantizer(self, vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Обучает грубый квантователь и распределяет элементы по кластерам.
+
+        Args:
+            vectors (np.ndarray): Сжатые нормированные векторы.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Номера кластеров элементов и нормированные центроиды.
+        """
+        n_lists = self._resolve_n_lists(len(vectors))
+        kmeans = MiniBatchKMeans(n_clusters=n_lists, random_state=self.random_state, n_init=3)
+        labels = kmeans.fit_predict(vectors)
+        return labels, normalize(kmeans.cluster_centers_).astype(np.float32)
+
+    def _resolve_n_lists(self, num_items: int) -> int:
+        """
+        Возвращает фактическое количество кластеров для каталога заданного размера.
+
+        Args:
+            num_items (int): Количество элементов.
+
+        Returns:
+            int: Количество кластеров.
+        """
+        n_lists = self.n_lists or int(np.sqrt(num_items))
+        return max(1, min(n_lists, num_items))
+
+
+def recall_at_top_n(exact_positions: np.ndarray, approx_positions: np.ndarray) -> float:
+    """
+    Считает средний recall@top_n приближённых соседей относительно точных.
+
+    Args:
+        exact_positions (np.ndarray): Точные соседи (rows x top_n).
+        approx_positions (np.ndarray): Приближённые соседи для тех же строк (rows x top_n).
+
+    Returns:
+        float: Доля точных соседей, найденных приближённым поиском.
+    """
+    if not exact_positions.size:
+        return 1.0
+    hits = sum(
+        np.intersect1d(exact, approx, assume_unique=True).size
+        for exact, approx in zip(exact_positions, approx_positions)
+    )
+    return hits / exact_positions.size
@@ -0,0 +1,155 @@
+import numpy as np
+import pandas as pd
+from scipy.sparse import vstack
+
+from recommendation.api.v1.utils.similarity_recommendation.recommendation_engine import (
+    REQUIRED_COLUMNS,
+    RecommendationEnginePandas,
+)
+from recommendation.api.v1.utils.similarity_recommendation.recommendation_result import RecommendationResult
+from recommendation.api.v1.utils.similarity_recommendation.tfidf_state import TfidfState
+
+
+class RecommendationEngineIncremental(RecommendationEnginePandas):
+    """
+    Инкрементальный рекомендательный движок, применяющий дельту к последнему построению.
+
+    Дельта — файл данных (CSV, Parquet или Arrow IPC) с колонками id, title, description,
+    categories, tags и action. Строки с `action == "delete"` удаляют элемент из каталога,
+    остальные (add, update или пустое значение) добавляют или заменяют его.
+
+    Вместо повторного обучения используется сохранённое состояние (`TfidfState`):
+    новые тексты векторизуются сохранёнными словарём и IDF-весами (термины вне словаря
+    игнорируются до следующего полного построения). Сходство пересчитывается только для:
+        - добавленных и изменённых элементов;
+        - элементов, в топ-N которых были изменённые или удалённые элементы;
+        - элементов, в топ-N которых изменённый элемент теперь проходит по сходству.
+
+    Attributes:
+        deleted_ids (np.ndarray): Идентификаторы удалённых элементов после последнего вызова
+            `generate_recommendations`.
+    """
+
+    columns = REQUIRED_COLUMNS + ["action"]
+
+    def __init__(
+            self,
+            path: str,
+            top_n: int,
+            state_dir: str,
+            block_size: int | None = None,
+            staged_state_dir: str | None = None
+    ):
+        """
+        Инициализирует RecommendationEngineIncremental.
+
+        Args:
+            path (str): Путь к файлу с дельтой.
+            top_n (int): Количество рекомендаций для каждого элемента.
+            state_dir (str): Директория с состоянием последнего построения.
+            block_size (int | None): Размер блока строк для поблочного расчёта сходства.
+            staged_state_dir (str | None): Директория для нового состояния. Если задана,
+                состояние в `state_dir` не меняется, пока новое не станет опорным
+                (`TfidfState.promote`) после публикации; иначе оно заменяется сразу.
+        """
+        super().__init__(path, top_n, block_size=block_size, state_dir=state_dir)
+        self.staged_state_dir = staged_state_dir
+        self.deleted_ids = np.empty(0, dtype=np.int64)
+
+    def generate_recommendations(self) -> RecommendationResult:
+        """
+        Применяет дельту и пересчитывает рекомендации только для затронутых элементов.
+
+        Returns:
+            RecommendationResult: Рекомендации и сходство только для затронутых
+                элементов. Идентификаторы удалённых элементов доступны в `deleted_ids`.
+        """
+        state = TfidfState.load(self.state_dir)
+        delta = self._upload_data()
+        delta = self._prepare_for_cosine_similarity(delta)
+
+        is_deleted = self._parse_actions(delta) == "delete"
+        upserts = delta[~is_deleted].drop_duplicates("id", keep="last")
+        upsert_ids = upserts["id"].to_numpy(dtype=state.ids.dtype)
+        self.deleted_ids = np.setdiff1d(delta.loc[is_deleted, "id"].to_numpy(dtype=state.ids.dtype), upsert_ids)
+        touched_ids = np.concatenate((self.deleted_ids, upsert_ids))
+
+        # Удалённые и изменённые строки убираются, изменённые и новые дописываются в конец
+        kept = np.flatnonzero(~np.isin(state.ids, touched_ids))
+        tfidf_matrix = vstack((state.tfidf_matrix[kept], state.vectorizer().transform(upserts["text_data"]))).tocsr()
+        ids = np.concatenate((state.ids[kept], upsert_ids))
+        changed = np.arange(len(kept), len(ids))
+
+        width = max(min(self.top_n, len(ids) - 1), 0)
+        if width != state.neighbour_ids.shape[1]:
+            # Размер списков изменился (каталог был меньше top_n) — пересчитываем всё
+            affected = np.arange(len(ids))
+            neighbour_ids = np.empty((len(ids), width), dtype=ids.dtype)
+            scores = np.empty((len(ids), width))
+        else:
+            neighbour_ids = np.concatenate((state.neighbour_ids[kept], np.empty((len(changed), width), ids.dtype)))
+            scores = np.concatenate((state.scores[kept], np.empty((len(changed), width))))
+            affected = np.union1d(changed, self._find_stale_rows(tfidf_matrix, changed, neighbour_ids[:len(kept)],
+                                                                 scores[:len(kept)], touched_ids))
+
+        positions, affected_scores = self._calculate_top_n(tfidf_matrix, affected, self.top_n, self.block_size)
+        neighbour_ids[affected] = ids[positions]
+        scores[affected] = affected_scores
+
+        TfidfState(state.vocabulary, state.idf, tfidf_matrix, ids, neighbour_ids, scores).save(
+            self.staged_state_dir or self.state_dir
+        )
+        return RecommendationResult.from_matrix(ids[affected], neighbour_ids[affected], scores[affected])
+
+    def _find_stale_rows(
+            self,
+            tfidf_matrix,
+            changed: np.ndarray,
+            kept_neighbour_ids: np.ndarray,
+            kept_scores: np.ndarray,
+            touched_ids: np.ndarray
+    ) -> np.ndarray:
+        """
+        Находит сохранённые строки, чьи топ-N списки могли измениться из-за дельты.
+
+        Строка устарела, если её список содержит изменённый или удалённый элемент либо
+        если сходство с каким-либо изменённым элементом выше её последнего (N-го) соседа.
+        Сходство симметрично, поэтому достаточно перемножить только изменённые строки.
+
+        Args:
+            tfidf_matrix (csr_matrix): Обновлённая TF-IDF матрица.
+            changed (np.ndarray): Позиции добавленных и изменённых элементов.
+            kept_neighbour_ids (np.ndarray): Сохранённые соседи неизменённых строк.
+            kept_scores (np.ndarray): Сохранённое сходство неизменённых строк.
+            touched_ids (np.ndarray): Идентификаторы изменённых и удалённых элементов.
+
+        Returns:
+            np.ndarray: Позиции устаревших строк.
+        """
+        num_kept = len(kept_neighbour_ids)
+        stale = np.isin(kept_neighbour_ids, touched_ids).any(axis=1)
+        if not len(changed) or not kept_scores.shape[1]:
+            return np.flatnonzero(stale)
+
+        thresholds = kept_scores[:, -1]
+        block_size = self.block_size or len(changed)
+        transposed = tfidf_matrix[:num_kept].T.tocsr()
+        for start in range(0, len(changed), block_size):
+            block = (tfidf_matrix[changed[start:start + block_size]] @ transposed).toarray()
+            stale |= block.max(axis=0) > thresholds
+        return np.flatnonzero(stale)
+
+    @staticmethod
+    def _parse_actions(df: pd.DataFrame) -> np.ndarray:
+        """
+        Возвращает нормализованные значения колонки `action`.
+
+        Args:
+            df (pd.DataFrame): DataFrame с дельтой.
+
+        Returns:
+            np.ndarray: Значения action в нижнем регистре (пустая строка, если колонки нет).
+        """
+        if "action" not in df.columns:
+            return np.full(len(df), "", dtype=object)
+        return df["action"].fillna("").astype(str).str.strip().str.lower().to_numpy()
@@ -0,0 +1,133 @@
+from typing import Iterator
+
+import numpy as np
+
+
+class RecommendationResult:
+    """
+    Результат построения рекомендаций в колоночном виде.
+
+    Рекомендации всех элементов хранятся в плоских массивах, как строки CSR-матрицы:
+    рекомендации элемента `i` — `neighbour_ids[offsets[i]:offsets[i + 1]]`, их сходство —
+    `scores[offsets[i]:offsets[i + 1]]`. В отличие от DataFrame со списками в ячейках, результат
+    не создаёт Python-объекты на строку и на соседа, а пакеты для публикации — срезы массивов
+    без копирования.
+
+    Attributes:
+        ids (np.ndarray): Идентификаторы элементов (N,).
+        offsets (np.ndarray): Смещения рекомендаций элементов в плоских массивах (N + 1,).
+        neighbour_ids (np.ndarray): Идентификаторы рекомендованных элементов подряд для всех элементов.
+        scores (np.ndarray | None): Сходство с рекомендованными элементами (float32) или None.
+    """
+
+    def __init__(
+            self,
+            ids: np.ndarray,
+            offsets: np.ndarray,
+            neighbour_ids: np.ndarray,
+            scores: np.ndarray | None = None
+    ):
+        self.ids = ids
+        self.offsets = offsets
+        self.neighbour_ids = neighbour_ids
+        self.scores = scores
+
+    @classmethod
+    def from_matrix(
+            cls, ids: np.ndarray, neighbour_ids: np.ndarray, scores: np.ndarray | None = None
+    ) -> "RecommendationResult":
+        """
+        Создаёт результат из матрицы соседей фиксированной ширины.
+
+        Args:
+            ids (np.ndarray): Идентификаторы элементов (N,).
+            neighbour_ids (np.ndarray): Идентификаторы соседей (N x top_n).
+            scores (np.ndarray | None): Косинусное сходство с соседями (N x top_n).
+
+        Returns:
+            RecommendationResult: Результат с плоскими массивами (без копирования для непрерывных матриц).
+        """
+        ids = np.asarray(ids)
+        neighbour_ids = np.asarray(neighbour_ids).reshape(len(ids), -1)
+        offsets = np.arange(len(ids) + 1, dtype=np.int64) * neighbour_ids.shape[1]
+        # float32 достаточно для ранжирования и совпадает с форматом хранения в Redis и базе
+        flat_scores = None if scores is None else np.asarray(scores, dtype=np.float32).reshape(-1)
+        return cls(ids, offsets, neighbour_ids.reshape(-1), flat_scores)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def batches(self, batch_size: int) -> Iterator["RecommendationResult"]:
+        """
+        Делит результат на пакеты срезами массивов.
+
+        Args:
+            batch_size (int): Количество элементов в пакете.
+
+        Yields:
+            RecommendationResult: Пакет со своими смещениями, начинающимися с нуля.
+        """
+        for start in range(0, len(self.ids), batch_size):
+            end = min(start + batch_size, len(self.ids))
+            first, last = self.offsets[start], self.offsets[end]
+            yield RecommendationResult(
+                self.ids[start:end],
+                self.offsets[start:end + 1] - first,
+                self.neighbour_ids[first:last],
+                None if self.scores is None else self.scores[first:last],
+            )
+
+    def take(self, positions: np.ndarray) -> "RecommendationResult":
+        """
+        Выбирает элементы по позициям одной векторной выборкой.
+
+        Args:
+            positions (np.ndarray): Позиции выбираемых элементов в результате.
+
+        Returns:
+            RecommendationResult: Результат из выбранных элементов в порядке `positions`.
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        starts = self.offsets[positions]
+        lengths = self.offsets[positions + 1] - starts
+        offsets = np.zeros(len(positions) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        # Индекс каждого соседа в исходных массивах: начало его элемента плюс позиция внутри элемента
+        index = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return RecommendationResult(
+            self.ids[positions],
+            offsets,
+            self.neighbour_ids[index],
+            None if self.scores is None else self.scores[index],
+        )
+
+    def rows(self) -> Iterator[tuple[int, np.ndarray, np.ndarray | None]]:
+        """
+        Перебирает рекомендации элементов как срезы плоских массивов.
+
+        Yields:
+            tuple[int, np.ndarray, np.ndarray | None]: ID элемента, его рекомендации и их сходство.
+        """
+        for position, item_id in enumerate(self.ids.tolist()):
+            start, end = self.offsets[position], self.offsets[position + 1]
+            yield item_id, self.neighbour_ids[start:end], None if self.scores is None else self.scores[start:end]
+
+    def records(self, batch_size: int = 10_000) -> Iterator[tuple[int, list[int], list[float] | None]]:
+        """
+        Перебирает рекомендации элементов как Python-списки для драйверов базы данных.
+
+        Массивы преобразуются в списки одним вызовом `tolist` на пакет, а не поэлементно.
+
+        Args:
+            batch_size (int): Количество элементов, преобразуемых за один раз.
+
+        Yields:
+            tuple[int, list[int], list[float] | None]: ID элемента, его рекомендации и их сходство.
+        """
+        for batch in self.batches(batch_size):
+            offsets = batch.offsets.tolist()
+            neighbour_ids = batch.neighbour_ids.tolist()
+            scores = None if batch.scores is None else batch.scores.tolist()
+            for position, item_id in enumerate(batch.ids.tolist()):
+                start, end = offsets[position], offsets[position + 1]
+                yield item_id, neighbour_ids[start:end], None if scores is None else scores[start:end]
@@ -0,0 +1,136 @@
+import logging
+import os
+
+import numpy as np
+
+from recommendation.api.v1.utils.similarity_recommendation.tfidf_state import TfidfState
+
+logger = logging.getLogger(__name__)
+
+
+class SparseSimilarityIndex:
+    """
+    Индекс только для чтения поверх сохранённой TF-IDF матрицы для расчёта рекомендаций по запросу.
+
+    Матрица загружается с отображением в память, поэтому несколько процессов API
+    разделяют одни и те же страницы. Соседи одного элемента считаются одним
+    произведением разреженной матрицы на TF-IDF вектор его метаданных.
+
+    Индекс, загруженный из директории, переключается на новое состояние в `reload`.
+    Состояние, векторизатор и идентичность директории заменяются одним присваиванием,
+    поэтому запрос, выполняемый в другом потоке, работает с одним состоянием целиком.
+
+    Attributes:
+        directory (str | None): Директория состояния построения.
+    """
+
+    def __init__(self, state: TfidfState, directory: str | None = None, identity: tuple | None = None):
+        """
+        Инициализирует SparseSimilarityIndex.
+
+        Args:
+            state (TfidfState): Состояние последнего построения.
+            directory (str | None): Директория, из которой загружено состояние.
+            identity (tuple | None): Идентичность директории при загрузке (см. `_identity`).
+        """
+        self.directory = directory
+        self._loaded = (state, state.vectorizer(), identity)
+
+    @property
+    def state(self) -> TfidfState:
+        """Состояние построения, по которому сейчас выполняются запросы."""
+        return self._loaded[0]
+
+    @staticmethod
+    def _identity(directory: str) -> tuple:
+        """
+        Возвращает идентичность директории состояния.
+
+        `TfidfState.promote` заменяет директорию переименованием, поэтому у нового
+        состояния другой inode.
+
+        Raises:
+            FileNotFoundError: Если директории нет.
+        """
+        stat = os.stat(directory)
+        return stat.st_dev, stat.st_ino, stat.st_mtime_ns
+
+    @classmethod
+    def load(cls, directory: str) -> "SparseSimilarityIndex":
+        """
+        Загружает индекс из директории состояния построения.
+
+        Args:
+            directory (str): Директория с `TfidfState`.
+
+        Returns:
+            SparseSimilarityIndex: Индекс с матрицей, отображённой в память.
+        """
+        identity = cls._identity(directory)
+        return cls(TfidfState.load(directory, mmap_mode="r"), directory, identity)
+
+    def reload(self) -> bool:
+        """
+        Переключается на новое состояние, если директория заменена с прошлой загрузки.
+
+        Если директория отсутствует (например, в момент замены), текущее состояние сохраняется.
+
+        Returns:
+            bool: True, если загружено новое состояние.
+        """
+        if self.directory is None:
+            return False
+        try:
+            identity = self._identity(self.directory)
+            if identity == self._loaded[2]:
+                return False
+            state = TfidfState.load(self.directory, mmap_mode="r")
+        except FileNotFoundError:
+            return False
+
+        self._loaded = (state, state.vectorizer(), identity)
+        logger.info(f"Загружен индекс сходства {self.directory}: {len(state.ids)} видео")
+        return True
+
+    def query(self, text: str, top_n: int, exclude_id: int | None = None) -> list[int]:
+        """
+        Находит топ-N элементов, наиболее похожих на текст.
+
+        Args:
+            text (str): Объединённые метаданные элемента (title, description, categories, tags).
+            top_n (int): Количество рекомендаций.
+            exclude_id (int | None): Идентификатор, который не должен попасть в результат
+                (сам элемент, если он уже есть в индексе).
+
+        Returns:
+            list[int]: Идентификаторы похожих элементов по убыванию сходства.
+        """
+        return self.query_scored(text, top_n, exclude_id)[0]
+
+    def query_scored(
+            self, text: str, top_n: int, exclude_id: int | None = None
+    ) -> tuple[list[int], list[float]]:
+        """
+        Находит топ-N элементов, наиболее похожих на текст, вместе с их сходством.
+
+        Args:
+            text (str): Объединённые метаданные элемента (title, description, categories, tags).
+            top_n (int): Количество рекомендаций.
+            exclude_id (int | None): Идентификатор, который не должен попасть в результат.
+
+        Returns:
+            tuple[list[int], list[float]]: Идентификаторы похожих элементов и косинусное сходство
+                с ними по убыванию сходства.
+        """
+        state, vectorizer, _ = self._loaded
+        vector = vectorizer.transform([text])
+        scores = np.asarray(state.tfidf_matrix.dot(vector.T).todense()).ravel()
+        if exclude_id is not None:
+            scores[state.ids == exclude_id] = -np.inf
+
+        top_n = min(top_n, int(np.isfinite(scores).sum()))
+        if top_n <= 0:
+            return [], []
+        positions = np.argpartition(-scores, top_n - 1)[:top_n]
+        positions = positions[np.argsort(-scores[positions], kind="stable")]
+        return state.ids[positions].tolist(), scores[positions].tolist()
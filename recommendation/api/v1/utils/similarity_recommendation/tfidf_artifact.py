@@ -0,0 +1,97 @@
+import hashlib
+import os
+import shutil
+
+from recommendation.api.v1.utils.similarity_recommendation.tfidf_state import TfidfState
+
+# Версия формата артефакта и параметров векторизации; меняется при их изменении,
+# чтобы старые артефакты не переиспользовались
+ARTIFACT_VERSION = "tfidf-v1"
+
+
+def dataset_hash(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Считает хеш содержимого файла датасета.
+
+    Файл читается по частям, поэтому хеширование не требует памяти под весь файл.
+
+    Args:
+        path (str): Путь к файлу датасета.
+        chunk_size (int): Размер читаемой части в байтах.
+
+    Returns:
+        str: Ключ артефакта: версия формата и SHA-256 содержимого.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return f"{ARTIFACT_VERSION}-{digest.hexdigest()}"
+
+
+class TfidfArtifactCache:
+    """
+    Дисковый кеш артефактов векторизации (словарь, IDF-веса, CSR-массивы и идентификаторы).
+
+    Каждый артефакт хранится в отдельной директории, названной по хешу содержимого
+    датасета, и загружается через отображение массивов в память. Хранятся только
+    `max_artifacts` последних артефактов.
+
+    Attributes:
+        directory (str): Корневая директория кеша.
+        max_artifacts (int): Максимальное количество хранимых артефактов.
+    """
+
+    def __init__(self, directory: str, max_artifacts: int = 3):
+        """
+        Инициализирует TfidfArtifactCache.
+
+        Args:
+            directory (str): Корневая директория кеша.
+            max_artifacts (int): Максимальное количество хранимых артефактов.
+        """
+        self.directory = directory
+        self.max_artifacts = max_artifacts
+
+    def load(self, key: str) -> TfidfState | None:
+        """
+        Загружает артефакт по ключу.
+
+        Args:
+            key (str): Ключ артефакта (`dataset_hash`).
+
+        Returns:
+            TfidfState | None: Артефакт с массивами, отображёнными в память, или None, если его нет.
+        """
+        path = os.path.join(self.directory, key)
+        if not os.path.isdir(path):
+            return None
+        # Обновляем время изменения, чтобы часто используемый артефакт не вытеснялся
+        os.utime(path)
+        return TfidfState.load(path, mmap_mode="r")
+
+    def save(self, key: str, artifact: TfidfState) -> None:
+        """
+        Сохраняет артефакт и удаляет самые старые, если их больше `max_artifacts`.
+
+        Args:
+            key (str): Ключ артефакта (`dataset_hash`).
+            artifact (TfidfState): Состояние векторизации (соседи не сохраняются).
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        TfidfState(artifact.vocabulary, artifact.idf, artifact.tfidf_matrix, artifact.ids).save(
+            os.path.join(self.directory, key)
+        )
+        self._prune()
+
+    def _prune(self) -> None:
+        """
+        Удаляет самые старые артефакты сверх `max_artifacts`.
+        """
+        entries = [
+            entry for entry in os.scandir(self.directory)
+            if entry.is_dir() and entry.name.startswith(f"{ARTIFACT_VERSION}-") and "." not in entry.name
+        ]
+        entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        for entry in entries[self.max_artifacts:]:
+            shutil.rmtree(entry.path, ignore_errors=True)
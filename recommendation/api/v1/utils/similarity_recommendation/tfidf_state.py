@@ -0,0 +1,180 @@
+import json
+import os
+import shutil
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from recommendation.api.v1.utils.similarity_recommendation.hashing_vectorizer import HashingTfidfVectorizer
+
+
+class TfidfState:
+    """
+    Состояние последнего построения рекомендаций, сохраняемое на диск.
+
+    Содержит всё, что нужно для инкрементального пересчёта: словарь и IDF-веса
+    обученного TF-IDF векторизатора, CSR-массивы TF-IDF матрицы, идентификаторы
+    элементов, а также идентификаторы и сходства их топ-N соседей.
+
+    Без соседей (`neighbour_ids` и `scores` равны None) состояние служит артефактом
+    векторизации, который кешируется по хешу содержимого датасета (`TfidfArtifactCache`).
+
+    Пустой словарь означает, что матрица построена в хеш-пространстве (`HashingTfidfVectorizer`).
+
+    Attributes:
+        vocabulary (list[str]): Термины словаря, упорядоченные по номеру колонки.
+        idf (np.ndarray): IDF-веса терминов.
+        tfidf_matrix (csr_matrix): Нормированная TF-IDF матрица (N x V).
+        ids (np.ndarray): Идентификаторы элементов (N,).
+        neighbour_ids (np.ndarray | None): Идентификаторы соседей (N x top_n).
+        scores (np.ndarray | None): Косинусное сходство с соседями (N x top_n).
+    """
+
+    def __init__(
+            self,
+            vocabulary: list[str],
+            idf: np.ndarray,
+            tfidf_matrix: csr_matrix,
+            ids: np.ndarray,
+            neighbour_ids: np.ndarray | None = None,
+            scores: np.ndarray | None = None
+    ):
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.tfidf_matrix = tfidf_matrix
+        self.ids = ids
+        self.neighbour_ids = neighbour_ids
+        self.scores = scores
+
+    @classmethod
+    def from_vectorizer(
+            cls,
+            vectorizer: TfidfVectorizer,
+            tfidf_matrix: csr_matrix,
+            ids: np.ndarray,
+            neighbour_ids: np.ndarray | None = None,
+            scores: np.ndarray | None = None
+    ) -> "TfidfState":
+        """
+        Создаёт состояние из обученного векторизатора и результатов построения.
+
+        Args:
+            vectorizer (TfidfVectorizer): Обученный векторизатор.
+            tfidf_matrix (csr_matrix): TF-IDF матрица.
+            ids (np.ndarray): Идентификаторы элементов.
+            neighbour_ids (np.ndarray | None): Идентификаторы соседей.
+            scores (np.ndarray | None): Сходство с соседями.
+
+        Returns:
+            TfidfState: Новое состояние.
+        """
+        vocabulary = [""] * len(vectorizer.vocabulary_)
+        for term, column in vectorizer.vocabulary_.items():
+            vocabulary[column] = term
+        return cls(vocabulary, vectorizer.idf_, tfidf_matrix, ids, neighbour_ids, scores)
+
+    def vectorizer(self) -> TfidfVectorizer | HashingTfidfVectorizer:
+        """
+        Восстанавливает векторизатор с сохранёнными словарём и IDF-весами без повторного обучения.
+
+        Returns:
+            TfidfVectorizer | HashingTfidfVectorizer: Готовый к `transform` векторизатор.
+        """
+        if not self.vocabulary:
+            return HashingTfidfVectorizer(n_features=len(self.idf), idf=self.idf)
+        vectorizer = TfidfVectorizer(
+            stop_words="english", vocabulary={term: column for column, term in enumerate(self.vocabulary)}
+        )
+        vectorizer.idf_ = self.idf
+        return vectorizer
+
+    def save(self, directory: str) -> None:
+        """
+        Сохраняет состояние в директорию.
+
+        Файлы сначала записываются во временную директорию, которая затем заменяет
+        предыдущее состояние, чтобы прерванная запись не оставила его частично обновлённым.
+
+        Args:
+            directory (str): Директория для сохранения.
+        """
+        tmp_directory = f"{directory}.tmp"
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+        os.makedirs(tmp_directory)
+
+        with open(os.path.join(tmp_directory, "vocabulary.json"), "w", encoding="utf-8") as f:
+            json.dump(self.vocabulary, f, ensure_ascii=False)
+        np.save(os.path.join(tmp_directory, "idf.npy"), self.idf)
+        np.save(os.path.join(tmp_directory, "tfidf_data.npy"), self.tfidf_matrix.data)
+        np.save(os.path.join(tmp_directory, "tfidf_indices.npy"), self.tfidf_matrix.indices)
+        np.save(os.path.join(tmp_directory, "tfidf_indptr.npy"), self.tfidf_matrix.indptr)
+        np.save(os.path.join(tmp_directory, "ids.npy"), self.ids)
+        if self.neighbour_ids is not None:
+            np.save(os.path.join(tmp_directory, "neighbour_ids.npy"), self.neighbour_ids)
+            np.save(os.path.join(tmp_directory, "scores.npy"), self.scores)
+
+        self.promote(tmp_directory, directory)
+
+    @staticmethod
+    def promote(staged_directory: str, directory: str) -> None:
+        """
+        Заменяет состояние в `directory` полностью записанным состоянием из `staged_directory`.
+
+        Так построение сохраняет состояние рядом с опорным и делает его опорным только
+        после успешной публикации рекомендаций.
+
+        Args:
+            staged_directory (str): Директория с записанным состоянием.
+            directory (str): Директория опорного состояния.
+        """
+        old_directory = f"{directory}.old"
+        shutil.rmtree(old_directory, ignore_errors=True)
+        if os.path.exists(directory):
+            os.rename(directory, old_directory)
+        os.rename(staged_directory, directory)
+        shutil.rmtree(old_directory, ignore_errors=True)
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: str | None = None) -> "TfidfState":
+        """
+        Загружает состояние из директории.
+
+        При `mmap_mode="r"` массивы не читаются в память, а отображаются из файлов,
+        поэтому загрузка почти мгновенна, а страницы подгружаются по мере обращения.
+
+        Args:
+            directory (str): Директория с сохранённым состоянием.
+            mmap_mode (str | None): Режим отображения массивов в память (см. `np.load`).
+
+        Returns:
+            TfidfState: Загруженное состояние.
+
+        Raises:
+            FileNotFoundError: Если состояние ещё не сохранялось.
+        """
+        if not os.path.isdir(directory):
+            raise FileNotFoundError(f"Состояние TF-IDF не найдено: {directory}")
+
+        with open(os.path.join(directory, "vocabulary.json"), encoding="utf-8") as f:
+            vocabulary = json.load(f)
+
+        def load_array(name: str) -> np.ndarray | None:
+            array_path = os.path.join(directory, f"{name}.npy")
+            return np.load(array_path, mmap_mode=mmap_mode) if os.path.exists(array_path) else None
+
+        idf = load_array("idf")
+        indptr = load_array("tfidf_indptr")
+        tfidf_matrix = csr_matrix(
+            (load_array("tfidf_data"), load_array("tfidf_indices"), indptr),
+            shape=(len(indptr) - 1, len(idf)),
+            copy=False,
+        )
+        return cls(
+            vocabulary,
+            idf,
+            tfidf_matrix,
+            load_array("ids"),
+            load_array("neighbour_ids"),
+            load_array("scores"),
+        )
@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Literal
 
 from pydantic_settings import BaseSettings
 from pydantic import Field
@@ -13,8 +14,97 @@ class Settings(BaseSettings):
                                          description="The directory path where uploaded data files are stored.")
     redis_host: str = Field(default='redis', description="Host address for the Redis server.")
     redis_port: int = Field(default=6379, description="Port number for connecting to the Redis server.")
-    new_db: int = Field(default=0, description="The Redis database index to use for new data.")
-    old_db: int = Field(default=1, description="The Redis database index to use for old data.")
+    new_db: int = Field(default=0, description="The Redis database index used for recommendations.")
+    old_db: int = Field(default=1, description="Deprecated and unused: builds are published as Redis key "
+                                               "generations instead of being backed up to a second database.")
+    redis_generations_kept: int = Field(default=2, ge=1,
+                                        description="Number of recent build generations, including the active one, "
+                                                    "kept in Redis for rollback.")
+    redis_changes_kept: int = Field(default=1000, ge=1,
+                                    description="Number of recent publications whose changed video ids are kept "
+                                                "in Redis; API processes that fall further behind clear their "
+                                                "in-process cache instead of evicting single videos.")
+    redis_max_connections: int = Field(default=100, ge=1,
+                                       description="Maximum number of connections in the application Redis pool.")
+    database_pool_size: int = Field(default=10, ge=1,
+                                    description="Number of persistent connections in the Postgres pool.")
+    database_max_overflow: int = Field(default=10, ge=0,
+                                       description="Number of extra Postgres connections allowed above the pool size.")
+    database_read_pool_min_size: int = Field(default=1, ge=0,
+                                             description="Minimum number of asyncpg connections used for "
+                                                         "recommendation lookups.")
+    database_read_pool_max_size: int = Field(default=10, ge=1,
+                                             description="Maximum number of asyncpg connections used for "
+                                                         "recommendation lookups.")
+    database_bulk_load: bool = Field(default=True,
+                                     description="Publish full builds by COPYing rows into an unlogged staging table "
+                                                 "that replaces similar_recommendation in one transaction, instead "
+                                                 "of batched upserts.")
+    publish_batch_size: int = Field(default=1000, ge=1,
+                                    description="Number of videos in one batch written to Postgres and Redis "
+                                                "when a build is published.")
+    publish_max_in_flight_batches: int = Field(default=4, ge=1,
+                                               description="Maximum number of published batches queued for each sink "
+                                                           "(Postgres, Redis) before the producer waits for it.")
+    database_echo: bool = Field(default=False, description="Log every SQL statement (debugging only).")
+    local_cache_size: int = Field(default=10_000, ge=0,
+                                  description="Maximum number of decoded recommendation lists kept in each API "
+                                              "process (0 disables the in-process cache).")
+    local_cache_ttl: float = Field(default=60.0, gt=0,
+                                   description="Seconds an entry lives in the in-process cache.")
+    cache_generation_poll_interval: float = Field(default=1.0, gt=0,
+                                                  description="Seconds between checks of the published build "
+                                                              "generation that invalidates the in-process cache.")
+    cache_fill_ttl: int = Field(default=3600, ge=1,
+                                description="Seconds a recommendation list read from Postgres stays in Redis.")
+    negative_cache_ttl: int = Field(default=30, ge=1,
+                                    description="Seconds Redis remembers that a video has no recommendations.")
+    recommendation_batch_max_size: int = Field(default=100, ge=1,
+                                               description="Maximum number of video ids in one batch "
+                                                           "recommendation request.")
+    recommendation_cache_max_age: int = Field(default=60, ge=0,
+                                              description="Seconds clients and edge caches may reuse a recommendation "
+                                                          "response before revalidating it with If-None-Match.")
+    recommendation_top_n: int = Field(default=20, ge=1, description="Number of recommendations per video.")
+    similarity_block_size: int = Field(default=256, ge=0,
+                                       description="Number of TF-IDF rows multiplied per similarity block "
+                                                   "(0 builds the full N x N matrix).")
+    similarity_workers: int = Field(default=1, ge=1,
+                                    description="Number of processes used for the similarity and top-N build phase.")
+    ingestion_chunk_size: int = Field(default=0, ge=0,
+                                      description="Rows read per chunk in streaming ingestion with hashed TF-IDF "
+                                                  "(0 reads the whole file and fits a vocabulary).")
+    hashing_n_features: int = Field(default=2 ** 20, ge=1,
+                                    description="Number of hashed TF-IDF features in streaming ingestion.")
+    path_tfidf_state: str = Field(default=str(BASE_DIR / "tfidf_state"),
+                                  description="The directory where the state of the last build is stored "
+                                              "for incremental rebuilds.")
+    path_tfidf_artifacts: str = Field(default=str(BASE_DIR / "tfidf_artifacts"),
+                                      description="The directory where fitted TF-IDF artifacts are cached "
+                                                  "by dataset content hash.")
+    recommendation_snapshot_enabled: bool = Field(default=True,
+                                                  description="Write a memory-mapped snapshot of every build and "
+                                                              "serve recommendations from it before Redis.")
+    path_recommendation_snapshot: str = Field(default=str(BASE_DIR / "recommendation_snapshot" / "recommendations.bin"),
+                                              description="The file where the memory-mapped recommendation snapshot "
+                                                          "of the last build is stored.")
+    publish_diff_enabled: bool = Field(default=True,
+                                       description="Publish only recommendation lists that changed since the last "
+                                                   "published build, compared by per-video fingerprints.")
+    path_publish_fingerprints: str = Field(default=str(BASE_DIR / "recommendation_snapshot" / "fingerprints.bin"),
+                                           description="The file where fingerprints of the last published "
+                                                       "recommendation lists are stored.")
+    similarity_index_enabled: bool = Field(default=False,
+                                           description="Load the last build's TF-IDF matrix into the API process "
+                                                       "to compute recommendations for new videos on demand.")
+    recommendation_engine: Literal["exact", "ann"] = Field(default="exact",
+                                                           description="Similarity engine used for builds.")
+    ann_n_components: int = Field(default=128, ge=1,
+                                  description="Dimensionality of the reduced TF-IDF vectors for the ANN engine.")
+    ann_n_lists: int = Field(default=0, ge=0,
+                             description="Number of ANN coarse quantizer clusters (0 uses sqrt of the catalog size).")
+    ann_n_probe: int = Field(default=8, ge=1,
+                             description="Number of nearest clusters searched per item by the ANN engine.")
 
     class Config:
         env_file = "../.env"